@@ -1,11 +1,15 @@
 import logging
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Set
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from actionflow import metrics, profiling
 from actionflow.common import SharedResources, StateModel
 from actionflow.context import Context
 from actionflow.exceptions import ActionNotFound
+from actionflow.logger import bind_context
+from actionflow.outputs import OutputStore, Reference, references
 
 
 class BaseAction(ABC):
@@ -52,21 +56,70 @@ class BaseAction(ABC):
 class Action(BaseAction, StateModel):
     _short: bool = True
     name: str = None
+    id: Optional[str] = None
     description: str
     concurrency: bool = False
     retry: int = 1
     skip: bool = False
     continue_on_error: bool = False
-
-    shared_resources: SharedResources = SharedResources()
+    profile: bool = False
+
+    # Replaced by the store of the job, then of the run
+    shared_resources: SharedResources = Field(default_factory=SharedResources)
+    _attempts: int = 0
+    _outputs: OutputStore = None
+    _cancelled: bool = False
+
+    @property
+    def _kind(self) -> str:
+        return "action"
+
+    @property
+    def outputs(self) -> Dict[str, Any]:
+        if self._outputs is None:
+            return {}
+        return self._outputs.outputs(self.id or self.name)
+
+    def set_output(self, key: str, value: Any) -> None:
+        """Set an output, readable by the next steps as
+        `${{ steps.<id>.outputs.<key> }}`"""
+        if self._outputs is None:
+            self._outputs = OutputStore()
+        self._outputs.set(self.id or self.name, key, value)
+
+    def output_references(self) -> Set[Reference]:
+        """Step outputs referenced by the parameters"""
+        found = set()
+        for field in type(self).model_fields:
+            found |= references(getattr(self, field))
+        return found
+
+    def _resolve_outputs(self) -> None:
+        for field in type(self).model_fields:
+            value = getattr(self, field)
+            if references(value):
+                setattr(self, field, self._outputs.resolve(value))
+
+    def _release_outputs(self, consumed: Set[Reference]) -> None:
+        for step, key in consumed:
+            self._outputs.release(step, key)
+
+    def cancel(self) -> None:
+        """
+        Stop the action, another action of its group failed: no new attempt
+        is made. Actions that can interrupt their work extend this method.
+        """
+        self._cancelled = True
 
     def run(self) -> bool:
         """Run the action with retry logic"""
         try:
-            while self.retry > 0:
+            while self.retry > 0 and not self._cancelled:
+                self._attempts += 1
                 # Check if the action should be skipped
                 if self.skip and self._check():
                     logging.info(f"[Action: {self.name}] already satisfied, skipping.")
+                    metrics.ACTION_SKIPPED.inc(action=self.name)
                     return True
 
                 # logging.info(f"[Action: {self.name}] executing.")
@@ -82,7 +135,12 @@ class Action(BaseAction, StateModel):
                     )
                     self._post_process()
                     return True
+                if self._cancelled:
+                    logging.warning(f"[Action: {self.name}] Cancelled.")
+                    return False
                 self.retry -= 1
+                if self.retry > 0:
+                    metrics.ACTION_RETRIES.inc(action=self.name)
                 logging.warning(
                     f"[Action: {self.name}] Retrying, attempts left: {self.retry}"
                 )
@@ -94,16 +152,27 @@ class Action(BaseAction, StateModel):
 
     def execute(self, index: int, total: int) -> None:
         """Unified execution pipeline."""
-        self.machine.start()
-        try:
-            self.machine.complete() if self.run() else self.machine.fail()
-        except Exception as error:
-            logging.error(f"Error executing action {self.name}: {error}")
-            self.machine.fail()
+        with bind_context(step=self.id or self.name):
+            self.machine.start()
+            consumed = set()
+            if self._outputs is not None:
+                consumed = self.output_references()
+            try:
+                if consumed:
+                    self._resolve_outputs()
+                with profiling.profiled(self):
+                    success = self.run()
+                self.machine.complete() if success else self.machine.fail()
+            except Exception as error:
+                logging.error(f"Error executing action {self.name}: {error}")
+                self.machine.fail()
+            finally:
+                self._release_outputs(consumed)
 
     def summary(self):
         """Summary of the action"""
         return {
+            "id": self.id,
             "name": self.name,
             "state": self.machine.state,
             "exec": self._exec_time,
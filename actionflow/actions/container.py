@@ -1,114 +1,227 @@
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 from actionflow.action import Action
+from actionflow.streams import MODULE_LOADING, LineMatcher, LineStream
+from actionflow.tools import docker, get_docker_client, random_string
 
-try:
-    import docker as docker
-
-    client = docker.from_env()
-except ImportError:
-    logging.error("Docker SDK not found")
-    docker = None
-    client = None
+MARKER = "__actionflow_exit__:"
 
 
 class ContainerAction(Action):
     """
     ContainerAction represents an action to be performed on a Docker container.
+
+    With `batch`, the commands run in one shell exec session, each followed
+    by an exit status marker (the session stops at the first failure). With
+    `containers`, the same commands run on every container, `max_parallel`
+    at once, and the results are aggregated.
     """
 
     name: str = "container-action"
     description: str = "Container action"
-    container: str
+    container: Optional[str] = None
+    containers: List[str] = []
+    max_parallel: int = 8
     commands: list[str]
     user: str = "odoo"
     tty: bool = False
     stream: bool = False
+    batch: bool = False
     workdir: str = "/var/lib/odoo/.local/upgrade"
-    _buffer: str = ""
+
+    # Stream mode: lines kept for error reporting, extra progress regexes
+    tail_lines: int = 200
+    progress_patterns: List[str] = []
+    _progress: dict = None
 
     @property
     def services(self):
         return self.context.services.list()
 
+    def _targets(self) -> List[str]:
+        targets = ([self.container] if self.container else []) + [
+            name for name in self.containers if name != self.container
+        ]
+        if not targets:
+            raise ValueError("container or containers is required")
+        return targets
+
     def _check(self):
+        client = get_docker_client()
         try:
-            client.containers.get(self.container)
+            for name in self._targets():
+                client.containers.get(name)
         except docker.errors.NotFound:
             return False
         return True
 
-    def _parse(self, chunk):
-        print(chunk, end="")
-        self._buffer += chunk
+    def _on_event(self, name: str, event: dict) -> None:
+        self._progress = event
+        self.shared_resources.set_resource(f"{name}_progress", event)
+        logging.debug(f"[{name}] Progress: {event}")
+
+    def _line_stream(self, name: str, on_line=None) -> LineStream:
+        matchers = [MODULE_LOADING] + [
+            LineMatcher(f"pattern{index}", pattern)
+            for index, pattern in enumerate(self.progress_patterns)
+        ]
+        return LineStream(
+            tail_lines=self.tail_lines,
+            matchers=matchers,
+            on_line=on_line or (lambda line: logging.info(f"[{name}] {line}")),
+            on_event=lambda event: self._on_event(name, event),
+        )
+
+    def _exec_stream(self, container, command, tty: bool, stream: LineStream) -> int:
+        """Run a command in a new exec session, feed its output, return its status"""
+        exec_id = container.client.api.exec_create(
+            container.id,
+            command,
+            tty=tty,
+            workdir=self.workdir,
+            user=self.user,
+            environment={"PIP_ROOT_USER_ACTION": "ignore"},
+        )
+        # exec_start must know the session has a TTY: a TTY output is raw,
+        # otherwise it is read as multiplexed stdout/stderr frames
+        for chunk in container.client.api.exec_start(
+            exec_id["Id"], stream=True, tty=tty
+        ):
+            stream.feed(chunk)
+        stream.close()
+        return container.client.api.exec_inspect(exec_id["Id"])["ExitCode"]
+
+    def _run_commands(self, container) -> List[dict]:
+        results = []
+        for command in self.commands:
+            logging.debug(
+                f"Running command '{command}' in container '{container.name}'"
+            )
+            if self.stream:
+                stream = self._line_stream(container.name)
+                exit_code = self._exec_stream(container, command, True, stream)
+                output = stream.tail_text()
+            else:
+                exec_result = container.exec_run(
+                    command,
+                    tty=self.tty,
+                    user=self.user,
+                    environment={"PIP_ROOT_USER_ACTION": "ignore"},
+                    workdir=self.workdir,
+                )
+                exit_code = exec_result.exit_code
+                output = exec_result.output.decode("utf-8", errors="replace")
+                logging.info("Command output:\n%s", output)
+
+            results.append({"command": command, "exit_code": exit_code})
+            if exit_code:
+                logging.error(
+                    f"[{container.name}] Command '{command}' failed ({exit_code}), "
+                    f"last lines:\n{output[-4096:]}"
+                )
+                break
+        return results
+
+    def _batch_script(self, token: str) -> str:
+        lines = []
+        for index, command in enumerate(self.commands):
+            lines.append(command)
+            # The marker starts on its own line even after an output without
+            # a final newline, the blank line this adds otherwise is dropped
+            lines.append(
+                f"rc=$?; printf '\\n%s\\n' \"{MARKER}{token}:{index}:$rc\"; "
+                '[ "$rc" -eq 0 ] || exit "$rc"'
+            )
+        return "\n".join(lines)
+
+    def _run_batch(self, container) -> List[dict]:
+        token = random_string(8)
+        marker = re.compile(rf"{MARKER}{token}:(\d+):(\d+)$")
+        results = []
+        # Blank line held until the next line: dropped if it is the marker's
+        blank = []
+
+        def log(line: str) -> None:
+            logging.info(f"[{container.name}] {line}")
+
+        def on_line(line: str) -> None:
+            found = marker.search(line)
+            if found:
+                blank.clear()
+                index, exit_code = int(found.group(1)), int(found.group(2))
+                results.append(
+                    {"command": self.commands[index], "exit_code": exit_code}
+                )
+                return
+            if blank:
+                log(blank.pop())
+            if line:
+                log(line)
+            else:
+                blank.append(line)
+
+        stream = self._line_stream(container.name, on_line)
+        exit_code = self._exec_stream(
+            container, ["sh", "-c", self._batch_script(token)], self.tty, stream
+        )
+        if blank:
+            log(blank.pop())
+
+        if len(results) < len(self.commands) and not any(
+            result["exit_code"] for result in results
+        ):
+            # The command exited the shell (or the session was killed)
+            results.append(
+                {"command": self.commands[len(results)], "exit_code": exit_code or -1}
+            )
+        for result in results:
+            if result["exit_code"]:
+                logging.error(
+                    f"[{container.name}] Command '{result['command']}' failed "
+                    f"({result['exit_code']}), last lines:\n{stream.tail_text()}"
+                )
+        return results
+
+    def _run_on(self, name: str) -> dict:
+        try:
+            container = get_docker_client().containers.get(name)
+            if self.batch:
+                results = self._run_batch(container)
+            else:
+                results = self._run_commands(container)
+            success = len(results) == len(self.commands) and not any(
+                result["exit_code"] for result in results
+            )
+            return {"success": success, "results": results}
+        except Exception as e:
+            logging.error(f"Error while running command: {e}")
+            return {"success": False, "results": [], "error": str(e)}
 
     def _run(self):
-        container = client.containers.get(self.container)
-
-        if not self.stream:
-            for command in self.commands:
-                try:
-                    exec_result = container.exec_run(
-                        command,
-                        tty=self.tty,
-                        user=self.user,
-                        environment={"PIP_ROOT_USER_ACTION": "ignore"},
-                        workdir=self.workdir,
-                    )
-
-                    logging.debug(
-                        f"Running command '{command}' in container '{container.name}'"
-                    )
-
-                    logging.info(
-                        "Command output:\n%s", exec_result.output.decode("utf-8")
-                    )
-
-                    assert exec_result.exit_code == 0, "Command failed"
-
-                except Exception as e:
-                    logging.error(f"Error while running command: {e}")
-                    return False
+        targets = self._targets()
+        if len(targets) == 1:
+            outcomes = {targets[0]: self._run_on(targets[0])}
         else:
-            for command in self.commands:
-                try:
-                    # Run the command with streaming enabled
-                    exec_id = container.client.api.exec_create(
-                        container.id,
-                        command,
-                        tty=True,
-                        workdir=self.workdir,
-                        user=self.user,
-                    )
-                    output_stream = container.client.api.exec_start(
-                        exec_id["Id"], stream=True
-                    )
-
-                    # Stream the output
-                    # INFO source odoo.modules.loading: Loading module account_taxcloud (65/66)
-                    print("Streaming command output:")
-                    # addons = 0
-                    for chunk in output_stream:
-                        self._parse(chunk.decode("utf-8"))
-
-                    #     if "Loading module" in line:
-                    #         # Compile and use the regex to extract the required information
-                    #         pattern = r": Loading module (\w+) \((\d+)/(\d+)\)"
-                    #         match = re.search(pattern, line)
-                    #         if match:
-                    #             result = {
-                    #                 "name": match.group(1),
-                    #                 "index": int(match.group(2)),
-                    #                 "total": int(match.group(3)),
-                    #             }
-                    #             print(result)
-                    #             addons += 1
-
-                    # print(f"Total addons: {addons}")
-                    logging.info(self._buffer)
-
-                except Exception as e:
-                    logging.error(f"Error while running command: {e}")
-                    return False
-
-        return True
+            workers = max(1, min(self.max_parallel, len(targets)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    name: executor.submit(self._run_on, name) for name in targets
+                }
+                outcomes = {
+                    name: future.result() for name, future in futures.items()
+                }
+
+            failed = [
+                name for name, outcome in outcomes.items() if not outcome["success"]
+            ]
+            logging.info(
+                f"Commands run on {len(targets)} containers, "
+                f"{len(targets) - len(failed)} succeeded"
+                + (f", failed: {', '.join(failed)}" if failed else "")
+            )
+
+        self.shared_resources.set_resource("container_results", outcomes)
+        return all(outcome["success"] for outcome in outcomes.values())
@@ -1,22 +1,50 @@
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+from urllib.parse import urlsplit
+
+import requests
+import yaml
 
 from actionflow.action import Action
-from actionflow.net import download_file
+from actionflow.exceptions import DownloadError
+from actionflow.models import DownloadItemSchema
+from actionflow.net import download_file, read_metadata
 
 
 class Download(Action):
+    """
+    Download a file from a URL.
+
+    The ETag, Last-Modified and sha256 of the file are kept in a
+    `{filepath}.meta.json` sidecar: an existing file is revalidated with a
+    conditional request and only downloaded again if it changed, from the
+    same response.
+
+    Attributes:
+        sha256 (str): Expected checksum, verified while streaming.
+        revalidate (bool): With skip, check the server before skipping (the
+            conditional download of the run).
+        segments (int): Number of parallel byte ranges for large files.
+    """
+
     name: str = "download"
     description: str = "Download a file from a URL"
     skip: bool = True
+    retry: int = 3
     url: str
     timeout: int = 60
     filepath: str
+    segments: int = 1
+    sha256: str = None
+    revalidate: bool = True
+    _verified: bool = False
 
     def _pre_process(self) -> None:
         if os.path.exists(self.filepath):
-            logging.warning("File already exists: %s", self.filepath)
-            os.remove(self.filepath)
+            logging.warning("File already exists, it will be replaced: %s", self.filepath)
 
     def _run(self) -> bool:
         logging.info(
@@ -24,8 +52,148 @@ class Download(Action):
             self.url,
             self.timeout,
         )
-        download_file(self.url, self.filepath, timeout=self.timeout)
+        try:
+            download_file(
+                self.url,
+                self.filepath,
+                timeout=self.timeout,
+                segments=self.segments,
+                sha256=self.sha256,
+                conditional=True,
+            )
+        except requests.RequestException as error:
+            if self.skip and not self.sha256 and read_metadata(self.filepath, self.url):
+                logging.warning(f"Unable to revalidate {self.filepath}: {error}")
+                self._verified = True
+                return True
+            # Keep the .part file, the next attempt resumes from it
+            logging.error(f"Download failed: {error}")
+            return False
+        except DownloadError as error:
+            logging.error(f"Download failed: {error}")
+            return False
+
+        self._verified = True
         return True
 
     def _check(self) -> bool:
-        return os.path.exists(self.filepath)
+        if self._verified:
+            return True
+        if not os.path.exists(self.filepath):
+            return False
+
+        metadata = read_metadata(self.filepath, self.url)
+        if self.sha256:
+            return metadata.get("sha256") == self.sha256.lower()
+        # Revalidated by the conditional request of _run, a 304 is cheap; a
+        # file without metadata is downloaded again
+        return not self.revalidate
+
+
+class DownloadMany(Action):
+    """
+    Download a list of files over the shared connection pool.
+
+    Files are given inline (`files`) or in a manifest: a JSON/YAML list of
+    {url, filepath, sha256} or a text file with one `url [filepath]` per line.
+    Relative file paths are resolved against `directory`.
+
+    Attributes:
+        max_parallel (int): Maximum number of files downloaded at once.
+        file_retry (int): Attempts per file before the action fails.
+    """
+
+    name: str = "download-many"
+    description: str = "Download files with bounded concurrency"
+    files: List[DownloadItemSchema] = []
+    manifest: str = None
+    directory: str = None
+    max_parallel: int = 8
+    file_retry: int = 3
+    timeout: int = 60
+    _items: List[DownloadItemSchema] = []
+
+    def _load_manifest(self) -> List[DownloadItemSchema]:
+        with open(self.manifest) as file:
+            raw = file.read()
+
+        if self.manifest.endswith((".json", ".yaml", ".yml")):
+            # JSON is a subset of YAML
+            return [DownloadItemSchema(**item) for item in yaml.safe_load(raw) or []]
+
+        items = []
+        for line in raw.splitlines():
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            url = parts[0]
+            filepath = parts[1] if len(parts) > 1 else os.path.basename(urlsplit(url).path)
+            items.append(DownloadItemSchema(url=url, filepath=filepath))
+        return items
+
+    def _pre_process(self) -> None:
+        items = list(self.files)
+        if self.manifest:
+            items.extend(self._load_manifest())
+
+        self._items = [
+            item.model_copy(
+                update={"filepath": os.path.join(self.directory, item.filepath)}
+            )
+            if self.directory
+            else item
+            for item in items
+        ]
+        for item in self._items:
+            os.makedirs(os.path.dirname(os.path.abspath(item.filepath)), exist_ok=True)
+
+    def _download(self, item: DownloadItemSchema) -> int:
+        """Download one file with retries, return the bytes transferred"""
+        for attempt in range(1, self.file_retry + 1):
+            try:
+                downloaded = download_file(
+                    item.url,
+                    item.filepath,
+                    timeout=self.timeout,
+                    sha256=item.sha256,
+                    conditional=True,
+                )
+                return os.path.getsize(item.filepath) if downloaded else 0
+            except (DownloadError, requests.RequestException) as error:
+                logging.warning(
+                    f"Download of {item.url} failed ({attempt}/{self.file_retry}): {error}"
+                )
+        raise DownloadError(f"Unable to download {item.url}")
+
+    def _run(self) -> bool:
+        start = time.perf_counter()
+        transferred, failed = 0, []
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            futures = {executor.submit(self._download, item): item for item in self._items}
+            for future in as_completed(futures):
+                try:
+                    transferred += future.result()
+                except DownloadError as error:
+                    logging.error(str(error))
+                    failed.append(futures[future])
+
+        elapsed = time.perf_counter() - start
+        logging.info(
+            f"Downloaded {len(self._items) - len(failed)}/{len(self._items)} files, "
+            f"{transferred / 1024 / 1024:.1f} MiB in {elapsed:.2f}s "
+            f"({transferred / elapsed / 1024 / 1024 if elapsed else 0:.1f} MiB/s)"
+        )
+        return not failed
+
+    def _check(self) -> bool:
+        if not self._items:
+            self._pre_process()
+        for item in self._items:
+            if not os.path.exists(item.filepath):
+                return False
+            if item.sha256:
+                metadata = read_metadata(item.filepath, item.url)
+                if metadata.get("sha256") != item.sha256.lower():
+                    return False
+        return True
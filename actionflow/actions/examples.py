@@ -2,17 +2,17 @@ import logging
 import time
 
 from actionflow.action import Action
-from actionflow.context import Workspace
 
 
 class ExampleAction(Action):
     name: str = "example"
     description: str = "An example action"
     kind: str = None
+    sleep: float = 5
 
     def _run(self) -> bool:
-        logging.info(f"Running {self.name} on {Workspace().path}")
-        time.sleep(5)
+        logging.info(f"Running {self.name} on {self._context.workspace.path}")
+        time.sleep(self.sleep)
         return True
 
 
@@ -1,11 +1,38 @@
 import logging
 import os
+from typing import Optional
 
 from actionflow.action import Action
-from actionflow.tools import Repo, get_local_repository, parse_repository_url
+from actionflow.gitcache import clone_from_cache, update_mirror
+from actionflow.tools import (
+    Git,
+    Repo,
+    parse_repository_url,
+    read_git_head,
+    read_git_remote,
+)
+
+UPDATE_MODES = ("ff", "reset")
 
 
 class Checkout(Action):
+    """
+    Checkout Git repository
+
+    With `cache` (opt-in), the repository is cloned from a bare mirror kept
+    under ~/.actionflow/git-cache and fetched incrementally, objects are
+    shared with the mirror (alternates) unless `dissociate`. A clone sharing
+    objects breaks if the mirror loses them: the mirror is never pruned nor
+    garbage collected by actionflow, do not run `git gc` on it or delete it
+    while such clones exist (use `dissociate` for long-lived checkouts).
+
+    An existing clone of the repository on another branch (or behind the
+    remote branch with `latest`) is updated in place: only the target branch
+    is fetched, then the work tree is fast-forwarded, the update fails if the
+    branch diverged or local changes are in the way. `update_mode: reset`
+    hard resets the work tree instead, discarding local changes.
+    """
+
     name: str = "checkout"
     description: str = "Checkout Git repository"
     skip: bool = True
@@ -16,13 +43,43 @@ class Checkout(Action):
     token: str = None
     skip: bool = True
 
+    # Clone settings
+    cache: bool = False
+    depth: Optional[int] = None
+    filter: Optional[str] = None
+    dissociate: bool = False
+    submodule_jobs: int = 4
+
+    # Update settings
+    update: bool = True
+    update_mode: str = "ff"
+    latest: bool = False
+
+    _remote_sha: Optional[str] = None
+
+    def _local_state(self) -> tuple:
+        """Branch, commit and origin URL read from .git (None when no clone)"""
+        try:
+            branch, sha = read_git_head(self.path)
+            remote = read_git_remote(self.path)
+        except OSError:
+            return None, None, None
+        return branch, sha, remote
+
+    def _same_repository(self, remote: str) -> bool:
+        return bool(remote) and self.repository in remote
+
+    def _latest_sha(self) -> str:
+        """Commit of the remote branch, asked once per action"""
+        if self._remote_sha is None:
+            url, _, _ = parse_repository_url(self.repository)
+            output = Git().ls_remote(url, f"refs/heads/{self.branch}")
+            self._remote_sha = output.split()[0] if output else ""
+        return self._remote_sha
+
     def _check(self) -> bool:
         logging.debug("Checking repository status")
-        try:
-            branch, remote = get_local_repository(self.path)
-        except Exception as e:
-            logging.error(f"Error checking repository: {e}")
-            return False
+        branch, sha, remote = self._local_state()
 
         logging.debug(f"Current branch: {branch}")
         logging.debug(f"Current remote: {remote}")
@@ -31,10 +88,14 @@ class Checkout(Action):
             logging.warning(f"Current branch is {branch}, expected {self.branch}")
             return False
 
-        if self.repository not in remote:
+        if not self._same_repository(remote):
             logging.warning(f"Current remote is {remote}, expected {self.repository}")
             return False
 
+        if self.latest and sha != self._latest_sha():
+            logging.warning(f"Current commit {sha} is not the latest of {branch}")
+            return False
+
         return True
 
     def _pre_process(self):
@@ -42,18 +103,81 @@ class Checkout(Action):
         if not os.path.exists(self.path):
             os.makedirs(self.path)
 
-    def _run(self) -> bool:
-        if self._check():
-            logging.debug("Repository is already checked out")
-            return True
+    def _update_submodules(self, repo) -> None:
+        repo.git.execute(command=["git", "submodule", "sync", "--recursive"])
+        repo.git.execute(
+            command=[
+                "git",
+                "submodule",
+                "update",
+                "--init",
+                "--recursive",
+                f"--jobs={self.submodule_jobs}",
+            ]
+        )
 
-        url, _, repo = parse_repository_url(self.repository)
+    def _update(self, url: str) -> bool:
+        """Fetch the target branch only and move the work tree to it"""
+        if self.update_mode not in UPDATE_MODES:
+            raise ValueError(f"Unknown update mode: {self.update_mode}")
 
-        logging.info("Cloning %s repository to %s", repo, self.path)
+        logging.info(f"Updating {self.path} to {self.branch}")
+        repo = Repo(self.path)
+        source = f"file://{update_mirror(url)}" if self.cache else "origin"
+        tracking = f"refs/remotes/origin/{self.branch}"
 
-        repo = Repo.clone_from(url, self.path, single_branch=True, b=self.branch)
+        command = ["git", "fetch", "--no-tags"]
+        if self.depth:
+            command.append(f"--depth={self.depth}")
         repo.git.execute(
-            command=["git", "submodule", "update", "--init", "--recursive"]
+            command=[*command, source, f"+refs/heads/{self.branch}:{tracking}"]
         )
 
+        if self.update_mode == "reset":
+            repo.git.checkout("--force", "-B", self.branch, tracking)
+        else:
+            branch, _ = read_git_head(self.path)
+            if branch != self.branch:
+                repo.git.checkout("-B", self.branch, tracking)
+            repo.git.merge("--ff-only", tracking)
+
+        self._update_submodules(repo)
+        return True
+
+    def _run(self) -> bool:
+        branch, sha, remote = self._local_state()
+        url, _, repo = parse_repository_url(self.repository)
+
+        if self._same_repository(remote):
+            if branch == self.branch and (
+                not self.latest or sha == self._latest_sha()
+            ):
+                logging.debug("Repository is already checked out")
+                return True
+            if self.update:
+                return self._update(url)
+
+        if os.listdir(self.path):
+            raise Exception(f"Directory is not empty: {self.path}")
+
+        logging.info("Cloning %s repository to %s", repo, self.path)
+
+        if self.cache:
+            repo = clone_from_cache(
+                url,
+                self.path,
+                self.branch,
+                depth=self.depth,
+                filter=self.filter,
+                dissociate=self.dissociate,
+            )
+        else:
+            options = {"depth": self.depth} if self.depth else {}
+            if self.filter:
+                options["filter"] = self.filter
+            repo = Repo.clone_from(
+                url, self.path, single_branch=True, b=self.branch, **options
+            )
+
+        self._update_submodules(repo)
         return True
@@ -1,17 +1,71 @@
 import logging
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
 
 from actionflow.action import Action
 from actionflow.models import ImageSchema
+from actionflow.tools import get_docker_client
 
-try:
-    import docker as docker
 
-    client = docker.from_env()
-except ImportError:
-    logging.error("Docker SDK not found")
-    docker = None
-    client = None
+DEFAULT_REGISTRY = "docker.io"
+
+
+def normalize_reference(name: str) -> str:
+    """
+    Fully qualified image reference, as the daemon resolves it: `odoo:17.0`,
+    `library/odoo:17.0` and `docker.io/library/odoo:17.0` are the same image,
+    a reference without tag nor digest is `:latest`.
+    """
+    name, at, digest = name.partition("@")
+    domain, slash, path = name.partition("/")
+    if not slash or not ("." in domain or ":" in domain or domain == "localhost"):
+        domain, path = DEFAULT_REGISTRY, name
+    if domain == "index.docker.io":
+        domain = DEFAULT_REGISTRY
+    if domain == DEFAULT_REGISTRY and "/" not in path:
+        path = f"library/{path}"
+    if not at and ":" not in path.rsplit("/", 1)[-1]:
+        path = f"{path}:latest"
+    return f"{domain}/{path}{at}{digest}"
+
+
+class LayerProgress:
+    """
+    Aggregate the pull progress of concurrent pulls by layer.
+
+    The daemon downloads a layer shared by several images once (the other
+    pulls wait for it), each layer is logged once when it is complete.
+    """
+
+    DONE = ("Pull complete", "Already exists")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.layers: dict = {}
+        self.downloaded = 0
+        self.reused = 0
+
+    def update(self, image: str, event: dict) -> None:
+        if "error" in event:
+            raise RuntimeError(f"Pull of {image} failed: {event['error']}")
+
+        layer, status = event.get("id"), event.get("status", "")
+        if not layer or status.startswith(("Pulling from", "Digest", "Status")):
+            return
+
+        with self._lock:
+            previous = self.layers.get(layer)
+            if previous in self.DONE:
+                return
+            self.layers[layer] = status
+            if status not in self.DONE:
+                return
+            if status == "Already exists":
+                self.reused += 1
+            else:
+                self.downloaded += 1
+        logging.info(f"[{image}] Layer {layer}: {status}")
 
 
 class Pull(Action):
@@ -25,6 +79,7 @@ class Pull(Action):
         login (str): The login username for the Docker registry.
         password (str): The login password for the Docker registry.
         images (List[ImageSchema]): A list of images to be pulled, defined by the ImageSchema.
+        max_parallel (int): Maximum number of images pulled at once.
 
     Methods:
         _get_credentials() -> dict:
@@ -34,7 +89,7 @@ class Pull(Action):
             Checks if all specified images are already present in the local Docker client.
 
         _run() -> bool:
-            Pulls the specified images from the Docker registry if they are not already present.
+            Pulls the missing images concurrently, streaming the layer progress.
     """
 
     name: str = "pull"
@@ -44,29 +99,70 @@ class Pull(Action):
     login: str = None
     password: str = None
     images: List[ImageSchema]
+    max_parallel: int = 4
 
     def _get_credentials(self) -> dict:
-        vals = {"registry": self.registry} if self.registry else {}
-        if self.login and self.password:
-            vals.update({"username": self.login, "password": self.password})
+        if not (self.login and self.password):
+            return {}
+
+        vals = {"username": self.login, "password": self.password}
+        if self.registry:
+            vals["serveraddress"] = self.registry
 
         return {"auth_config": vals}
 
+    def _local_tags(self) -> Set[str]:
+        """Normalized tags of the local images, listed with a single API call"""
+        images = get_docker_client().api.images()
+        return {
+            normalize_reference(tag)
+            for image in images
+            for tag in (image.get("RepoTags") or []) + (image.get("RepoDigests") or [])
+        }
+
+    def _missing(self, tags: Optional[Set[str]] = None) -> List[ImageSchema]:
+        tags = self._local_tags() if tags is None else tags
+        return [
+            image
+            for image in self.images
+            if normalize_reference(image.name) not in tags
+        ]
+
     def _check(self) -> bool:
-        try:
-            return all(client.images.get(image.name) for image in self.images)
-        except docker.errors.ImageNotFound:
-            return False
+        return not self._missing()
+
+    def _pull(self, image: ImageSchema, progress: LayerProgress) -> None:
+        logging.info(f"Image {image.name} not found, pulling")
+        events = get_docker_client().api.pull(
+            image.repository,
+            tag=image.tag,
+            stream=True,
+            decode=True,
+            **self._get_credentials(),
+        )
+        for event in events:
+            progress.update(image.name, event)
+        logging.info(f"Image {image.name} pulled")
 
     def _run(self) -> bool:
+        missing = self._missing()
         for image in self.images:
-            try:
-                client.images.get(image.name)
-            except docker.errors.ImageNotFound:
-                logging.info(f"Image {image.name} not found")
-
-                client.images.pull(repository=image.repository, tag=image.tag)
-                logging.info(f"Image {image.name} pulled")
-            else:
+            if image not in missing:
                 logging.info(f"Image {image.name} already exists")
+        if not missing:
+            return True
+
+        progress = LayerProgress()
+        workers = max(1, min(self.max_parallel, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._pull, image, progress) for image in missing
+            ]
+            for future in futures:
+                future.result()
+
+        logging.info(
+            f"{len(missing)} images pulled: {progress.downloaded} layers "
+            f"downloaded, {progress.reused} already present"
+        )
         return True
@@ -0,0 +1,84 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from actionflow.action import Action
+from actionflow.outputs import parse_output_file
+from actionflow.process import ProcessRunner
+
+SHELLS = {
+    "bash": ["bash", "--noprofile", "--norc", "-eo", "pipefail", "-c"],
+    "sh": ["sh", "-e", "-c"],
+    "python": ["python3", "-c"],
+}
+
+
+class Run(Action):
+    """
+    Run a script in one shell process (the `run:` step)
+
+    Output is streamed to the log line by line; with a timeout the whole
+    process group is terminated, as when the step is cancelled. The script
+    sets step outputs by writing `key=value` lines to the file named by
+    $ACTIONFLOW_OUTPUT.
+    """
+
+    name: str = "run"
+    description: str = "Run shell script"
+
+    script: str
+    shell: str = "bash"
+    working_directory: Optional[str] = None
+    env: Dict[str, Any] = {}
+    timeout: Optional[float] = None
+
+    _runner: ProcessRunner = None
+
+    def _command(self) -> List[str]:
+        shell = self.shell
+        if shell == "bash" and not shutil.which("bash"):
+            shell = "sh"
+        if shell in SHELLS:
+            return [*SHELLS[shell], self.script]
+        # Custom shell command line, the script is passed as last argument
+        return [*self.shell.split(), self.script]
+
+    def cancel(self) -> None:
+        super().cancel()
+        if self._runner is not None:
+            self._runner.cancel()
+
+    def _run(self) -> bool:
+        label = self.id or self.name
+        fd, output_file = tempfile.mkstemp(prefix="actionflow-output-")
+        os.close(fd)
+        env = {key: str(value) for key, value in self.env.items()}
+        env["ACTIONFLOW_OUTPUT"] = output_file
+
+        try:
+            self._runner = ProcessRunner(
+                self._command(),
+                cwd=self.working_directory or None,
+                env=env,
+                timeout=self.timeout,
+                on_stdout=lambda line: logging.info(f"[{label}] {line}"),
+                on_stderr=lambda line: logging.warning(f"[{label}] {line}"),
+            )
+            if self._cancelled:
+                # Cancelled while the runner was created
+                self._runner.cancel()
+            result = self._runner.run()
+
+            if not result.success:
+                reason = (
+                    "timed out" if result.timed_out else f"exit {result.returncode}"
+                )
+                logging.error(f"[{label}] Script failed ({reason})")
+                return False
+            for key, value in parse_output_file(output_file).items():
+                self.set_output(key, value)
+        finally:
+            os.remove(output_file)
+        return True
@@ -1,13 +1,25 @@
+import hashlib
 import logging
 import os
-
-try:
-    import paramiko as paramiko
-except ImportError:
-    paramiko = None
+import shutil
+from typing import Optional
 
 from actionflow.action import Action
-from actionflow.net import upload_to_s3
+from actionflow.archive import ArchiveStream
+from actionflow.logger import log_context
+from actionflow.net import (
+    DEFAULT_PART_SIZE,
+    DEFAULT_UPLOAD_CONCURRENCY,
+    get_sftp_pool,
+    scan_tree,
+    sftp_upload,
+    sftp_upload_many,
+    sftp_upload_stream,
+    sync_to_s3,
+    upload_stream_to_s3,
+    upload_to_s3,
+)
+from actionflow.settings import settings
 
 
 class UploadFile(Action):
@@ -17,10 +29,49 @@ class UploadFile(Action):
     source: str
     destination: str
 
+    # Stream the source as a tar archive (tar, gzip or zstd) instead of the file
+    archive: Optional[str] = None
+    compression_level: Optional[int] = None
+
     def _pre_process(self):
         if not os.path.exists(self.source):
             raise Exception(f"File not found: {self.source}")
 
+    def _open_archive(self) -> ArchiveStream:
+        return ArchiveStream(self.source, self.archive, self.compression_level)
+
+    def _archive_done(self, stream: ArchiveStream) -> None:
+        self.shared_resources.set_resource("archive_stats", stream.log_stats())
+
+
+class UploadLocal(UploadFile):
+    """
+    Copy file (or stream archive) to a local destination
+    """
+
+    name: str = "upload-local"
+    description: str = "Copy file to a local destination"
+
+    def _run(self):
+        logging.info(f"Copying {self.source} to {self.destination}")
+        directory = os.path.dirname(os.path.abspath(self.destination))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.destination}.part"
+
+        try:
+            if self.archive:
+                with self._open_archive() as stream, open(temp_path, "wb") as file:
+                    shutil.copyfileobj(stream, file, 1024 * 1024)
+                    self._archive_done(stream)
+            else:
+                shutil.copyfile(self.source, temp_path)
+            os.replace(temp_path, self.destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return True
+
 
 class UploadS3(UploadFile):
     """
@@ -37,8 +88,28 @@ class UploadS3(UploadFile):
     access_key: str
     secret_key: str
 
+    # Multipart settings
+    part_size: int = DEFAULT_PART_SIZE
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY
+
     def _run(self):
         logging.info(f"Uploading {self.destination} to S3 bucket: {self.bucket}")
+        if self.archive:
+            with self._open_archive() as stream:
+                upload_stream_to_s3(
+                    bucket_name=self.bucket,
+                    stream=stream,
+                    destination_blob=self.destination,
+                    access_key=self.access_key,
+                    secret_key=self.secret_key,
+                    endpoint_url=self.endpoint,
+                    part_size=self.part_size,
+                    max_concurrency=self.max_concurrency,
+                )
+                self._archive_done(stream)
+            self.shared_resources.set_resource("destination_blob", self.destination)
+            return True
+
         upload_to_s3(
             bucket_name=self.bucket,
             source_file=self.source,
@@ -46,6 +117,8 @@ class UploadS3(UploadFile):
             access_key=self.access_key,
             secret_key=self.secret_key,
             endpoint_url=self.endpoint,
+            part_size=self.part_size,
+            max_concurrency=self.max_concurrency,
         )
 
         self.shared_resources.set_resource("destination_blob", self.destination)
@@ -66,9 +139,68 @@ class UploadGoogleS3(UploadS3):
     endpoint: str = "https://storage.googleapis.com"
 
 
+class UploadS3Sync(UploadS3):
+    """
+    Sync a local directory to a S3 bucket prefix
+
+    Only new or changed files (size and ETag) are uploaded, `max_files` at
+    once. Local ETags are cached in a manifest so unchanged files are not
+    hashed again, set `remote_listing: false` to trust the manifest instead
+    of listing the bucket.
+    """
+
+    name: str = "upload-s3-sync"
+    description: str = "Sync directory to S3 bucket"
+
+    delete: bool = False
+    manifest: str = None
+    remote_listing: bool = True
+    max_files: int = 8
+
+    def _manifest_path(self) -> str:
+        if self.manifest:
+            return self.manifest
+        key = "|".join(
+            [self.endpoint, self.bucket, self.destination, os.path.abspath(self.source)]
+        )
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return settings.get_path("s3-sync", f"{digest}.json")
+
+    def _pre_process(self):
+        if not os.path.isdir(self.source):
+            raise Exception(f"Directory not found: {self.source}")
+
+    def _run(self):
+        logging.info(f"Syncing {self.source} to S3 bucket: {self.bucket}")
+        stats = sync_to_s3(
+            bucket_name=self.bucket,
+            source_dir=self.source,
+            prefix=self.destination,
+            access_key=self.access_key,
+            secret_key=self.secret_key,
+            endpoint_url=self.endpoint,
+            delete=self.delete,
+            manifest=self._manifest_path(),
+            remote_listing=self.remote_listing,
+            part_size=self.part_size,
+            max_concurrency=self.max_concurrency,
+            max_files=self.max_files,
+        )
+
+        self.shared_resources.set_resource("sync_stats", stats)
+
+        return True
+
+
 class UploadSftp(UploadFile):
     """
     Upload backup to SFTP server
+
+    Connections are pooled per host and reused by the following SFTP steps
+    of the run, then closed when the flow finished.
+    A directory source is uploaded over `channels` parallel SFTP channels.
+    Files are written to a `.part` file renamed once complete; an interrupted
+    upload is resumed if the source did not change (size and mtime).
     """
 
     name: str = "upload-sftp"
@@ -80,16 +212,37 @@ class UploadSftp(UploadFile):
     username: str
     password: str
 
+    # Transfer settings
+    resume: bool = True
+    channels: int = DEFAULT_UPLOAD_CONCURRENCY
+
     def _run(self):
         logging.info(f"Uploading backup to SFTP server: {self.host}")
-        transport = paramiko.Transport((self.host, self.port))
-        transport.connect(username=self.username, password=self.password)
-        sftp = paramiko.SFTPClient.from_transport(transport)
-
-        with open(self.source, "rb") as file:
-            sftp.putfo(file, self.destination)
+        pool = get_sftp_pool(
+            self.host,
+            self.port,
+            self.username,
+            self.password,
+            run_id=log_context.get().get("run_id"),
+        )
 
-        sftp.close()
-        transport.close()
+        if self.archive:
+            with self._open_archive() as stream, pool.channel() as sftp:
+                sftp_upload_stream(sftp, stream, self.destination)
+                self._archive_done(stream)
+            return True
+
+        if os.path.isdir(self.source):
+            destination = self.destination.rstrip("/")
+            files = [
+                (os.path.join(self.source, key), f"{destination}/{key}")
+                for key in sorted(scan_tree(self.source))
+            ]
+            stats = sftp_upload_many(pool, files, self.channels, self.resume)
+            self.shared_resources.set_resource("sftp_stats", stats)
+            return True
+
+        with pool.channel() as sftp:
+            sftp_upload(sftp, self.source, self.destination, resume=self.resume)
 
         return True
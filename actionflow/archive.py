@@ -0,0 +1,178 @@
+import gzip
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+from typing import Optional
+
+try:
+    import zstandard as zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_FORMATS = ("tar", "gzip", "zstd")
+ARCHIVE_EXTENSIONS = {"tar": ".tar", "gzip": ".tar.gz", "zstd": ".tar.zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+
+class _CountingWriter(io.RawIOBase):
+    """Count the uncompressed bytes written by tarfile"""
+
+    def __init__(self, target):
+        self.target = target
+        self.count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.target.write(data)
+        self.count += len(data)
+        return len(data)
+
+
+class ArchiveStream(io.RawIOBase):
+    """
+    Readable tar stream of a file or directory, compressed on the fly.
+
+    A producer thread writes the archive into an OS pipe and the consumer
+    (an upload) reads it: memory stays bounded by the pipe buffer and the
+    source is read once, nothing is written to disk.
+
+    - gzip: `pigz` when installed (multi-threaded), the gzip module otherwise
+    - zstd: the optional `zstandard` package, with one thread per CPU
+
+    Attributes:
+        source (str): File or directory to archive.
+        compression (str): tar, gzip or zstd.
+        level (int): Compression level, the format default when None.
+        arcname (str): Name of the source in the archive.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        compression: str = "gzip",
+        level: Optional[int] = None,
+        arcname: Optional[str] = None,
+    ):
+        if compression not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd archives require the zstandard package")
+
+        self.source = source
+        self.compression = compression
+        self.level = level if level is not None else DEFAULT_LEVELS.get(compression)
+        self.arcname = arcname or os.path.basename(os.path.normpath(source))
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self._error: Optional[BaseException] = None
+        self._start = time.monotonic()
+        self._end: Optional[float] = None
+
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb", buffering=0)
+        self._thread = threading.Thread(
+            target=self._produce, args=(write_fd,), name="ArchiveStream", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def extension(self) -> str:
+        return ARCHIVE_EXTENSIONS[self.compression]
+
+    def _produce(self, write_fd: int) -> None:
+        sink = os.fdopen(write_fd, "wb")
+        process = None
+        try:
+            if self.compression == "zstd":
+                compressor = zstandard.ZstdCompressor(level=self.level, threads=-1)
+                writer = compressor.stream_writer(sink, closefd=False)
+            elif self.compression == "gzip" and shutil.which("pigz"):
+                process = subprocess.Popen(
+                    ["pigz", "-c", f"-{self.level}"],
+                    stdin=subprocess.PIPE,
+                    stdout=sink,
+                )
+                # pigz owns the pipe now, EOF is sent when it exits
+                sink.close()
+                writer = process.stdin
+            elif self.compression == "gzip":
+                writer = gzip.GzipFile(
+                    fileobj=sink, mode="wb", compresslevel=self.level, mtime=0
+                )
+            else:
+                writer = sink
+
+            counter = _CountingWriter(writer)
+            with tarfile.open(
+                fileobj=counter, mode="w|", format=tarfile.PAX_FORMAT
+            ) as tar:
+                tar.add(self.source, arcname=self.arcname)
+            self.raw_bytes = counter.count
+
+            if writer is not sink:
+                writer.close()
+            if process is not None and process.wait() != 0:
+                raise IOError(f"pigz exited with status {process.returncode}")
+        except BaseException as error:
+            # BrokenPipeError when the consumer gave up: its own error wins
+            self._error = error
+            if process is not None:
+                process.kill()
+        finally:
+            if not sink.closed:
+                try:
+                    sink.close()
+                except OSError:
+                    pass
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._reader.readinto(buffer)
+        if count:
+            self.compressed_bytes += count
+            return count
+
+        # EOF: surface the producer failure instead of a truncated archive
+        self._thread.join()
+        if self._end is None:
+            self._end = time.monotonic()
+        if self._error is not None:
+            raise IOError(f"Archive of {self.source} failed: {self._error}")
+        return 0
+
+    def close(self) -> None:
+        if not self.closed:
+            self._reader.close()
+            self._thread.join()
+        super().close()
+
+    def stats(self) -> dict:
+        elapsed = max((self._end or time.monotonic()) - self._start, 1e-6)
+        return {
+            "format": self.compression,
+            "raw_bytes": self.raw_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "ratio": round(self.raw_bytes / self.compressed_bytes, 2)
+            if self.compressed_bytes
+            else 0.0,
+            "seconds": round(elapsed, 3),
+            "throughput": round(self.raw_bytes / elapsed / 1024 / 1024, 1),
+        }
+
+    def log_stats(self) -> dict:
+        stats = self.stats()
+        logging.info(
+            f"Archived {self.source} ({stats['format']}): "
+            f"{stats['raw_bytes']} -> {stats['compressed_bytes']} bytes, "
+            f"ratio {stats['ratio']}, {stats['throughput']} MiB/s"
+        )
+        return stats
@@ -3,18 +3,37 @@ import atexit
 import os
 import sys
 
+from actionflow import profiling, tracing
 from actionflow.core import Flow
+from actionflow.follow import LEVELS, tail_logs
 from actionflow.logger import configure_logger
-from actionflow.tools import create_pidfile, remove_pidfile, tail_logs
+from actionflow.metrics import registry
+from actionflow.settings import settings
+from actionflow.tools import create_pidfile, remove_pidfile
 
 
-def run(filepath: str, verbose: bool):
+def run(
+    filepath: str,
+    verbose: bool,
+    metrics: str = None,
+    trace: str = None,
+    trace_otlp: str = None,
+    profile: str = None,
+    profile_mode: str = "deterministic",
+    profile_top: int = 20,
+):
     """
     Executes the flow defined in the given file.
 
     Args:
         filepath (str): The path to the file containing the flow definition.
         verbose (bool): If True, prints additional information during execution.
+        metrics (str): If set, write a final metrics snapshot to this path ("-" for stdout).
+        trace (str): If set, write the execution spans to this path (Chrome trace-event format).
+        trace_otlp (str): If set, write the execution spans to this path (OTLP/JSON format).
+        profile (str): If set, profile every action and write the reports to this directory.
+        profile_mode (str): Profiler mode, deterministic (cProfile) or sampling (wall-clock stacks).
+        profile_top (int): Number of entries per action class in the text report.
 
     Raises:
         SystemExit: If the file does not exist or an error occurs during processing.
@@ -26,10 +45,11 @@ def run(filepath: str, verbose: bool):
         4. Loads all available actions.
         5. Prints the list of available actions.
         6. Loads the flow from the specified file.
-        7. Executes the flow.
+        7. Executes the flow, recording spans if tracing is requested.
         8. Prints a summary of the flow execution.
-        9. Handles any exceptions that occur during processing, prints an error message, and exits.
-        10. Ensures the PID file is removed upon exit.
+        9. Writes the metrics snapshot, traces and profiling reports if requested.
+        10. Handles any exceptions that occur during processing, prints an error message, and exits.
+        11. Ensures the PID file is removed upon exit.
     """
 
     if not os.path.isfile(filepath):
@@ -49,10 +69,30 @@ def run(filepath: str, verbose: bool):
         # )
 
         flow = Flow.from_file(filepath)
+        if trace or trace_otlp:
+            tracing.start_tracing()
+        if profile:
+            profiling.start_profiling(mode=profile_mode)
         flow.execute()
         # for line in flow.summary():
         #     print(line)
 
+        tracer = tracing.stop_tracing()
+        if trace:
+            tracer.export(trace)
+        if trace_otlp:
+            tracer.export(trace_otlp, fmt="otlp")
+
+        profiler = profiling.stop_profiling()
+        if profiler:
+            report = profiler.write_report(profile, top=profile_top)
+            print(f"Profiling report: {report}")
+
+        if metrics == "-":
+            print(registry.render(), end="")
+        elif metrics:
+            registry.dump(metrics)
+
     except Exception as e:
         print(f"Error processing file: {e}", file=sys.stderr)
         sys.exit(1)
@@ -60,9 +100,28 @@ def run(filepath: str, verbose: bool):
         atexit.register(remove_pidfile)
 
 
-def logs():
-    """Fetch and display logs."""
-    tail_logs()
+def logs(
+    run: str = None,
+    job: str = None,
+    level: str = None,
+    since: str = None,
+    lines: int = 10,
+    follow: bool = True,
+):
+    """
+    Fetch and display logs.
+
+    Args:
+        run (str): Only show records of this run id.
+        job (str): Only show records of this job.
+        level (str): Minimum level of the records to show.
+        since (str): Only show records logged after this ISO datetime or duration (10m, 2h).
+        lines (int): Number of past lines to show when no run/since filter is given.
+        follow (bool): Keep waiting for new records.
+    """
+    tail_logs(
+        run=run, job=job, level=level, since=since, lines=lines, follow=follow
+    )
 
 
 def status():
@@ -79,7 +138,19 @@ def main():
             Arguments:
                 filepath (str): Path to the file to be processed.
                 -v, --verbose (bool): Enable verbose output.
+                --log-format (str): Log records format, text or json.
+                --run-logs (bool): Also write a log file per run.
+                --metrics (str): Write a final metrics snapshot to this path.
+                --trace (str): Write the execution spans (Chrome trace-event format).
+                --trace-otlp (str): Write the execution spans (OTLP/JSON format).
+                --profile (str): Profile every action, reports in this directory.
+                --profile-mode (str): deterministic or sampling.
+                --profile-top (int): Entries per action class in the report.
         - logs: Fetch logs.
+            Arguments:
+                --run, --job, --level, --since: Filter records.
+                -n, --lines (int): Number of past lines to show.
+                --no-follow (bool): Exit after showing past lines.
         - status: Fetch current status.
     Parses the command-line arguments and calls the appropriate function based on the subcommand.
     If no valid subcommand is provided, it prints the help message and exits with status code 1.
@@ -96,16 +167,92 @@ def main():
     run_parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose output"
     )
+    run_parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="json" if settings.log_json else "text",
+        help="Log records format (json: one JSON object per line)",
+    )
+    run_parser.add_argument(
+        "--run-logs",
+        action="store_true",
+        default=settings.log_per_run,
+        help="Also write a log file per run",
+    )
+    run_parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Write a final metrics snapshot (Prometheus text format, - for stdout)",
+    )
+    run_parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write the execution spans in Chrome trace-event format",
+    )
+    run_parser.add_argument(
+        "--trace-otlp",
+        metavar="PATH",
+        help="Write the execution spans in OTLP/JSON format",
+    )
+    run_parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Profile every action and write pstats/report files to this directory",
+    )
+    run_parser.add_argument(
+        "--profile-mode",
+        choices=profiling.PROFILE_MODES,
+        default="deterministic",
+        help="deterministic (cProfile) or sampling (wall-clock stack samples)",
+    )
+    run_parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        help="Number of entries per action class in the profiling report",
+    )
 
     logs_parser = subparsers.add_parser("logs", help="Fetch logs")
+    logs_parser.add_argument("--run", help="Only show records of this run id")
+    logs_parser.add_argument("--job", help="Only show records of this job")
+    logs_parser.add_argument(
+        "--level",
+        type=str.upper,
+        choices=LEVELS,
+        help="Minimum level of the records to show (e.g. WARNING)",
+    )
+    logs_parser.add_argument(
+        "--since", help="Only show records after an ISO datetime or duration (10m)"
+    )
+    logs_parser.add_argument(
+        "-n", "--lines", type=int, default=10, help="Number of past lines to show"
+    )
+    logs_parser.add_argument(
+        "--no-follow",
+        dest="follow",
+        action="store_false",
+        help="Exit after showing past lines",
+    )
     status_parser = subparsers.add_parser("status", help="Fetch current status")
 
     args = parser.parse_args()
 
     if args.command == "run":
-        run(args.filepath, args.verbose)
+        configure_logger(
+            json_format=args.log_format == "json", per_run=args.run_logs
+        )
+        run(
+            args.filepath,
+            args.verbose,
+            args.metrics,
+            args.trace,
+            args.trace_otlp,
+            args.profile,
+            args.profile_mode,
+            args.profile_top,
+        )
     elif args.command == "logs":
-        logs()
+        logs(args.run, args.job, args.level, args.since, args.lines, args.follow)
     elif args.command == "status":
         status()
     else:
@@ -114,5 +261,4 @@ def main():
 
 
 if __name__ == "__main__":
-    configure_logger()
     main()
@@ -8,43 +8,117 @@ from typing import Any, Optional, Union
 from pydantic import BaseModel, ConfigDict, Field, computed_field
 from transitions import Machine
 
+from actionflow import metrics, tracing
+
 logging.getLogger("transitions").setLevel(logging.WARNING)
 
 
+MISSING = object()
+
+
+class _Shard:
+    __slots__ = ("condition", "data")
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.data: dict = {}
+
+
 class SharedResources:
     """
-    A thread-safe class for managing shared resources.
+    A thread-safe store of the resources shared by the steps of a run.
+
+    Keys are spread over shards, each one holding an immutable dict replaced on
+    write (copy-on-write): reads take no lock, writes only lock their shard and
+    wake up the threads waiting for a key of that shard.
 
     Attributes:
-        lock (threading.Lock): A lock to ensure thread-safe access to resources.
-        resources (dict): A dictionary to store shared resources.
+        namespace (str): Owner of the store, the run id for a flow.
 
     Methods:
-        get_resource(resource_name: str):
-            Retrieves the resource associated with the given name.
-            Args:
-                resource_name (str): The name of the resource to retrieve.
-            Returns:
-                The resource associated with the given name, or None if not found.
+        get_resource(resource_name: str, default: Any = None):
+            Retrieves the resource associated with the given name, or default.
 
         set_resource(resource_name: str, value: Any):
             Sets the resource associated with the given name to the specified value.
-            Args:
-                resource_name (str): The name of the resource to set.
-                value (Any): The value to associate with the resource name.
+
+        setdefault(resource_name: str, value: Any):
+            Sets the resource if missing, returns the stored value.
+
+        compare_and_set(resource_name: str, expected: Any, value: Any) -> bool:
+            Sets the resource only if its current value equals expected
+            (MISSING for an absent resource).
+
+        wait_for(resource_name: str, timeout: float = None):
+            Blocks until the resource is set and returns it, raises
+            TimeoutError after timeout seconds.
     """
 
-    def __init__(self):
-        self.lock = threading.Lock()
-        self.resources: dict = {}
+    def __init__(self, namespace: Optional[str] = None, shards: int = 16):
+        self.namespace = namespace
+        self._shards = tuple(_Shard() for _ in range(max(1, shards)))
+
+    def __repr__(self) -> str:
+        return f"SharedResources(namespace={self.namespace!r})"
 
-    def get_resource(self, resource_name: str):
-        with self.lock:
-            return self.resources.get(resource_name)
+    def _shard(self, resource_name: str) -> _Shard:
+        return self._shards[hash(resource_name) % len(self._shards)]
+
+    def _publish(self, shard: _Shard, resource_name: str, value: Any) -> None:
+        """Replace the shard dict, the shard lock must be held"""
+        shard.data = {**shard.data, resource_name: value}
+        shard.condition.notify_all()
+
+    @property
+    def resources(self) -> dict:
+        """Snapshot of all the resources"""
+        resources = {}
+        for shard in self._shards:
+            resources.update(shard.data)
+        return resources
+
+    def get_resource(self, resource_name: str, default: Any = None):
+        return self._shard(resource_name).data.get(resource_name, default)
 
     def set_resource(self, resource_name: str, value: Any):
-        with self.lock:
-            self.resources[resource_name] = value
+        shard = self._shard(resource_name)
+        with shard.condition:
+            self._publish(shard, resource_name, value)
+
+    def setdefault(self, resource_name: str, value: Any):
+        shard = self._shard(resource_name)
+        current = shard.data.get(resource_name, MISSING)
+        if current is not MISSING:
+            return current
+        with shard.condition:
+            current = shard.data.get(resource_name, MISSING)
+            if current is not MISSING:
+                return current
+            self._publish(shard, resource_name, value)
+        return value
+
+    def compare_and_set(self, resource_name: str, expected: Any, value: Any) -> bool:
+        shard = self._shard(resource_name)
+        with shard.condition:
+            current = shard.data.get(resource_name, MISSING)
+            if current is not expected and (
+                current is MISSING or expected is MISSING or current != expected
+            ):
+                return False
+            self._publish(shard, resource_name, value)
+        return True
+
+    def wait_for(self, resource_name: str, timeout: Optional[float] = None):
+        shard = self._shard(resource_name)
+        value = shard.data.get(resource_name, MISSING)
+        if value is not MISSING:
+            return value
+        with shard.condition:
+            if not shard.condition.wait_for(
+                lambda: resource_name in shard.data, timeout
+            ):
+                raise TimeoutError(f"Resource not set: {resource_name}")
+            return shard.data[resource_name]
 
 
 class ExecutionModel(object):
@@ -100,27 +174,59 @@ class StateModel(BaseModel):
     _start: Optional[float] = 0.0
     _end: Optional[float] = 0.0
     _short: bool = False
+    _span: Any = None
+    _span_token: Any = None
 
     @property
     def _name(self) -> str:
         name = getattr(self, "name", None)
         return f"{self.__class__.__name__}: {name}" if name else self.__class__.__name__
 
+    @property
+    def _kind(self) -> str:
+        return self.__class__.__name__.lower()
+
+    def _record_transition(self, state: str) -> None:
+        kind = self._kind
+        metrics.STATE_TRANSITIONS.inc(kind=kind, state=state)
+        if state in ("success", "failure"):
+            metrics.DURATION.observe(
+                self._exec_seconds,
+                kind=kind,
+                name=getattr(self, "name", None) or "",
+                state=state,
+            )
+
     def on_enter_running(self) -> None:
         logging.info(f"[{self._name}] Started execution")
         if not self._short:
             self._start_ts = datetime.now()
         else:
             self._start = time.perf_counter()
+        metrics.RUNNING.inc(kind=self._kind)
+        self._record_transition("running")
+        if tracing.tracer is not None:
+            tracing.tracer.start(self)
 
     def on_exit_running(self) -> None:
         if not self._short:
             self._end_ts = datetime.now()
         else:
             self._end = time.perf_counter()
+        metrics.RUNNING.dec(kind=self._kind)
+        if tracing.tracer is not None:
+            tracing.tracer.end(self)
 
     def on_enter_success(self) -> None:
         logging.info(f"[{self._name}] Completed execution in {self._exec_time}")
+        self._record_transition("success")
+        if tracing.tracer is not None:
+            tracing.tracer.finish(self, "success")
+
+    def on_enter_failure(self) -> None:
+        self._record_transition("failure")
+        if tracing.tracer is not None:
+            tracing.tracer.finish(self, "failure")
 
     @property
     def _exec_time(self) -> Union[timedelta, float]:
@@ -132,6 +238,11 @@ class StateModel(BaseModel):
             else 0.0
         )
 
+    @property
+    def _exec_seconds(self) -> float:
+        value = self._exec_time
+        return value.total_seconds() if isinstance(value, timedelta) else value
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.machine = Machine(
@@ -144,6 +255,7 @@ class StateModel(BaseModel):
         self.machine.on_enter_running(lambda: self.on_enter_running())
         self.machine.on_exit_running(lambda: self.on_exit_running())
         self.machine.on_enter_success(lambda: self.on_enter_success())
+        self.machine.on_enter_failure(lambda: self.on_enter_failure())
 
     @abstractmethod
     def execute(self, index: int, total: int) -> None:
@@ -1,36 +1,19 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from threading import Lock
+from typing import Any, Optional
 
 from pydantic import BaseModel
 
 
-class SingletonMeta(type):
-    """
-    Métaclasse pour implémenter un singleton thread-safe.
-    """
-
-    _instances = {}
-    _lock = Lock()
-
-    def __call__(cls, *args, **kwargs):
-        # Double vérification avec verrouillage
-        if cls not in cls._instances:
-            with cls._lock:
-                if cls not in cls._instances:
-                    instance = super().__call__(*args, **kwargs)
-                    cls._instances[cls] = instance
-        return cls._instances[cls]
-
-
 @dataclass(frozen=True)
-class Workspace(metaclass=SingletonMeta):
+class Workspace:
     path: str
+    manager: Any = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
         Path(self.path).mkdir(parents=True, exist_ok=True)
-        logging.info("Workspace created")
+        logging.info(f"Workspace created: {self.path}")
 
     def get_path(self, *args) -> str:
         return str(Path(self.path).joinpath(*args))
@@ -38,6 +21,23 @@ class Workspace(metaclass=SingletonMeta):
     def make_path(self, *args) -> None:
         Path(self.path).joinpath(*args).mkdir(parents=True, exist_ok=True)
 
+    def release(self) -> None:
+        """Delete the workspace if it belongs to a manager (a run workspace)"""
+        if self.manager is not None:
+            self.manager.release(self)
+
+
+class WorkspaceConfig(BaseModel):
+    """Root of the run workspaces and the template they are seeded from"""
+
+    path: str
+    template: Optional[str] = None
+    seed: str = "reflink"
+
 
 class Context(BaseModel):
-    workspace: Workspace
+    workspace_config: WorkspaceConfig
+    # Created by Flow.execute for the duration of the run
+    workspace: Optional[Workspace] = None
+    # Deleting the run workspace at the end of the run is opt-in
+    keep_workspace: bool = True
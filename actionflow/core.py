@@ -3,15 +3,19 @@ import logging
 import pkgutil
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Generator, List, Tuple
+from typing import Any, Generator, List, Optional, Tuple
 
 import yaml
+from pydantic import Field
 
 from actionflow.action import Action
-from actionflow.common import StateModel
-from actionflow.context import Context, Workspace
+from actionflow.common import SharedResources, StateModel
+from actionflow.context import Context
 from actionflow.jobs import Job
-from actionflow.tools import parse_yaml
+from actionflow.logger import bind_context
+from actionflow.net import close_sftp_pools
+from actionflow.tools import new_run_id, parse_yaml
+from actionflow.workspace import get_workspace_manager
 
 
 class Flow(StateModel):
@@ -19,11 +23,15 @@ class Flow(StateModel):
     jobs: List[Job]
     env: dict = {}
     context: Context
+    run_id: str = Field(default_factory=new_run_id, exclude=True)
+    shared_resources: SharedResources = Field(default=None, exclude=True)
 
     _child: str = "jobs"
 
     @property
-    def workspace(self) -> str:
+    def workspace(self) -> Optional[str]:
+        if self.context.workspace is None:
+            return None
         return self.context.workspace.path
 
     @staticmethod
@@ -56,9 +64,24 @@ class Flow(StateModel):
             Exception: If any job fails during execution.
         """
 
+        with bind_context(run_id=self.run_id):
+            config = self.context.workspace_config
+            manager = get_workspace_manager(
+                config.path, template=config.template, seed=config.seed
+            )
+            self.context.workspace = manager.create(self.run_id)
+            try:
+                self._execute()
+            finally:
+                # Connections of the run are not shared with the next ones
+                close_sftp_pools(self.run_id)
+                if not self.context.keep_workspace:
+                    self.context.workspace.release()
+
+    def _execute(self) -> None:
         self._start = datetime.now()
         logging.info(
-            f"[Flow] Executing flow: {self.name}, {self._start:%Y-%m-%d %H:%M:%S}"
+            f"[Flow] Executing flow: {self.name} ({self.run_id}), {self._start:%Y-%m-%d %H:%M:%S}"
         )
 
         # self.init_workspace()
@@ -72,6 +95,7 @@ class Flow(StateModel):
                 job.execute(index, total=self.count)
                 if job.machine.state != "success":
                     logging.error(f"Job {index}/{self.count} {job.name} failed.")
+                    self.machine.fail()
                     return
 
         except Exception as error:
@@ -102,6 +126,10 @@ class Flow(StateModel):
         containing the flow data. It processes the environment variables and jobs defined
         in the YAML string and structures them into a new dictionary format.
 
+        The `workspace` of the context is either a path, or a mapping with `path`,
+        `template` (directory seeded into the workspace) and `seed` (reflink or
+        hardlink). The run workspace itself is created by `execute`.
+
         Args:
             raw (str): A string containing the YAML data.
 
@@ -122,7 +150,12 @@ class Flow(StateModel):
         ]
 
         context_vals = data.get("context", {})
-        context_vals["workspace"] = Workspace(path=context_vals.pop("workspace"))
+        workspace = context_vals.pop("workspace")
+        if not isinstance(workspace, dict):
+            workspace = {"path": workspace}
+        context_vals["workspace_config"] = workspace
+        if "keep-workspace" in context_vals:
+            context_vals["keep_workspace"] = context_vals.pop("keep-workspace")
         # print(context_vals)
         # print(obj)
         # context = obj(**context_vals)
@@ -196,8 +229,12 @@ class Flow(StateModel):
         )
 
     def model_post_init(self, __context: Any) -> None:
+        # One store per run: concurrent flows do not see each other's resources
+        if self.shared_resources is None:
+            self.shared_resources = SharedResources(namespace=self.run_id)
         # Add context to steps
         for job in self.jobs:
+            job.set_shared_resources(self.shared_resources)
             for step in job.steps:
                 step._context = self.context
         super().model_post_init(__context)
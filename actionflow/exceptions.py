@@ -40,3 +40,29 @@ class ContextAlreadyInitialized(ActionflowException):
 
     def __init__(self):
         super().__init__("Context has already been initialized.")
+
+
+class DownloadError(ActionflowException):
+    """
+    Exception raised when a download fails (unexpected HTTP status, incomplete
+    transfer).
+
+    Attributes:
+        status_code (int): HTTP status of the response, if any.
+    """
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OutputNotFound(ActionflowException):
+    """
+    Exception raised when an expression references a step output that was
+    not set (unknown step or key, or the step did not run yet).
+
+    Attributes:
+        None
+    """
+
+    pass
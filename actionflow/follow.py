@@ -0,0 +1,389 @@
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Generator, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+from actionflow.logger import NO_CONTEXT
+from actionflow.settings import settings
+
+TEXT_PATTERN = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - \[(?P<thread>[^\]]*)\] - "
+    r"(?P<level>[A-Z]+) - \[(?P<context>[^\]]*)\] "
+)
+SINCE_PATTERN = re.compile(r"^(\d+)([smhd])$")
+SINCE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+BLOCK_SIZE = 64 * 1024
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+def parse_since(value: str) -> datetime:
+    """Parse an ISO datetime or a relative duration (30s, 10m, 2h, 1d)"""
+    match = SINCE_PATTERN.match(value.strip())
+    if match:
+        amount, unit = match.groups()
+        return datetime.now() - timedelta(**{SINCE_UNITS[unit]: int(amount)})
+    return datetime.fromisoformat(value)
+
+
+def parse_line(line: str) -> Optional[dict]:
+    """
+    Extract time, level, run_id and job from a log line (text or JSON format).
+
+    Returns None for continuation lines (tracebacks, multi-line messages).
+    """
+    if line.startswith("{"):
+        try:
+            payload = json.loads(line)
+            # A JSON message without record fields is a continuation line
+            time = datetime.fromisoformat(payload.get("time"))
+        except (AttributeError, TypeError, ValueError):
+            return None
+        return {
+            "time": time,
+            "level": payload.get("level"),
+            "run_id": payload.get("run_id"),
+            "job": payload.get("job"),
+        }
+
+    match = TEXT_PATTERN.match(line)
+    if not match:
+        return None
+
+    # The run/job/step prefix written by the formatter ("[-]" outside a run)
+    context = match.group("context")
+    context = [] if context == NO_CONTEXT else context.split("/")
+    return {
+        "time": datetime.strptime(match.group("time"), "%Y-%m-%d %H:%M:%S,%f"),
+        "level": match.group("level"),
+        "run_id": (context[0] or None) if context else None,
+        "job": (context[1] or None) if len(context) > 1 else None,
+    }
+
+
+@dataclass
+class LogFilter:
+    run: Optional[str] = None
+    job: Optional[str] = None
+    level: Optional[str] = None
+    since: Optional[datetime] = None
+
+    def __post_init__(self):
+        if self.level and self.level.upper() not in LEVELS:
+            raise ValueError(f"Unknown level: {self.level} (expected {LEVELS})")
+        self._levels = logging.getLevelNamesMapping()
+        self._levelno = self._levels[self.level.upper()] if self.level else 0
+        self._last = True
+
+    @property
+    def empty(self) -> bool:
+        return not (self.run or self.job or self.level or self.since)
+
+    def match(self, line: str) -> bool:
+        """Match a line, continuation lines follow the verdict of their record"""
+        if self.empty:
+            return True
+
+        record = parse_line(line)
+        if record is None:
+            return self._last
+
+        self._last = (
+            (not self.run or record["run_id"] == self.run)
+            and (not self.job or record["job"] == self.job)
+            and (
+                not self._levelno
+                or self._levels.get(record["level"] or "", 0) >= self._levelno
+            )
+            and (not self.since or record["time"] >= self.since)
+        )
+        return self._last
+
+
+class LogIndex:
+    """
+    Reader for the byte-offset index written by `IndexedFileHandler`.
+
+    Spans of a rotated or truncated log (other inode, offsets past the end)
+    are ignored. Parsed entries are cached: each call only reads the lines
+    appended to the index since the previous one.
+    """
+
+    def __init__(self, logfile: str):
+        self.logfile = logfile
+        self.path = f"{logfile}.idx"
+        self._entries: List[dict] = []
+        self._offset = 0
+        self._inode = None
+
+    def _read_entries(self) -> List[dict]:
+        with open(self.path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # New or truncated index, parsed again from the start
+                self._entries, self._offset, self._inode = [], 0, stat.st_ino
+            file.seek(self._offset)
+            data = file.read()
+
+        # A partial last line is read again by the next call
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._entries.append(json.loads(line))
+            except ValueError:
+                continue
+        self._offset += end
+        return self._entries
+
+    def spans(self) -> List[dict]:
+        try:
+            stat = os.stat(self.logfile)
+            entries = self._read_entries()
+        except OSError:
+            return []
+
+        return [
+            entry
+            for entry in entries
+            if entry["ino"] == stat.st_ino and entry["end"] <= stat.st_size
+        ]
+
+    def indexed_end(self, spans: List[dict]) -> int:
+        return max((span["end"] for span in spans), default=0)
+
+    def lookup(
+        self, run: str, since: Optional[datetime] = None
+    ) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Return the byte ranges of a run and the offset where the unindexed part
+        of the log starts.
+        """
+        spans = self.spans()
+        ranges = [
+            (span["start"], span["end"])
+            for span in spans
+            if span["run"] == run
+            and (not since or datetime.fromisoformat(span["last"]) >= since)
+        ]
+        return ranges, self.indexed_end(spans)
+
+
+def _read_range(file: BinaryIO, start: int, end: int) -> Generator[str, None, None]:
+    file.seek(start)
+    remaining = end - start
+    pending = b""
+    while remaining > 0:
+        data = file.read(min(BLOCK_SIZE, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        *lines, pending = (pending + data).split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _reverse_lines(file: BinaryIO, end: int) -> Generator[str, None, None]:
+    """Yield the lines before `end` from the last to the first"""
+    position = end
+    pending = b""
+    while position > 0:
+        size = min(BLOCK_SIZE, position)
+        position -= size
+        file.seek(position)
+        first, *lines = (file.read(size) + pending).split(b"\n")
+        pending = first
+        for line in reversed(lines):
+            if line:
+                yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _seek_time(file: BinaryIO, end: int, since: datetime) -> int:
+    """Bisect the log for the offset of the first record logged after `since`"""
+    low, high = 0, end
+    while high - low > BLOCK_SIZE:
+        middle = (low + high) // 2
+        file.seek(middle)
+        file.readline()
+        record = None
+        while record is None:
+            line = file.readline()
+            if not line or file.tell() > high:
+                break
+            record = parse_line(line.decode("utf-8", errors="replace"))
+        if record is None or record["time"] >= since:
+            high = middle
+        else:
+            low = middle
+    if low:
+        file.seek(low)
+        file.readline()
+        low = file.tell()
+    return low
+
+
+class _WakeupHandler(FileSystemEventHandler):
+    def __init__(self, path: str, event: threading.Event):
+        self.path = os.path.abspath(path)
+        self.event = event
+
+    def on_any_event(self, event):
+        paths = {getattr(event, "src_path", None), getattr(event, "dest_path", None)}
+        if self.path in paths:
+            self.event.set()
+
+
+class LogFollower:
+    """
+    Native `tail -f` for the actionflow log.
+
+    Waits on filesystem notifications (watchdog/inotify) when available and
+    falls back to polling. Rotation (new inode) and truncation are detected
+    on every wakeup: the old file is drained and the new one read from start.
+    """
+
+    def __init__(
+        self,
+        logfile: str = settings.logfile,
+        log_filter: LogFilter = None,
+        poll_interval: float = 1.0,
+    ):
+        self.logfile = logfile
+        self.filter = log_filter or LogFilter()
+        self.poll_interval = poll_interval
+        self.index = LogIndex(logfile)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def history(self, file: BinaryIO, lines: int = 10) -> Tuple[List[str], int]:
+        """Return the matching lines already in the log and the offset to follow from"""
+        end = os.fstat(file.fileno()).st_size
+        log_filter = self.filter
+
+        if log_filter.run:
+            ranges, indexed_end = self.index.lookup(log_filter.run, log_filter.since)
+            ranges.append((indexed_end, end))
+            output = [
+                line
+                for start, stop in ranges
+                for line in _read_range(file, start, stop)
+                if log_filter.match(line)
+            ]
+            return output, end
+
+        if log_filter.since:
+            start = _seek_time(file, end, log_filter.since)
+            output = [
+                line for line in _read_range(file, start, end) if log_filter.match(line)
+            ]
+            return output, end
+
+        output = []
+        for line in _reverse_lines(file, end):
+            if len(output) >= lines:
+                break
+            if log_filter.empty or parse_line(line) and log_filter.match(line):
+                output.append(line)
+        return output[::-1], end
+
+    def _watch(self):
+        if Observer is None:
+            return None
+        observer = Observer()
+        observer.schedule(
+            _WakeupHandler(self.logfile, self._wakeup),
+            os.path.dirname(os.path.abspath(self.logfile)),
+        )
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _read_new(self, file: BinaryIO, pending: bytes) -> Tuple[List[str], bytes]:
+        data = file.read()
+        if not data:
+            return [], pending
+        *lines, pending = (pending + data).split(b"\n")
+        return [line.decode("utf-8", errors="replace") for line in lines], pending
+
+    def follow(self, lines: int = 10) -> Generator[str, None, None]:
+        file = open(self.logfile, "rb")
+        history, position = self.history(file, lines)
+        yield from history
+
+        observer = self._watch()
+        file.seek(position)
+        pending = b""
+        try:
+            while not self._stop.is_set():
+                new_lines, pending = self._read_new(file, pending)
+                for line in new_lines:
+                    if self.filter.match(line):
+                        yield line
+
+                if not new_lines:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+
+                try:
+                    stat = os.stat(self.logfile)
+                except FileNotFoundError:
+                    continue
+                current = os.fstat(file.fileno())
+                if stat.st_ino != current.st_ino or stat.st_size < file.tell():
+                    # Rotated or truncated: drain and reopen from the start
+                    new_lines, pending = self._read_new(file, pending)
+                    for line in new_lines:
+                        if self.filter.match(line):
+                            yield line
+                    file.close()
+                    file = open(self.logfile, "rb")
+                    pending = b""
+        finally:
+            file.close()
+            if observer is not None:
+                observer.stop()
+
+
+def tail_logs(
+    run: str = None,
+    job: str = None,
+    level: str = None,
+    since: str = None,
+    lines: int = 10,
+    follow: bool = True,
+    logfile: str = settings.logfile,
+) -> None:
+    log_filter = LogFilter(
+        run=run, job=job, level=level, since=parse_since(since) if since else None
+    )
+    follower = LogFollower(logfile, log_filter)
+
+    if not follow:
+        with open(logfile, "rb") as file:
+            output, _ = follower.history(file, lines)
+        for line in output:
+            print(line)
+        return
+
+    try:
+        for line in follower.follow(lines):
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        follower.stop()
@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import fcntl as fcntl
+except ImportError:
+    fcntl = None
+
+from actionflow.settings import settings
+from actionflow.tools import Repo
+
+# Clones borrow objects from the mirror (alternates): the mirror must never
+# drop an object, so it is neither pruned nor garbage collected
+MIRROR_CONFIG = {
+    "gc.auto": "0",
+    "maintenance.auto": "false",
+    "fetch.prune": "false",
+    "uploadpack.allowFilter": "true",
+}
+
+_locks: dict = {}
+_locks_lock = threading.Lock()
+
+
+def public_url(url: str) -> str:
+    """
+    URL without credentials (user:token@), safe to store in the shared cache.
+    A user name alone is kept for ssh (git@host), scp-like URLs are unchanged.
+    """
+    parts = urlsplit(url)
+    if not parts.scheme or "@" not in parts.netloc:
+        return url
+    host = parts.netloc.rsplit("@", 1)[1]
+    if parts.scheme in ("ssh", "git+ssh") and not parts.password:
+        return url
+    return urlunsplit(parts._replace(netloc=host))
+
+
+def mirror_path(url: str, cache_dir: Optional[str] = None) -> str:
+    """Path of the bare mirror of a repository URL in the cache"""
+    url = public_url(url)
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", url.rstrip("/").split("/")[-1])
+    if not name.endswith(".git"):
+        name = f"{name}.git"
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir or settings.get_path("git-cache"), f"{digest}-{name}")
+
+
+@contextmanager
+def _mirror_lock(path: str):
+    """Serialize the updates of a mirror across threads and processes"""
+    with _locks_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+
+    with lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "w") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            yield
+
+
+def _configure_mirror(mirror) -> None:
+    for key, value in MIRROR_CONFIG.items():
+        mirror.git.config(key, value)
+
+
+def update_mirror(url: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Create or incrementally fetch the bare mirror of a repository.
+
+    Refs deleted upstream are kept and automatic gc is disabled: objects of
+    deleted or force-pushed branches may still be used by clones sharing
+    the mirror objects. The mirror only grows, remove it to reclaim space.
+    The mirror is keyed and configured by the URL without its credentials.
+
+    Returns:
+        str: The mirror path.
+    """
+    path = mirror_path(url, cache_dir)
+
+    with _mirror_lock(path):
+        if os.path.isdir(path):
+            logging.info(f"Fetching git mirror {path}")
+            mirror = Repo(path)
+            # Mirrors created before the configuration was enforced
+            _configure_mirror(mirror)
+            if url == public_url(url):
+                mirror.git.fetch("--no-prune", "origin")
+            else:
+                # The credentials are only given on the command line
+                mirror.git.fetch("--no-prune", url, "+refs/*:refs/*")
+            return path
+
+        logging.info(f"Creating git mirror of {public_url(url)} in {path}")
+        temp_path = f"{path}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        mirror = Repo.clone_from(url, temp_path, mirror=True)
+        mirror.git.remote("set-url", "origin", public_url(url))
+        _configure_mirror(mirror)
+        os.replace(temp_path, path)
+    return path
+
+
+def clone_from_cache(
+    url: str,
+    path: str,
+    branch: str,
+    depth: Optional[int] = None,
+    filter: Optional[str] = None,
+    dissociate: bool = False,
+    cache_dir: Optional[str] = None,
+):
+    """
+    Clone a branch from the local mirror (updated first), objects are shared
+    with the mirror through alternates unless `dissociate`. The origin remote
+    points to the upstream URL afterwards.
+    """
+    mirror = update_mirror(url, cache_dir)
+
+    options = {"branch": branch, "single_branch": True, "reference": mirror}
+    if depth:
+        options["depth"] = depth
+    if filter:
+        options["filter"] = filter
+    if dissociate:
+        options["dissociate"] = True
+
+    # file:// so that --depth/--filter are honoured for a local source
+    repo = Repo.clone_from(f"file://{os.path.abspath(mirror)}", path, **options)
+    repo.git.remote("set-url", "origin", url)
+    return repo
@@ -1,13 +1,18 @@
+import contextvars
 import logging
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from typing import Generator, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Generator, List, Tuple
 
 from pydantic import model_validator
 
+from actionflow import metrics
 from actionflow.action import Action
-from actionflow.common import StateModel
+from actionflow.common import SharedResources, StateModel
 from actionflow.exceptions import ActionNotFound
+from actionflow.logger import bind_context
+from actionflow.outputs import OutputStore
 from actionflow.tools import group_by
 
 
@@ -24,8 +29,8 @@ class Group(StateModel):
 
         execute():
             Executes all actions in the group in parallel. If any action fails,
-            the group's state is set to 'fail'. If all actions succeed, the group's
-            state is set to 'complete'.
+            the others are cancelled and the group's state is set to 'fail'. If
+            all actions succeed, the group's state is set to 'complete'.
     """
 
     actions: List[Action]
@@ -40,21 +45,64 @@ class Group(StateModel):
         for index, action in enumerate(self.actions, start=1):
             yield index, action
 
+    @staticmethod
+    def _execute_action(action: Action, index: int, total: int) -> None:
+        metrics.EXECUTOR_QUEUED.dec()
+        metrics.EXECUTOR_BUSY.inc()
+        try:
+            action.execute(index, total)
+        finally:
+            metrics.EXECUTOR_BUSY.dec()
+
+    def _cancel(self, futures: Dict[Future, Action]) -> None:
+        """Drop the queued actions and cancel the running ones"""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        for future, action in futures.items():
+            if future.cancel():
+                metrics.EXECUTOR_QUEUED.dec()
+            elif not future.done():
+                logging.warning(f"[Group] Cancelling {action.id or action.name}")
+                action.cancel()
+
     def execute(self, index: int, total: int) -> None:
         if self._stop_event.is_set():
             return
 
+        # Same default as ThreadPoolExecutor, bounded by the group size
+        workers = max(1, min(len(self.actions), 32, (os.cpu_count() or 1) + 4))
+
+        metrics.EXECUTOR_WORKERS.inc(workers)
         try:
             self.machine.start()
 
-            with ThreadPoolExecutor() as executor:
-                futures = [
-                    executor.submit(action.execute, action_index, self.count)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Run each action in a copy of the caller context so the
+                # run/job log context follows it into the worker thread
+                metrics.EXECUTOR_QUEUED.inc(len(self.actions))
+                futures = {
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self._execute_action,
+                        action,
+                        action_index,
+                        self.count,
+                    ): action
                     for action_index, action in enumerate(self.actions)
-                ]
-                for future in futures:
-                    # Wait for all actions to complete
+                }
+                for future in as_completed(futures):
+                    # Wait for all actions, the first failure of an action
+                    # without continue_on_error stops the others
+                    if future.cancelled():
+                        continue
                     future.result()
+                    action = futures[future]
+                    if (
+                        action.machine.state != "success"
+                        and not action.continue_on_error
+                    ):
+                        self._cancel(futures)
 
             if not all(action.machine.state == "success" for action in self.actions):
                 self.machine.fail()
@@ -65,6 +113,8 @@ class Group(StateModel):
             self._stop_event.set()
             logging.info(f"[Group] Failed with error: {e}")
             return
+        finally:
+            metrics.EXECUTOR_WORKERS.dec(workers)
 
         self.machine.complete()
 
@@ -73,6 +123,7 @@ class Job(StateModel):
     name: str
     steps: List[Action]
     _child: str = "steps"
+    _outputs: OutputStore = None
 
     @model_validator(mode="before")
     def preprocess_data(cls, values):
@@ -81,9 +132,21 @@ class Job(StateModel):
         """
         steps = []
 
-        for step in values["steps"]:
-            name = step.pop("name")
+        for index, step in enumerate(values["steps"], start=1):
             params = step.pop("with", {})
+            if "run" in step:
+                # Shell step: `name` is only a label, like GitHub Actions
+                label = step.pop("name", None)
+                name = "run"
+                params["script"] = step.pop("run")
+                for key in ("shell", "env", "timeout", "working-directory"):
+                    if key in step:
+                        params[key.replace("-", "_")] = step.pop(key)
+                if label:
+                    params["description"] = label
+            else:
+                name = step.pop("name")
+            params["id"] = step.pop("id", None) or f"{index}_{name}"
             try:
                 action = Action.by_name(name, **params)
             except ActionNotFound:
@@ -94,6 +157,26 @@ class Job(StateModel):
         values["steps"] = steps
         return values
 
+    def model_post_init(self, __context):
+        # Step outputs are scoped to the job, each reference is a consumer
+        self._outputs = OutputStore()
+        self.set_shared_resources(SharedResources(namespace=self.name))
+        ids = {step.id for step in self.steps}
+        for step in self.steps:
+            step._outputs = self._outputs
+            for step_id, key in step.output_references():
+                if step_id not in ids:
+                    logging.warning(
+                        f"[Job: {self.name}] Step {step.id} references "
+                        f"unknown step: {step_id}"
+                    )
+                self._outputs.add_consumer(step_id, key)
+        return super().model_post_init(__context)
+
+    def set_shared_resources(self, resources: SharedResources) -> None:
+        for step in self.steps:
+            step.shared_resources = resources
+
     @property
     def grouped(self) -> List[List[Action]]:
         return group_by(self.steps, "concurrency")
@@ -111,6 +194,13 @@ class Job(StateModel):
             yield index, group
 
     def execute(self, index: int, total: int) -> None:
+        with bind_context(job=self.name):
+            try:
+                self._execute(index, total)
+            finally:
+                self._outputs.clear()
+
+    def _execute(self, index: int, total: int) -> None:
         try:
             self.machine.start()
             # logging.info(f"[Job: {self.name}] Starting execution...")
@@ -1,35 +1,294 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 
 # from watchdog.events import FileSystemEventHandler
 # from watchdog.observers import Observer
 from actionflow.settings import settings
 
+TEXT_FORMAT = "%(asctime)s - [%(threadName)s] - %(levelname)s - %(context)s%(message)s"
+OVERFLOW_POLICIES = ("block", "drop")
+NO_CONTEXT = "-"
+
+log_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+_listener: "LogListener" = None
+_queue_handler: "BoundedQueueHandler" = None
+
+
+@contextmanager
+def bind_context(**kwargs):
+    """Bind run_id/job/step values to every record logged in the current context"""
+    token = log_context.set({**log_context.get(), **kwargs})
+    try:
+        yield
+    finally:
+        log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copy the bound log context onto the record.
+
+    Must be attached to the handler running in the emitting thread (the queue
+    handler), the listener thread does not see the caller's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = log_context.get()
+        record.run_id = ctx.get("run_id")
+        record.job = ctx.get("job")
+        record.step = ctx.get("step")
+        # Always one positional prefix: parsers must not take a message
+        # starting with brackets ("[Flow] ...") for the run context
+        parts = [str(part or "") for part in (record.run_id, record.job, record.step)]
+        record.context = f"[{'/'.join(parts).rstrip('/') or NO_CONTEXT}] "
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines carrying the run context"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "run_id": getattr(record, "run_id", None),
+            "job": getattr(record, "job", None),
+            "step": getattr(record, "step", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler with an overflow policy for bounded queues.
+
+    - block: wait for the listener to make room (no record is lost)
+    - drop: discard the record when the queue is full, warnings and errors
+      are never dropped
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "block" or record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+class LogListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The default put_nowait() raises when the bounded queue is full
+        self.queue.put(self._sentinel)
+
+
+class IndexedFileHandler(logging.FileHandler):
+    """
+    File handler maintaining a byte-offset index of each run in the log file.
+
+    Consecutive records of the same run are coalesced into spans written as
+    JSON lines to `{logfile}.idx`:
+    {"ino": ..., "run": ..., "start": ..., "end": ..., "first": ..., "last": ...}
+    Spans are flushed when the run changes or every `span_records` records,
+    readers scan the file past the last indexed offset for the live part.
+    """
+
+    def __init__(self, filename: str, span_records: int = 1000, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.span_records = span_records
+        self._index = open(f"{self.baseFilename}.idx", "a", encoding="utf-8")
+        self._span: dict = None
+        self._count = 0
+
+    def _flush_span(self) -> None:
+        if self._span is not None:
+            self._index.write(json.dumps(self._span) + "\n")
+            self._index.flush()
+        self._span = None
+        self._count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        run_id = getattr(record, "run_id", None)
+        if self.stream is None:
+            self.stream = self._open()
+        start = self.stream.tell()
+        super().emit(record)
+
+        if self._span is not None and (
+            run_id != self._span["run"] or self._count >= self.span_records
+        ):
+            self._flush_span()
+        if not run_id:
+            return
+
+        created = datetime.fromtimestamp(record.created).isoformat(
+            timespec="milliseconds"
+        )
+        if self._span is None:
+            self._span = {
+                "ino": os.fstat(self.stream.fileno()).st_ino,
+                "run": run_id,
+                "start": start,
+                "end": start,
+                "first": created,
+                "last": created,
+            }
+        self._span["end"] = self.stream.tell()
+        self._span["last"] = created
+        self._count += 1
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush_span()
+            self._index.close()
+        super().close()
+
+
+class RunFileHandler(logging.Handler):
+    """
+    Write records to one file per run ({directory}/{run_id}.log).
+
+    Only the listener thread writes, at most `max_open` files are kept open.
+    """
+
+    def __init__(self, directory: str, max_open: int = 16):
+        super().__init__()
+        self.directory = directory
+        self.max_open = max_open
+        self._streams: OrderedDict = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_stream(self, run_id: str):
+        stream = self._streams.pop(run_id, None)
+        if stream is None:
+            stream = open(
+                os.path.join(self.directory, f"{run_id}.log"), "a", encoding="utf-8"
+            )
+            while len(self._streams) >= self.max_open:
+                _, oldest = self._streams.popitem(last=False)
+                oldest.close()
+        self._streams[run_id] = stream
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        run_id = getattr(record, "run_id", None)
+        if not run_id:
+            return
+        try:
+            stream = self._get_stream(run_id)
+            stream.write(self.format(record) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        with self.lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams.clear()
+        super().close()
+
+
+def stop_logger() -> None:
+    """Flush pending records and stop the listener thread"""
+    global _listener, _queue_handler
+
+    if _listener is None:
+        return
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+
+    if _queue_handler.dropped:
+        logging.getLogger().warning(
+            f"{_queue_handler.dropped} log records dropped (queue full)"
+        )
+
+    _listener = None
+    _queue_handler = None
+
+
+def configure_logger(
+    logfile: str = settings.logfile,
+    debug: bool = settings.debug,
+    json_format: bool = settings.log_json,
+    per_run: bool = settings.log_per_run,
+    queue_size: int = settings.log_queue_size,
+    overflow: str = settings.log_overflow,
+):
+    """
+    Configure the root logger with a queue based pipeline.
+
+    Callers only enqueue records, formatting and disk/console writes are done
+    by a listener thread so logging stays off the actions hot path.
+    """
+    global _listener, _queue_handler
+
+    stop_logger()
 
-def configure_logger(logfile: str = settings.logfile, debug: bool = settings.debug):
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
-    formatter = logging.Formatter(
-        "%(asctime)s - [%(threadName)s] - %(levelname)s - %(message)s"
-    )
-    # "format": "%(asctime)s | %(levelname)s | %(message)s",
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.DEBUG)
     console_handler.setFormatter(formatter)
 
-    file_handler = logging.FileHandler(logfile)
+    file_handler = IndexedFileHandler(logfile)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    handlers = [console_handler, file_handler]
+
+    if per_run:
+        run_handler = RunFileHandler(settings.runs_logdir)
+        run_handler.setLevel(logging.DEBUG)
+        run_handler.setFormatter(formatter)
+        handlers.append(run_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = BoundedQueueHandler(log_queue, overflow=overflow)
+    _queue_handler.addFilter(ContextFilter())
+
+    _listener = LogListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    logger.addHandler(_queue_handler)
 
     return logger
 
 
+atexit.register(stop_logger)
+
+
 def logs(function):
     """Logs decorator to benchmark method execution"""
 
@@ -0,0 +1,272 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    900.0,
+    3600.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """
+    Base class of the metrics, one child (with its own lock) per label set.
+
+    Children are looked up without locking, the metric lock is only taken
+    the first time a label set is seen.
+    """
+
+    kind: str = None
+    child_class = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [
+            (self.name, _format_labels(self.labelnames, key), child.value)
+            for key, child in children
+        ]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(
+            f"{name}{labels} {_format_value(value)}"
+            for name, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    child_class = _GaugeChild
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).dec(amount)
+
+    def set(self, value: float, **labels) -> None:
+        self.labels(**labels).set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            children = list(self._children.items())
+
+        samples = []
+        for key, child in children:
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+
+            cumulative = 0
+            for bound, value in zip(self.buckets + (float("inf"),), counts):
+                cumulative += value
+                labels = _format_labels(self.labelnames, key, le=_format_value(bound))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the engine metrics.
+
+    Metrics are created once (get or create by name) and rendered in the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, *args, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def dump(self, filepath: str) -> None:
+        with open(filepath, "w") as file:
+            file.write(self.render())
+
+
+registry = MetricsRegistry()
+
+STATE_TRANSITIONS = registry.counter(
+    "actionflow_state_transitions_total",
+    "State machine transitions of flows, jobs, groups and actions",
+    ("kind", "state"),
+)
+RUNNING = registry.gauge(
+    "actionflow_running", "Flows, jobs, groups and actions currently running", ("kind",)
+)
+DURATION = registry.histogram(
+    "actionflow_duration_seconds",
+    "Execution time of flows, jobs, groups and actions",
+    ("kind", "name", "state"),
+)
+ACTION_RETRIES = registry.counter(
+    "actionflow_action_retries_total", "Action attempts retried", ("action",)
+)
+ACTION_SKIPPED = registry.counter(
+    "actionflow_action_skipped_total",
+    "Actions skipped because already satisfied",
+    ("action",),
+)
+EXECUTOR_QUEUED = registry.gauge(
+    "actionflow_executor_queued_actions",
+    "Actions submitted to a group executor and waiting for a worker",
+)
+EXECUTOR_BUSY = registry.gauge(
+    "actionflow_executor_busy_workers", "Group executor workers running an action"
+)
+EXECUTOR_WORKERS = registry.gauge(
+    "actionflow_executor_workers", "Group executor workers available"
+)
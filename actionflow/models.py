@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, computed_field
 
 
@@ -18,3 +20,9 @@ class ContainerSchema(BaseModel):
     image: ImageSchema
     port: int
     type: str
+
+
+class DownloadItemSchema(BaseModel):
+    url: str
+    filepath: str
+    sha256: Optional[str] = None
@@ -1,32 +1,565 @@
+import atexit
+import hashlib
+import json
 import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 try:
     import boto3 as boto3
+    from botocore.config import Config as BotoConfig
 except ImportError:
     boto3 = None
+    BotoConfig = None
+try:
+    import paramiko as paramiko
+except ImportError:
+    paramiko = None
 import requests
+from requests.adapters import HTTPAdapter
+
+from actionflow.exceptions import DownloadError
+from actionflow.tools import FileSlice
 
 DEFAULT_TIMEOUT = 60
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_POOL_SIZE = 16
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+DEFAULT_UPLOAD_CONCURRENCY = 4
+SFTP_KEEPALIVE = 30
+SFTP_WINDOW_SIZE = 64 * 1024 * 1024
+SFTP_BLOCK_SIZE = 1024 * 1024
+
+_sessions: dict = {}
+_sessions_lock = threading.Lock()
+_s3_clients: dict = {}
+_s3_clients_lock = threading.Lock()
+_sftp_pools: dict = {}
+_sftp_pools_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the shared session of the URL host.
+
+    Connections are pooled (keep-alive) across steps and threads, so only the
+    first request to a host pays the TCP/TLS handshake.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=DEFAULT_POOL_SIZE
+                )
+                session.mount(f"{parts.scheme}://", adapter)
+                _sessions[key] = session
+    return session
+
+
+class DownloadProgress:
+    """Thread-safe byte counter logging the progress every `interval` seconds"""
+
+    def __init__(self, name: str, total: int = 0, interval: float = 5.0):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self._lock = threading.Lock()
+        self._start = self._last = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def rate(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.done += size
+            now = time.monotonic()
+            if now - self._last < self.interval:
+                return
+            self._last = now
+
+        percent = f"{self.done / self.total:.0%} " if self.total else ""
+        logging.info(
+            f"Downloading {self.name}: {percent}({self.done / 1024 / 1024:.1f} MiB, "
+            f"{self.rate / 1024 / 1024:.1f} MiB/s)"
+        )
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _probe_ranges(
+    session: requests.Session, url: str, headers: dict, timeout: int
+) -> Tuple[Optional[int], dict]:
+    """
+    Return the file size if the server supports byte ranges (else 0, None if
+    a conditional request answered 304) and the ETag/Last-Modified metadata
+    of the file.
+    """
+    response = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+    metadata = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": None,
+    }
+    if response.status_code == 304:
+        return None, metadata
+    if response.status_code != 200:
+        return 0, metadata
+    if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return 0, metadata
+    if response.headers.get("Content-Encoding"):
+        return 0, metadata
+    return int(response.headers.get("Content-Length") or 0), metadata
+
+
+def _if_range(metadata: dict) -> Optional[str]:
+    """If-Range validator: a strong ETag, else Last-Modified"""
+    etag = metadata.get("etag")
+    # Weak ETags can not be used with If-Range
+    if etag and not etag.startswith("W/"):
+        return etag
+    return metadata.get("last_modified")
+
+
+def _fetch_range(
+    session: requests.Session,
+    url: str,
+    headers: dict,
+    start: int,
+    end: int,
+    fd: int,
+    chunk_size: int,
+    timeout: int,
+    progress: DownloadProgress,
+    if_range: str,
+    size: int,
+) -> None:
+    headers = {
+        **(headers or {}),
+        "Range": f"bytes={start}-{end}",
+        "If-Range": if_range,
+    }
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 200:
+            # If-Range did not match: the file changed since the HEAD request
+            raise DownloadError(f"File changed during the download of {url}")
+        if response.status_code != 206:
+            raise DownloadError(
+                f"Range request failed: {response.status_code}",
+                status_code=response.status_code,
+            )
+        content_range = response.headers.get("Content-Range", "")
+        if content_range != f"bytes {start}-{end}/{size}":
+            raise DownloadError(f"Unexpected Content-Range: {content_range}")
+        offset = start
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            _pwrite_all(fd, chunk, offset)
+            offset += len(chunk)
+            progress.add(len(chunk))
+
+    if offset != end + 1:
+        raise DownloadError(f"Incomplete range {start}-{end}: got {offset - start}")
+
+
+def _download_segments(
+    session: requests.Session,
+    url: str,
+    part_path: str,
+    headers: dict,
+    size: int,
+    segments: int,
+    chunk_size: int,
+    timeout: int,
+    if_range: str,
+) -> None:
+    """
+    Download byte ranges in parallel and write them in place with pwrite.
+
+    Every range is conditional (If-Range): a file modified during the
+    download fails it instead of mixing two versions.
+    """
+    bounds = [size * index // segments for index in range(segments + 1)]
+    progress = DownloadProgress(part_path, total=size)
+
+    fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            futures = [
+                executor.submit(
+                    _fetch_range,
+                    session,
+                    url,
+                    headers,
+                    bounds[index],
+                    bounds[index + 1] - 1,
+                    fd,
+                    chunk_size,
+                    timeout,
+                    progress,
+                    if_range,
+                    size,
+                )
+                for index in range(segments)
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        os.close(fd)
+
+    logging.info(
+        f"Downloaded {size} bytes ({segments} segments, "
+        f"{progress.rate / 1024 / 1024:.1f} MiB/s)"
+    )
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_validator(part_path: str, url: str) -> dict:
+    """Return the If-Range validator saved with a partial download"""
+    validator = _read_json(f"{part_path}.json")
+    if validator.get("url") != url or not os.path.exists(part_path):
+        return {}
+    return validator
+
+
+def _write_validator(part_path: str, url: str, response: requests.Response) -> None:
+    validator = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    with open(f"{part_path}.json", "w") as file:
+        json.dump(validator, file)
+
+
+def read_metadata(output_path: str, url: str = None) -> dict:
+    """
+    Return the metadata sidecar ({output_path}.meta.json) of a downloaded file:
+    url, etag, last_modified, sha256 and size.
+
+    Empty if missing, written for another URL or if the file size changed.
+    """
+    metadata = _read_json(f"{output_path}.meta.json")
+    if not metadata or (url and metadata.get("url") != url):
+        return {}
+    try:
+        if os.path.getsize(output_path) != metadata.get("size"):
+            return {}
+    except OSError:
+        return {}
+    return metadata
+
+
+def _conditional_headers(metadata: dict) -> dict:
+    headers = {}
+    if metadata.get("etag"):
+        headers["If-None-Match"] = metadata["etag"]
+    if metadata.get("last_modified"):
+        headers["If-Modified-Since"] = metadata["last_modified"]
+    return headers
+
+
+def _download_stream(
+    session: requests.Session,
+    url: str,
+    part_path: str,
+    headers: dict,
+    chunk_size: int,
+    timeout: int,
+    conditional: dict = None,
+) -> Optional[dict]:
+    """
+    Download in a single stream, resuming a previous partial download when its
+    ETag/Last-Modified validator still matches (If-Range).
+
+    The sha256 of the file is computed while streaming (the partial file
+    prefix is hashed once when resuming). With `conditional` headers, a new
+    download is a conditional GET: None is returned on 304, a 200 body is
+    streamed to the part file.
+    """
+    validator = _read_validator(part_path, url)
+    if_range = _if_range(validator)
+    offset = os.path.getsize(part_path) if if_range else 0
+
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers.update({"Range": f"bytes={offset}-", "If-Range": if_range})
+    elif conditional:
+        request_headers.update(conditional)
+
+    with session.get(
+        url, headers=request_headers, stream=True, timeout=timeout
+    ) as response:
+        if response.status_code == 416 and offset:
+            # Stale partial file, restart from scratch
+            os.remove(part_path)
+            return _download_stream(
+                session, url, part_path, headers, chunk_size, timeout, conditional
+            )
+        if response.status_code == 304 and not offset and conditional:
+            return None
+
+        digest = hashlib.sha256()
+        if response.status_code == 206 and offset:
+            content_range = response.headers.get("Content-Range", "")
+            if not content_range.startswith(f"bytes {offset}-"):
+                raise DownloadError(f"Unexpected Content-Range: {content_range}")
+            mode = "ab"
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    digest.update(chunk)
+            logging.info(f"Resuming download of {url} at {offset} bytes")
+        elif response.status_code == 200:
+            mode, offset = "wb", 0
+            _write_validator(part_path, url, response)
+        else:
+            raise DownloadError(
+                f"Failed to download {url}: {response.status_code}, {response.reason}",
+                status_code=response.status_code,
+            )
+
+        length = int(response.headers.get("Content-Length") or 0)
+        progress = DownloadProgress(part_path, total=length)
+
+        received = 0
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                digest.update(chunk)
+                received += len(chunk)
+                progress.add(len(chunk))
+
+    if length and received != length:
+        raise DownloadError(f"Incomplete download of {url}: {received}/{length} bytes")
+
+    validator = _read_json(f"{part_path}.json")
+    return {
+        "etag": validator.get("etag"),
+        "last_modified": validator.get("last_modified"),
+        "sha256": digest.hexdigest(),
+    }
 
 
 def download_file(
     url: str,
     output_path: str,
     headers: dict = None,
-    chunk_size: int = 8192,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
     timeout: int = DEFAULT_TIMEOUT,
-) -> None:
-    response = requests.get(url, headers=headers, stream=True, timeout=timeout)
-    if response.status_code == 200:
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                f.write(chunk)
-        logging.info(f"File downloaded to {output_path}")
+    segments: int = 1,
+    min_segment_size: int = MIN_SEGMENT_SIZE,
+    sha256: str = None,
+    conditional: bool = False,
+) -> bool:
+    """
+    Download a file with the shared session of the host.
+
+    Data is written to `{output_path}.part` and renamed on completion. An
+    interrupted single-stream download is resumed on the next call if the
+    file did not change on the server (ETag/Last-Modified).
+
+    With `segments` > 1 and a server supporting `Range`, the file is split in
+    byte ranges (at least `min_segment_size` each) downloaded in parallel,
+    conditional on the ETag/Last-Modified of the file (If-Range). Segmented
+    downloads are not resumed nor hashed, an expected `sha256` or a server
+    without validators forces a single stream.
+
+    ETag, Last-Modified and sha256 are saved in `{output_path}.meta.json`.
+    With `conditional`, the request for an existing file carries
+    If-None-Match/If-Modified-Since: the file is kept as is on 304, and
+    downloaded from the same response otherwise.
+
+    Returns:
+        bool: False if the file was not modified (304), True if downloaded.
+
+    Raises:
+        DownloadError: If the server answers with an unexpected status, the
+            transfer is incomplete or the sha256 does not match.
+    """
+    session = get_session(url)
+    part_path = f"{output_path}.part"
+    sha256 = sha256.lower() if sha256 else None
+
+    revalidate = {}
+    if conditional and os.path.exists(output_path):
+        metadata = read_metadata(output_path, url)
+        if metadata and (not sha256 or metadata.get("sha256") == sha256):
+            revalidate = _conditional_headers(metadata)
+
+    size = 0
+    if segments > 1 and not sha256 and not _read_validator(part_path, url):
+        size, metadata = _probe_ranges(
+            session, url, {**(headers or {}), **revalidate}, timeout
+        )
+        # Without a validator, a change during the download goes unnoticed
+        if size and _if_range(metadata):
+            segments = min(segments, size // min_segment_size)
+        else:
+            segments = 1
     else:
-        logging.info(
-            f"Failed to download File: {response.status_code}, {response.text}"
+        segments = 1
+
+    if size is None:
+        logging.info(f"File not modified: {output_path}")
+        return False
+
+    if segments > 1:
+        _download_segments(
+            session,
+            url,
+            part_path,
+            headers,
+            size,
+            segments,
+            chunk_size,
+            timeout,
+            _if_range(metadata),
+        )
+    else:
+        metadata = _download_stream(
+            session, url, part_path, headers, chunk_size, timeout, revalidate
+        )
+        if metadata is None:
+            logging.info(f"File not modified: {output_path}")
+            return False
+
+    if sha256 and metadata["sha256"] != sha256:
+        os.remove(part_path)
+        raise DownloadError(
+            f"Checksum mismatch for {url}: {metadata['sha256']} != {sha256}"
         )
 
+    os.replace(part_path, output_path)
+    if os.path.exists(f"{part_path}.json"):
+        os.remove(f"{part_path}.json")
+
+    metadata.update({"url": url, "size": os.path.getsize(output_path)})
+    with open(f"{output_path}.meta.json", "w") as file:
+        json.dump(metadata, file)
+
+    logging.info(f"File downloaded to {output_path}")
+    return True
+
+
+def get_s3_client(
+    endpoint_url: str,
+    access_key: str,
+    secret_key: str,
+    max_pool_connections: int = DEFAULT_POOL_SIZE,
+):
+    """
+    Return a cached S3 client for the endpoint and credentials.
+
+    boto3 clients are thread-safe: credentials resolution and endpoint setup
+    are only paid once per process.
+    """
+    key = (endpoint_url, access_key, secret_key)
+
+    client = _s3_clients.get(key)
+    if client is None:
+        with _s3_clients_lock:
+            client = _s3_clients.get(key)
+            if client is None:
+                client = _s3_clients[key] = boto3.client(
+                    "s3",
+                    endpoint_url=endpoint_url,
+                    aws_access_key_id=access_key,
+                    aws_secret_access_key=secret_key,
+                    config=BotoConfig(max_pool_connections=max_pool_connections),
+                )
+    return client
+
+
+def part_size_for(size: int, part_size: int = DEFAULT_PART_SIZE) -> int:
+    """
+    Part size used to upload `size` bytes: at least 5 MiB, and raised (to a
+    MiB multiple) when the file would need more than 10,000 parts.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    if size > part_size * MAX_PARTS:
+        mib = 1024 * 1024
+        part_size = math.ceil(size / MAX_PARTS / mib) * mib
+    return part_size
+
+
+def _upload_part(client, fd: int, upload: dict, number: int, offset: int, size: int):
+    response = client.upload_part(
+        **upload, PartNumber=number, Body=FileSlice(fd, offset, size)
+    )
+    return {"PartNumber": number, "ETag": response["ETag"]}
+
+
+def _multipart_upload(
+    client,
+    fd: int,
+    size: int,
+    bucket_name: str,
+    destination_blob: str,
+    part_size: int,
+    max_concurrency: int,
+) -> None:
+    upload = {"Bucket": bucket_name, "Key": destination_blob}
+    upload["UploadId"] = client.create_multipart_upload(**upload)["UploadId"]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    _upload_part,
+                    client,
+                    fd,
+                    upload,
+                    number,
+                    offset,
+                    min(part_size, size - offset),
+                )
+                for number, offset in enumerate(range(0, size, part_size), start=1)
+            ]
+            parts = [future.result() for future in futures]
+
+        client.complete_multipart_upload(**upload, MultipartUpload={"Parts": parts})
+    except Exception:
+        logging.error(f"Multipart upload of '{destination_blob}' failed, aborting")
+        client.abort_multipart_upload(**upload)
+        raise
+
 
 def upload_to_s3(
     bucket_name: str,
@@ -35,30 +568,566 @@ def upload_to_s3(
     access_key: str,
     secret_key: str,
     endpoint_url: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
 ):
     """
     Uploads a file to a S3 bucket using boto3.
 
+    Files larger than `part_size` are sent as a multipart upload, up to
+    `max_concurrency` parts at once. Parts are read in place (os.pread) and
+    never copied whole in memory. A failed multipart upload is aborted.
+
     :param bucket_name: The name of the bucket.
     :param source_file: The local file path to upload.
     :param destination_blob: The target path in the bucket.
     :param access_key: Your interop access key.
     :param secret_key: Your interop secret key.
+    :param part_size: Size of the multipart parts (5 MiB minimum, raised for
+        files that would need more than 10,000 parts).
+    :param max_concurrency: Number of parts uploaded in parallel.
     """
-    # Initialize the S3 client for GCS
-    client = boto3.client(
-        "s3",
-        endpoint_url=endpoint_url,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
+    client = get_s3_client(endpoint_url, access_key, secret_key)
+    size = os.path.getsize(source_file)
+    part_size = part_size_for(size, part_size)
+
+    fd = os.open(source_file, os.O_RDONLY)
+    try:
+        if size <= part_size:
+            client.put_object(
+                Bucket=bucket_name,
+                Key=destination_blob,
+                Body=FileSlice(fd, 0, size),
+            )
+        else:
+            _multipart_upload(
+                client,
+                fd,
+                size,
+                bucket_name,
+                destination_blob,
+                part_size,
+                max_concurrency,
+            )
+    finally:
+        os.close(fd)
+
+    logging.info(
+        f"File '{source_file}' uploaded to '{bucket_name}/{destination_blob}'."
     )
 
-    # Upload the file
-    client.upload_file(
-        Filename=source_file,
-        Bucket=bucket_name,
-        Key=destination_blob,
+
+def _read_full(stream: BinaryIO, size: int) -> bytes:
+    """Read `size` bytes from a stream, less only at its end"""
+    chunks, remaining = [], size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def upload_stream_to_s3(
+    bucket_name: str,
+    stream: BinaryIO,
+    destination_blob: str,
+    access_key: str,
+    secret_key: str,
+    endpoint_url: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+) -> int:
+    """
+    Upload a stream of unknown size (e.g. an archive being compressed).
+
+    Parts are read `part_size` at a time and at most `max_concurrency` are in
+    flight, memory is bounded by (max_concurrency + 1) * part_size. A stream
+    shorter than one part is sent with a single put.
+
+    :return: Number of bytes uploaded.
+    :raises ValueError: If the stream needs more than 10,000 parts, the
+        upload is aborted (use a larger `part_size`).
+    """
+    client = get_s3_client(endpoint_url, access_key, secret_key)
+    part_size = max(part_size, MIN_PART_SIZE)
+
+    data = _read_full(stream, part_size)
+    if len(data) < part_size:
+        client.put_object(Bucket=bucket_name, Key=destination_blob, Body=data)
+        return len(data)
+
+    upload = {"Bucket": bucket_name, "Key": destination_blob}
+    upload["UploadId"] = client.create_multipart_upload(**upload)["UploadId"]
+    slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    def _send(number: int, body: bytes) -> dict:
+        try:
+            response = client.upload_part(**upload, PartNumber=number, Body=body)
+            return {"PartNumber": number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    total = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = []
+            number = 1
+            while data:
+                if number > MAX_PARTS:
+                    raise ValueError(
+                        f"Stream larger than {MAX_PARTS} parts of {part_size} "
+                        "bytes, increase part_size"
+                    )
+                slots.acquire()
+                futures.append(executor.submit(_send, number, data))
+                total += len(data)
+                number += 1
+                data = _read_full(stream, part_size)
+            parts = [future.result() for future in futures]
+
+        client.complete_multipart_upload(**upload, MultipartUpload={"Parts": parts})
+    except Exception:
+        logging.error(f"Multipart upload of '{destination_blob}' failed, aborting")
+        client.abort_multipart_upload(**upload)
+        raise
+
+    logging.info(f"Stream uploaded to '{bucket_name}/{destination_blob}'.")
+    return total
+
+
+def compute_etag(
+    filepath: str, part_size: int = DEFAULT_PART_SIZE, block_size: int = 1024 * 1024
+) -> str:
+    """
+    Compute the S3 ETag a file gets when uploaded by `upload_to_s3`: the MD5
+    for a single part, the MD5 of the parts MD5 suffixed by `-N` for multipart.
+    """
+    size = os.path.getsize(filepath)
+    part_size = part_size_for(size, part_size)
+
+    digests, digest, remaining = [], hashlib.md5(), part_size
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            view = memoryview(block)
+            # Split the blocks at the part boundaries
+            while view:
+                if not remaining:
+                    digests.append(digest.digest())
+                    digest, remaining = hashlib.md5(), part_size
+                data = view[:remaining]
+                digest.update(data)
+                remaining -= len(data)
+                view = view[len(data) :]
+    digests.append(digest.digest())
+
+    if size <= part_size:
+        return digests[0].hex()
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+def list_s3_objects(client, bucket_name: str, prefix: str = "") -> Dict[str, dict]:
+    """Return {key: {"size", "etag"}} for the objects under prefix"""
+    objects = {}
+    kwargs = {"Bucket": bucket_name, "Prefix": prefix}
+    while True:
+        response = client.list_objects_v2(**kwargs)
+        for item in response.get("Contents", []):
+            objects[item["Key"]] = {
+                "size": item["Size"],
+                "etag": item["ETag"].strip('"'),
+            }
+        if not response.get("IsTruncated"):
+            return objects
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def delete_s3_objects(client, bucket_name: str, keys: List[str]) -> None:
+    """Delete keys in batches of 1000 (DeleteObjects limit)"""
+    for index in range(0, len(keys), 1000):
+        batch = keys[index : index + 1000]
+        client.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+
+
+def plan_s3_sync(
+    local: Dict[str, dict], remote: Dict[str, dict]
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare local files and remote objects ({key: {"size", "etag"}}).
+
+    Returns:
+        Tuple[List[str], List[str]]: Keys to upload (new or changed) and keys
+            only present remotely.
+    """
+    upload = [
+        key
+        for key, item in local.items()
+        if key not in remote
+        or remote[key]["size"] != item["size"]
+        or remote[key]["etag"] != item["etag"]
+    ]
+    extraneous = [key for key in remote if key not in local]
+    return sorted(upload), sorted(extraneous)
+
+
+def scan_tree(directory: str, prefix: str = "") -> Dict[str, os.stat_result]:
+    """Return {key: stat} for the regular files under directory"""
+    files = {}
+    pending = [(directory, prefix)]
+    while pending:
+        path, key_prefix = pending.pop()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                key = f"{key_prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, f"{key}/"))
+                elif entry.is_file():
+                    files[key] = entry.stat()
+    return files
+
+
+def sync_to_s3(
+    bucket_name: str,
+    source_dir: str,
+    prefix: str,
+    access_key: str,
+    secret_key: str,
+    endpoint_url: str,
+    delete: bool = False,
+    manifest: str = None,
+    remote_listing: bool = True,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    max_files: int = 8,
+) -> dict:
+    """
+    Upload the new or changed files of a directory under a bucket prefix.
+
+    Local ETags are cached in the manifest (keyed on size and mtime) so that
+    unchanged files are not hashed again. Remote objects are listed once per
+    sync, or taken from the manifest when `remote_listing` is off.
+
+    :param prefix: Destination prefix, the relative paths are appended to it.
+    :param delete: Delete the objects under prefix missing locally.
+    :param manifest: Local manifest path (JSON).
+    :param max_files: Number of files uploaded in parallel.
+    :return: Sync statistics (uploaded, deleted, unchanged, bytes).
+    """
+    client = get_s3_client(endpoint_url, access_key, secret_key)
+    prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+    cache = _read_json(manifest) if manifest else {}
+
+    local = {}
+    for key, stat in scan_tree(source_dir, prefix).items():
+        entry = cache.get(key)
+        if (
+            not entry
+            or entry["size"] != stat.st_size
+            or entry["mtime_ns"] != stat.st_mtime_ns
+            or entry.get("part_size") != part_size
+        ):
+            path = os.path.join(source_dir, key[len(prefix) :])
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "part_size": part_size,
+                "etag": compute_etag(path, part_size),
+            }
+        local[key] = entry
+
+    if remote_listing:
+        remote = list_s3_objects(client, bucket_name, prefix)
+    else:
+        remote = cache
+    upload, extraneous = plan_s3_sync(local, remote)
+
+    def _upload(key: str) -> None:
+        upload_to_s3(
+            bucket_name,
+            os.path.join(source_dir, key[len(prefix) :]),
+            key,
+            access_key,
+            secret_key,
+            endpoint_url,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+        )
+
+    uploaded = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_files)) as executor:
+            futures = {key: executor.submit(_upload, key) for key in upload}
+            for key, future in futures.items():
+                future.result()
+                uploaded[key] = local[key]
+    finally:
+        if manifest:
+            # Only record what is known to be on the remote side
+            state = {
+                key: entry
+                for key, entry in local.items()
+                if key in uploaded or key not in upload
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(manifest)), exist_ok=True)
+            with open(f"{manifest}.tmp", "w") as file:
+                json.dump(state, file)
+            os.replace(f"{manifest}.tmp", manifest)
+
+    if delete and extraneous:
+        delete_s3_objects(client, bucket_name, extraneous)
+
+    stats = {
+        "uploaded": len(upload),
+        "deleted": len(extraneous) if delete else 0,
+        "unchanged": len(local) - len(upload),
+        "bytes": sum(local[key]["size"] for key in upload),
+    }
+    logging.info(
+        f"Synced '{source_dir}' to '{bucket_name}/{prefix}': "
+        f"{stats['uploaded']} uploaded ({stats['bytes']} bytes), "
+        f"{stats['unchanged']} unchanged, {stats['deleted']} deleted"
     )
+    return stats
+
+
+class SftpPool:
+    """
+    One authenticated SSH transport per host, shared by the actions of a run
+    (keepalive on, large flow-control window).
+
+    SFTP channels are cheap to open on an existing transport: idle channels
+    are kept and handed out again by `channel()`. A dropped transport is
+    reconnected on the next request.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self._transport = None
+        self._idle: list = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        logging.debug(f"[SFTP] Connecting to {self.host}:{self.port}")
+        transport = paramiko.Transport(
+            (self.host, self.port), default_window_size=SFTP_WINDOW_SIZE
+        )
+        transport.set_keepalive(SFTP_KEEPALIVE)
+        transport.connect(username=self.username, password=self.password)
+        return transport
+
+    def _get_transport(self):
+        with self._lock:
+            if self._transport is None or not self._transport.is_active():
+                if self._transport is not None:
+                    self._transport.close()
+                self._idle.clear()
+                self._transport = self._connect()
+            sftp = self._idle.pop() if self._idle else None
+            return self._transport, sftp
+
+    @contextmanager
+    def channel(self):
+        """Borrow a SFTP client, returned to the pool unless it failed"""
+        transport, sftp = self._get_transport()
+        if sftp is None:
+            sftp = paramiko.SFTPClient.from_transport(
+                transport, window_size=SFTP_WINDOW_SIZE
+            )
+        try:
+            yield sftp
+        except Exception:
+            sftp.close()
+            raise
+
+        with self._lock:
+            if transport is self._transport:
+                self._idle.append(sftp)
+                return
+        sftp.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for sftp in self._idle:
+                sftp.close()
+            self._idle.clear()
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
+
+def get_sftp_pool(
+    host: str, port: int, username: str, password: str, run_id: str = None
+) -> SftpPool:
+    """
+    Return the SFTP pool of the host and credentials for a run: concurrent
+    runs do not share connections, `close_sftp_pools(run_id)` closes them
+    at the end of the run.
+    """
+    key = (run_id, host, port, username, password)
+
+    pool = _sftp_pools.get(key)
+    if pool is None:
+        with _sftp_pools_lock:
+            pool = _sftp_pools.get(key)
+            if pool is None:
+                pool = _sftp_pools[key] = SftpPool(host, port, username, password)
+    return pool
+
+
+@atexit.register
+def close_sftp_pools(run_id: str = None) -> None:
+    """Close the pools of a run, or all of them"""
+    with _sftp_pools_lock:
+        keys = [key for key in _sftp_pools if run_id is None or key[0] == run_id]
+        pools = [_sftp_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+def _sftp_makedirs(sftp, path: str) -> None:
+    current = ""
+    for part in path.strip("/").split("/"):
+        current = f"{current}/{part}" if current or path.startswith("/") else part
+        try:
+            sftp.stat(current)
+        except IOError:
+            sftp.mkdir(current)
+
+
+def _sftp_read_validator(sftp, path: str) -> dict:
+    try:
+        with sftp.open(path, "r") as file:
+            return json.loads(file.read())
+    except (IOError, ValueError):
+        return {}
+
+
+def _sftp_replace(sftp, source: str, destination: str) -> None:
+    """Rename over an existing file (plain SFTP rename refuses to)"""
+    try:
+        sftp.posix_rename(source, destination)
+        return
+    except IOError:
+        pass
+    try:
+        sftp.remove(destination)
+    except IOError:
+        pass
+    sftp.rename(source, destination)
+
+
+def sftp_upload(sftp, source_file: str, destination: str, resume: bool = True) -> int:
+    """
+    Upload a file with pipelined writes (no round-trip per request).
+
+    Data is written to `{destination}.part`, renamed once complete. The size
+    and mtime of the source are saved next to it (`.part.json`): with
+    `resume`, a partial upload is completed from its size only if they still
+    match, otherwise it starts over.
+
+    :return: Number of bytes sent.
+    """
+    status = os.stat(source_file)
+    size = status.st_size
+    part_path = f"{destination}.part"
+    validator = {"size": size, "mtime_ns": status.st_mtime_ns}
+
+    offset = 0
+    if resume and _sftp_read_validator(sftp, f"{part_path}.json") == validator:
+        try:
+            offset = sftp.stat(part_path).st_size
+        except IOError:
+            offset = 0
+        if offset > size:
+            offset = 0
+        elif offset:
+            logging.info(f"[SFTP] Resuming {destination} at {offset} bytes")
+    if not offset:
+        with sftp.open(f"{part_path}.json", "w") as file:
+            file.write(json.dumps(validator))
+
+    with open(source_file, "rb") as file, sftp.open(
+        part_path, "r+b" if offset else "wb"
+    ) as remote:
+        remote.set_pipelined(True)
+        file.seek(offset)
+        remote.seek(offset)
+        while True:
+            chunk = file.read(SFTP_BLOCK_SIZE)
+            if not chunk:
+                break
+            remote.write(chunk)
+
+    remote_size = sftp.stat(part_path).st_size
+    if remote_size != size:
+        raise IOError(f"Size mismatch for {destination}: {remote_size} != {size}")
+    _sftp_replace(sftp, part_path, destination)
+    sftp.remove(f"{part_path}.json")
+    return size - offset
+
+
+def sftp_upload_stream(sftp, stream: BinaryIO, destination: str) -> int:
+    """Upload a stream of unknown size with pipelined writes, return its size"""
+    total = 0
+    with sftp.open(destination, "wb") as remote:
+        remote.set_pipelined(True)
+        while True:
+            chunk = stream.read(SFTP_BLOCK_SIZE)
+            if not chunk:
+                break
+            remote.write(chunk)
+            total += len(chunk)
+    return total
+
+
+def sftp_upload_many(
+    pool: SftpPool,
+    files: List[Tuple[str, str]],
+    channels: int = DEFAULT_UPLOAD_CONCURRENCY,
+    resume: bool = True,
+) -> dict:
+    """
+    Upload (source, destination) pairs over `channels` parallel SFTP channels
+    of the pool transport. Remote directories are created as needed.
+
+    Files completed by a previous attempt (nothing left to send from their
+    `.part` file) are counted as skipped, not uploaded.
+    """
+    directories = sorted({os.path.dirname(dest) for _, dest in files} - {""})
+    if directories:
+        with pool.channel() as sftp:
+            for directory in directories:
+                _sftp_makedirs(sftp, directory)
+
+    def _upload(source: str, destination: str) -> Tuple[int, bool]:
+        with pool.channel() as sftp:
+            sent = sftp_upload(sftp, source, destination, resume=resume)
+        return sent, not sent and os.path.getsize(source) > 0
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, channels)) as executor:
+        futures = [executor.submit(_upload, *item) for item in files]
+        results = [future.result() for future in futures]
+
+    elapsed = max(time.monotonic() - start, 1e-6)
+    skipped = sum(1 for _, complete in results if complete)
+    stats = {
+        "files": len(files),
+        "uploaded": len(files) - skipped,
+        "skipped": skipped,
+        "bytes": sum(sent for sent, _ in results),
+        "seconds": round(elapsed, 3),
+    }
     logging.info(
-        f"File '{source_file}' uploaded to '{bucket_name}/{destination_blob}'."
+        f"[SFTP] {stats['uploaded']}/{stats['files']} files uploaded to "
+        f"{pool.host} ({skipped} already complete), "
+        f"{stats['bytes'] / elapsed / 1024 / 1024:.1f} MiB/s"
     )
+    return stats
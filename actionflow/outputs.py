@@ -0,0 +1,233 @@
+import io
+import logging
+import mmap
+import os
+import re
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Set, Tuple
+
+from actionflow.exceptions import OutputNotFound
+
+# ${{ steps.<id>.outputs.<key> }}
+EXPRESSION = re.compile(r"\$\{\{\s*steps\.([\w-]+)\.outputs\.([\w-]+)\s*\}\}")
+
+Reference = Tuple[str, str]
+
+
+class Artifact:
+    """
+    A binary step output shared without copy.
+
+    The data is exposed as a read-only memoryview over the producer buffer
+    (bytes, bytearray), a mmap of a file, or a shared memory block that a
+    worker process can attach to (an artifact pickles as its block name).
+
+    Attributes:
+        size (int): Size of the data in bytes.
+        name (str): Name of the shared memory block, if any.
+    """
+
+    def __init__(self, view: memoryview, handle=None, shared=None, owner=True):
+        self._view = view.toreadonly()
+        self._handle = handle
+        self._shared = shared
+        self._owner = owner
+        self.size = len(view)
+
+    @classmethod
+    def from_bytes(cls, data) -> "Artifact":
+        return cls(memoryview(data))
+
+    @classmethod
+    def from_file(cls, path: str) -> "Artifact":
+        """Map a file read-only, pages are loaded on access"""
+        with open(path, "rb") as file:
+            if not os.fstat(file.fileno()).st_size:
+                return cls(memoryview(b""))
+            handle = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(handle), handle=handle)
+
+    @classmethod
+    def shared(cls, data) -> "Artifact":
+        """Copy the data once into a new shared memory block"""
+        size = len(memoryview(data).cast("B"))
+        block = shared_memory.SharedMemory(create=True, size=max(1, size))
+        block.buf[:size] = memoryview(data).cast("B")
+        return cls(block.buf[:size], shared=block)
+
+    @classmethod
+    def attach(cls, name: str, size: int) -> "Artifact":
+        """Attach to the shared memory block of another process"""
+        block = shared_memory.SharedMemory(name=name)
+        return cls(block.buf[:size], shared=block, owner=False)
+
+    @property
+    def name(self) -> Optional[str]:
+        return self._shared.name if self._shared is not None else None
+
+    @property
+    def released(self) -> bool:
+        return self._view is None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __reduce__(self):
+        if self._shared is not None:
+            return (Artifact.attach, (self._shared.name, self.size))
+        return (Artifact.from_bytes, (self.tobytes(),))
+
+    def view(self) -> memoryview:
+        if self._view is None:
+            raise ValueError("Artifact already released")
+        return self._view
+
+    def tobytes(self) -> bytes:
+        return self.view().tobytes()
+
+    def open(self) -> io.BufferedReader:
+        """File-like reader over the data"""
+        return io.BufferedReader(ArtifactReader(self))
+
+    def release(self) -> None:
+        if self._view is None:
+            return
+        view, self._view = self._view, None
+        try:
+            view.release()
+            if self._handle is not None:
+                self._handle.close()
+            if self._shared is not None:
+                self._shared.close()
+        except BufferError:
+            # A consumer still holds a view, the memory goes with it
+            logging.debug("Artifact still referenced, release deferred")
+        if self._shared is not None and self._owner:
+            self._shared.unlink()
+
+
+class ArtifactReader(io.RawIOBase):
+    def __init__(self, artifact: Artifact):
+        self._view = artifact.view()
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), len(self._view) - self._position)
+        buffer[:count] = self._view[self._position : self._position + count]
+        self._position += count
+        return count
+
+
+def references(value: Any) -> Set[Reference]:
+    """Step outputs referenced by a value (strings, lists and dicts)"""
+    if isinstance(value, str):
+        return set(EXPRESSION.findall(value))
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        return set()
+    found = set()
+    for item in value:
+        found |= references(item)
+    return found
+
+
+def parse_output_file(path: str) -> Dict[str, str]:
+    """
+    Parse the outputs written by a script: `key=value` lines, or
+    `key<<DELIMITER` followed by lines up to DELIMITER for multi-line values.
+    """
+    outputs = {}
+    with open(path) as file:
+        lines = iter(file.read().splitlines())
+    for line in lines:
+        if "<<" in line and ("=" not in line or line.index("<<") < line.index("=")):
+            key, delimiter = line.split("<<", 1)
+            value = []
+            for item in lines:
+                if item == delimiter:
+                    break
+                value.append(item)
+            outputs[key.strip()] = "\n".join(value)
+        elif "=" in line:
+            key, value = line.split("=", 1)
+            outputs[key.strip()] = value
+    return outputs
+
+
+class OutputStore:
+    """
+    Outputs of the steps of a job, addressed as `${{ steps.<id>.outputs.<key> }}`.
+
+    Each referencing step is registered as a consumer of the output; once the
+    last consumer finished the output is dropped and an artifact released.
+    Outputs without consumers live until `clear()`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._consumers: Dict[Reference, int] = {}
+
+    def add_consumer(self, step: str, key: str) -> None:
+        with self.lock:
+            self._consumers[(step, key)] = self._consumers.get((step, key), 0) + 1
+
+    def set(self, step: str, key: str, value: Any) -> None:
+        with self.lock:
+            previous = self._values.setdefault(step, {}).get(key)
+            self._values[step][key] = value
+        if isinstance(previous, Artifact) and previous is not value:
+            previous.release()
+
+    def get(self, step: str, key: str) -> Any:
+        with self.lock:
+            try:
+                return self._values[step][key]
+            except KeyError:
+                raise OutputNotFound(f"Output not found: steps.{step}.outputs.{key}")
+
+    def outputs(self, step: str) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self._values.get(step, {}))
+
+    def resolve(self, value: Any) -> Any:
+        """
+        Replace the expressions of a value. A string made of one expression
+        becomes the output itself (typed), otherwise its text is substituted.
+        """
+        if isinstance(value, str):
+            found = EXPRESSION.fullmatch(value.strip())
+            if found:
+                return self.get(*found.groups())
+            return EXPRESSION.sub(lambda match: str(self.get(*match.groups())), value)
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.resolve(item) for item in value)
+        return value
+
+    def release(self, step: str, key: str) -> None:
+        """A consumer finished, drop the output after the last one"""
+        with self.lock:
+            count = self._consumers.get((step, key), 0) - 1
+            if count > 0:
+                self._consumers[(step, key)] = count
+                return
+            self._consumers.pop((step, key), None)
+            value = self._values.get(step, {}).pop(key, None)
+        if isinstance(value, Artifact):
+            value.release()
+
+    def clear(self) -> None:
+        with self.lock:
+            values, self._values = self._values, {}
+            self._consumers.clear()
+        for outputs in values.values():
+            for value in outputs.values():
+                if isinstance(value, Artifact):
+                    value.release()
@@ -0,0 +1,186 @@
+import grp
+import logging
+import os
+import pwd
+import random
+import stat
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+@dataclass
+class OwnershipStats:
+    scanned: int = 0
+    chowned: int = 0
+    chmoded: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Ownership:
+    """
+    Expected owner and modes, -1/None when a value is left untouched.
+
+    Attributes:
+        uid (int): Owner user id.
+        gid (int): Owner group id.
+        file_mode (int): Permission bits of the files.
+        dir_mode (int): Permission bits of the directories.
+    """
+
+    uid: int = -1
+    gid: int = -1
+    file_mode: Optional[int] = None
+    dir_mode: Optional[int] = None
+
+    @classmethod
+    def parse(
+        cls, owner: str, file_mode: str = None, dir_mode: str = None
+    ) -> "Ownership":
+        """Parse a chown spec (user, user:group, :group, ids) and octal modes"""
+        user, _, group = owner.partition(":")
+        uid = gid = -1
+        if user:
+            uid = int(user) if user.isdigit() else pwd.getpwnam(user).pw_uid
+        if group:
+            gid = int(group) if group.isdigit() else grp.getgrnam(group).gr_gid
+        return cls(
+            uid=uid,
+            gid=gid,
+            file_mode=int(file_mode, 8) if file_mode else None,
+            dir_mode=int(dir_mode, 8) if dir_mode else None,
+        )
+
+    def differs(self, status: os.stat_result) -> Tuple[bool, Optional[int]]:
+        """Return whether the owner differs and the mode to set (None if correct)"""
+        owner = (self.uid != -1 and status.st_uid != self.uid) or (
+            self.gid != -1 and status.st_gid != self.gid
+        )
+        if stat.S_ISLNK(status.st_mode):
+            return owner, None
+        expected = self.dir_mode if stat.S_ISDIR(status.st_mode) else self.file_mode
+        if expected is None or stat.S_IMODE(status.st_mode) == expected:
+            return owner, None
+        return owner, expected
+
+
+def _fix_entry(
+    path: str, status: os.stat_result, ownership: Ownership
+) -> Tuple[int, int]:
+    chown, mode = ownership.differs(status)
+    if chown:
+        os.lchown(path, ownership.uid, ownership.gid)
+    if mode is not None:
+        os.chmod(path, mode)
+    return int(chown), int(mode is not None)
+
+
+def _fix_directory(
+    directory: str, ownership: Ownership
+) -> Tuple[List[str], OwnershipStats]:
+    """Fix the entries of one directory, return its subdirectories"""
+    stats = OwnershipStats()
+    subdirectories = []
+    try:
+        iterator = os.scandir(directory)
+    except OSError as error:
+        logging.warning(f"Cannot scan {directory}: {error}")
+        stats.errors += 1
+        return subdirectories, stats
+
+    with iterator as entries:
+        for entry in entries:
+            stats.scanned += 1
+            try:
+                status = entry.stat(follow_symlinks=False)
+                chowned, chmoded = _fix_entry(entry.path, status, ownership)
+            except OSError as error:
+                logging.warning(f"Cannot fix {entry.path}: {error}")
+                stats.errors += 1
+                continue
+            stats.chowned += chowned
+            stats.chmoded += chmoded
+            if stat.S_ISDIR(status.st_mode):
+                subdirectories.append(entry.path)
+    return subdirectories, stats
+
+
+def fix_ownership(
+    path: str, ownership: Ownership, workers: int = DEFAULT_WORKERS
+) -> OwnershipStats:
+    """
+    Walk the tree in parallel (one os.scandir per directory and task) and
+    lchown/chmod only the entries that differ, unchanged inodes keep their
+    ctime.
+    """
+    start = time.monotonic()
+    stats = OwnershipStats(scanned=1)
+    stats.chowned, stats.chmoded = _fix_entry(
+        path, os.stat(path, follow_symlinks=False), ownership
+    )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {executor.submit(_fix_directory, path, ownership)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirectories, result = future.result()
+                stats.scanned += result.scanned
+                stats.chowned += result.chowned
+                stats.chmoded += result.chmoded
+                stats.errors += result.errors
+                pending.update(
+                    executor.submit(_fix_directory, directory, ownership)
+                    for directory in subdirectories
+                )
+
+    stats.seconds = round(time.monotonic() - start, 3)
+    logging.info(
+        f"Fixed rights of {path}: {stats.chowned} chowned, {stats.chmoded} chmoded "
+        f"out of {stats.scanned} entries in {stats.seconds}s"
+    )
+    return stats
+
+
+def sample_ownership(
+    path: str, ownership: Ownership, size: int = 1000, seed: int = None
+) -> bool:
+    """
+    Check a random sample of at most `size` entries, spread over the tree
+    (a bounded number of entries per directory), without walking it all.
+    """
+    rng = random.Random(seed)
+    per_directory = max(1, size // 10)
+    pending = [path]
+    checked = 0
+
+    while pending and checked < size:
+        directory = pending.pop(rng.randrange(len(pending)))
+        chown, mode = ownership.differs(os.stat(directory, follow_symlinks=False))
+        if chown or mode is not None:
+            return False
+        checked += 1
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            continue
+        rng.shuffle(entries)
+        for entry in entries[:per_directory]:
+            status = entry.stat(follow_symlinks=False)
+            if stat.S_ISDIR(status.st_mode):
+                pending.append(entry.path)
+                continue
+            chown, mode = ownership.differs(status)
+            if chown or mode is not None:
+                return False
+            checked += 1
+    return True
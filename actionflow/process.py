@@ -0,0 +1,154 @@
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Union
+
+from actionflow.streams import LineStream
+
+READ_SIZE = 64 * 1024
+KILL_GRACE_PERIOD = 5.0
+
+
+@dataclass
+class ProcessResult:
+    returncode: int
+    duration: float
+    timed_out: bool = False
+    cancelled: bool = False
+    stdout: List[str] = field(default_factory=list)
+    stderr: List[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.cancelled)
+
+
+class ProcessRunner:
+    """
+    Run a command and stream its output line by line.
+
+    stdout and stderr are read concurrently by two threads, lines are
+    forwarded to the callbacks (logging by default) and only the last
+    `tail_lines` of each are kept. The command runs in its own process group:
+    a timeout or `cancel()` terminates the whole group (SIGTERM, then SIGKILL
+    after a grace period).
+
+    Attributes:
+        command (Union[str, List[str]]): Command, a string runs with the shell.
+        cwd (str): Working directory.
+        env (dict): Extra environment variables.
+        timeout (float): Seconds before the process group is terminated.
+        tail_lines (int): Number of lines kept per stream.
+    """
+
+    def __init__(
+        self,
+        command: Union[str, List[str]],
+        cwd: Optional[str] = None,
+        env: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        on_stdout: Callable[[str], None] = None,
+        on_stderr: Callable[[str], None] = None,
+        tail_lines: int = 200,
+    ):
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.on_stdout = on_stdout or (lambda line: logging.info(line))
+        self.on_stderr = on_stderr or (lambda line: logging.warning(line))
+        self.tail_lines = tail_lines
+        self.process: Optional[subprocess.Popen] = None
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _read(self, pipe, stream: LineStream) -> None:
+        with pipe:
+            while True:
+                data = os.read(pipe.fileno(), READ_SIZE)
+                if not data:
+                    break
+                stream.feed(data)
+        stream.close()
+
+    def _terminate(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        try:
+            self.process.wait(KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+
+    def run(self) -> ProcessResult:
+        start = time.monotonic()
+        env = {**os.environ, **self.env} if self.env else None
+        self.process = subprocess.Popen(
+            self.command,
+            shell=isinstance(self.command, str),
+            cwd=self.cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+        streams = (
+            LineStream(tail_lines=self.tail_lines, on_line=self.on_stdout),
+            LineStream(tail_lines=self.tail_lines, on_line=self.on_stderr),
+        )
+        readers = [
+            threading.Thread(target=self._read, args=(pipe, stream), daemon=True)
+            for pipe, stream in zip((self.process.stdout, self.process.stderr), streams)
+        ]
+        for reader in readers:
+            reader.start()
+
+        timed_out = cancelled = False
+        deadline = start + self.timeout if self.timeout else None
+        try:
+            while self.process.poll() is None:
+                if self._cancel.wait(0.1):
+                    cancelled = True
+                elif deadline and time.monotonic() > deadline:
+                    timed_out = True
+                else:
+                    continue
+                logging.warning(
+                    f"Terminating {self.command!r}: "
+                    f"{'timeout' if timed_out else 'cancelled'}"
+                )
+                self._terminate()
+        except BaseException:
+            # KeyboardInterrupt: do not leave the process group behind
+            self._terminate()
+            raise
+        finally:
+            for reader in readers:
+                reader.join()
+
+        return ProcessResult(
+            returncode=self.process.returncode,
+            duration=time.monotonic() - start,
+            timed_out=timed_out,
+            cancelled=cancelled,
+            stdout=list(streams[0].tail),
+            stderr=list(streams[1].tail),
+        )
+
+
+def run_process(command: Union[str, List[str]], **kwargs) -> ProcessResult:
+    """Run a command with `ProcessRunner`, see its arguments"""
+    return ProcessRunner(command, **kwargs).run()
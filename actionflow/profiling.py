@@ -0,0 +1,279 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from actionflow.logger import NO_CONTEXT, log_context
+from actionflow.settings import settings
+
+PROFILE_MODES = ("deterministic", "sampling")
+# Python >= 3.12: cProfile uses sys.monitoring, one profiler for all threads
+GLOBAL_PROFILER = sys.version_info >= (3, 12)
+
+# Active profiler, None when profiling is disabled
+profiler: Optional["ActionProfiler"] = None
+_lock = threading.Lock()
+
+
+class ActionProfiler:
+    """
+    Profile `Action.run` and aggregate the results per action class.
+
+    - deterministic: cProfile per invocation (wall-clock timer), merged into
+      one pstats per class across all invocations and threads. Where cProfile
+      is process-wide (Python >= 3.12), an action starting while another one
+      is profiled is sampled instead, with a warning
+    - sampling: a background thread samples the stacks of the threads running
+      an action every `interval` seconds, blocked I/O waits show up as the
+      frames they are waiting in
+
+    Attributes:
+        mode (str): deterministic or sampling.
+        all_actions (bool): Profile every action, otherwise only the steps with `profile: true`.
+        interval (float): Sampling interval in seconds.
+    """
+
+    def __init__(
+        self,
+        mode: str = "deterministic",
+        all_actions: bool = True,
+        interval: float = 0.005,
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.all_actions = all_actions
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._samples: Dict[str, Counter] = defaultdict(Counter)
+        self._calls: Counter = Counter()
+        self._threads: Dict[int, str] = {}
+        self._sampler: threading.Thread = None
+        self._stop = threading.Event()
+        # Key of the running cProfile and keys whose profile saw other threads
+        self._active: Optional[str] = None
+        self._mixed: set = set()
+        self._warned = False
+
+    def wants(self, action) -> bool:
+        return self.all_actions or getattr(action, "profile", False)
+
+    @contextmanager
+    def profile(self, action):
+        key = action.__class__.__name__
+        with self._lock:
+            self._calls[key] += 1
+
+        if self.mode == "sampling":
+            with self._sampling(key):
+                yield
+            return
+
+        profile = self._start_cprofile(key)
+        if profile is None:
+            with self._sampling(key):
+                yield
+            return
+
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._active = None
+                if key in self._stats:
+                    self._stats[key].add(profile)
+                else:
+                    self._stats[key] = pstats.Stats(profile)
+
+    def _start_cprofile(self, key: str) -> Optional[cProfile.Profile]:
+        """Enable a cProfile, None when the action has to be sampled"""
+        with self._lock:
+            if GLOBAL_PROFILER and self._active is not None:
+                # The running profile records the calls of this thread too
+                self._mixed.add(self._active)
+                self._warn(f"{self._active} already profiled")
+                return None
+            if GLOBAL_PROFILER and self._threads:
+                # Would record the calls of the actions being sampled
+                self._warn("concurrent actions are sampled")
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as error:
+                # Another profiling tool (coverage, debugger) is active
+                self._warn(str(error))
+                return None
+            if GLOBAL_PROFILER:
+                self._active = key
+            return profile
+
+    def _warn(self, reason: str) -> None:
+        if not self._warned:
+            self._warned = True
+            logging.warning(
+                f"[Profiler] Concurrent actions cannot all use cProfile ({reason}), "
+                "sampling them instead"
+            )
+
+    @contextmanager
+    def _sampling(self, key: str):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = key
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample_loop, name="ActionProfiler", daemon=True
+                )
+                self._sampler.start()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.pop(thread_id, None)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads.items())
+            if not threads:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, key in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                if stack:
+                    self._samples[key][tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sampling_report(self, key: str, top: int) -> str:
+        samples = self._samples[key]
+        total = sum(samples.values())
+        inclusive, exclusive = Counter(), Counter()
+        for stack, count in samples.items():
+            exclusive[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+
+        lines = [f"{total} samples ({total * self.interval:.3f}s wall-clock)"]
+        lines.append(f"{'self':>8} {'total':>8}  function")
+        for frame, count in inclusive.most_common(top):
+            lines.append(
+                f"{exclusive[frame] / total:8.1%} {count / total:8.1%}  {frame}"
+            )
+        return "\n".join(lines)
+
+    def write_report(self, directory: str, top: int = 20) -> str:
+        """
+        Write one pstats (deterministic) or collapsed stacks (sampling) file per
+        action class and a top-N text report, return the report path.
+        """
+        self.stop()
+        os.makedirs(directory, exist_ok=True)
+        report = io.StringIO()
+
+        for key in sorted(self._calls):
+            report.write(f"{'=' * 20} {key} ({self._calls[key]} calls) {'=' * 20}\n")
+
+            stats = self._stats.get(key)
+            samples = self._samples.get(key)
+            if stats is None and not samples:
+                report.write(
+                    "No samples\n\n" if self.mode == "sampling" else "No profile\n\n"
+                )
+                continue
+
+            if stats is not None:
+                if key in self._mixed:
+                    report.write("Includes calls of concurrent actions\n")
+                stats.dump_stats(os.path.join(directory, f"{key}.pstats"))
+                stats.stream = report
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+            if samples:
+                with open(os.path.join(directory, f"{key}.folded"), "w") as file:
+                    for stack, count in samples.items():
+                        file.write(f"{';'.join(stack)} {count}\n")
+                report.write(self._sampling_report(key, top) + "\n\n")
+
+        filepath = os.path.join(directory, "report.txt")
+        with open(filepath, "w") as file:
+            file.write(report.getvalue())
+        logging.info(f"[Profiler] Report written to {filepath}")
+        return filepath
+
+
+def start_profiling(
+    mode: str = "deterministic", all_actions: bool = True
+) -> ActionProfiler:
+    global profiler
+    with _lock:
+        if profiler is None:
+            profiler = ActionProfiler(mode=mode, all_actions=all_actions)
+    return profiler
+
+
+def stop_profiling() -> Optional[ActionProfiler]:
+    global profiler
+    with _lock:
+        current, profiler = profiler, None
+    if current is not None:
+        current.stop()
+    return current
+
+
+def step_directory() -> str:
+    """Report directory of a step profiled without a running profiler"""
+    context = log_context.get()
+    return settings.get_path(
+        "profiles",
+        context.get("run_id") or NO_CONTEXT,
+        context.get("step") or NO_CONTEXT,
+    )
+
+
+@contextmanager
+def profiled(action):
+    """
+    Profile the action if profiling is enabled for it. Without a running
+    profiler, a step with `profile: true` is profiled on its own and its report
+    is written when the step finishes.
+    """
+    current = profiler
+    if current is None:
+        if not getattr(action, "profile", False):
+            yield
+            return
+        scoped = ActionProfiler(all_actions=False)
+        try:
+            with scoped.profile(action):
+                yield
+        finally:
+            scoped.write_report(step_directory())
+        return
+
+    if not current.wants(action):
+        yield
+        return
+
+    with current.profile(action):
+        yield
@@ -4,6 +4,7 @@ import time
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
 from actionflow.core import Flow
+from actionflow.metrics import registry
 
 logs = []
 
@@ -64,6 +65,11 @@ class RequestHandler(BaseHTTPRequestHandler):
             # Return the current status
             status = {"status": "running", "uptime": time.ctime()}
             self._send_response(json.dumps(status))
+        elif self.path == "/metrics":
+            # Prometheus text exposition format
+            self._send_response(
+                registry.render(), content_type="text/plain; version=0.0.4"
+            )
         else:
             self.send_response(404)
             self.end_headers()
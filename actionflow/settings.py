@@ -23,6 +23,10 @@ class Settings(BaseSettings):
     _logname: str = "main.log"
 
     debug: bool = False
+    log_json: bool = False
+    log_per_run: bool = False
+    log_queue_size: int = 10000
+    log_overflow: str = "block"
     env: Environment = Environment()
 
     @property
@@ -33,6 +37,10 @@ class Settings(BaseSettings):
     def logfile(self):
         return os.path.join(self._path, self._logname)
 
+    @property
+    def runs_logdir(self):
+        return os.path.join(self._path, "runs")
+
     def get_path(self, *args):
         return os.path.join(self._path, *args)
 
@@ -0,0 +1,118 @@
+import codecs
+import re
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+DEFAULT_TAIL_LINES = 200
+DEFAULT_MAX_LINE = 64 * 1024
+
+
+class LineMatcher:
+    """
+    Turn the lines matching a regex into structured events.
+
+    The named groups of the pattern become the event fields, digits are
+    converted to int.
+    """
+
+    def __init__(self, name: str, pattern: str):
+        self.name = name
+        self.pattern = re.compile(pattern)
+
+    def match(self, line: str) -> Optional[dict]:
+        found = self.pattern.search(line)
+        if not found:
+            return None
+        event = {"event": self.name}
+        for key, value in found.groupdict().items():
+            event[key] = int(value) if value and value.isdigit() else value
+        return event
+
+
+# INFO source odoo.modules.loading: Loading module account_taxcloud (65/66)
+MODULE_LOADING = LineMatcher(
+    "module", r": Loading module (?P<name>\w+) \((?P<index>\d+)/(?P<total>\d+)\)"
+)
+
+
+class LineStream:
+    """
+    Incremental line splitter for a byte stream (exec or log output).
+
+    Multi-byte UTF-8 sequences split across chunks are decoded correctly,
+    CRLF and lone CR (tty progress bars) end a line, and a line longer than
+    `max_line` is cut. Only the last `tail_lines` lines are kept: memory does
+    not grow with the output size.
+
+    Attributes:
+        tail_lines (int): Number of lines kept for error reporting.
+        matchers (List[LineMatcher]): Matchers emitting progress events.
+        on_line (Callable): Called with every complete line.
+        on_event (Callable): Called with every event.
+    """
+
+    def __init__(
+        self,
+        tail_lines: int = DEFAULT_TAIL_LINES,
+        matchers: Iterable[LineMatcher] = (),
+        on_line: Callable[[str], None] = None,
+        on_event: Callable[[dict], None] = None,
+        max_line: int = DEFAULT_MAX_LINE,
+        encoding: str = "utf-8",
+    ):
+        self.tail = deque(maxlen=tail_lines)
+        self.matchers: List[LineMatcher] = list(matchers)
+        self.on_line = on_line
+        self.on_event = on_event
+        self.max_line = max_line
+        self.lines = 0
+        self.bytes = 0
+        self.last_event: Optional[dict] = None
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._pending = ""
+
+    def feed(self, chunk) -> None:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        self.bytes += len(chunk)
+        self._split(self._decoder.decode(chunk))
+
+    def close(self) -> None:
+        """Flush the incomplete last line"""
+        self._split(self._decoder.decode(b"", final=True))
+        pending, self._pending = self._pending.rstrip("\r"), ""
+        if pending:
+            self._emit(pending)
+
+    def _split(self, text: str) -> None:
+        if not text:
+            return
+        data = self._pending + text
+        # A trailing CR may be the first half of a CRLF
+        keep_cr = data.endswith("\r")
+        if keep_cr:
+            data = data[:-1]
+        *lines, pending = data.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+        for line in lines:
+            self._emit(line)
+
+        while len(pending) > self.max_line:
+            self._emit(pending[: self.max_line])
+            pending = pending[self.max_line :]
+        self._pending = pending + ("\r" if keep_cr else "")
+
+    def _emit(self, line: str) -> None:
+        self.lines += 1
+        self.tail.append(line)
+        if self.on_line is not None:
+            self.on_line(line)
+        for matcher in self.matchers:
+            event = matcher.match(line)
+            if event is not None:
+                self.last_event = event
+                if self.on_event is not None:
+                    self.on_event(event)
+
+    def tail_text(self) -> str:
+        return "\n".join(self.tail)
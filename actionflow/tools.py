@@ -1,11 +1,12 @@
 import configparser
+import io
 import logging
 import os
 import random
 import re
 import string
-import subprocess
 import sys
+import threading
 from datetime import datetime
 from functools import wraps
 from io import StringIO
@@ -16,18 +17,25 @@ import yaml
 from pydantic import BaseModel
 
 try:
-    from git import InvalidGitRepositoryError, Repo
+    from git import Git, InvalidGitRepositoryError, Repo
 except ImportError:
+    Git = None
     Repo = None
 
+try:
+    import docker as docker
+except ImportError:
+    docker = None
 
-from actionflow.settings import Environment, settings
 
-PID_FILE = "/tmp/actionflow.pid"
+from actionflow.process import run_process
+from actionflow.settings import Environment
 
+PID_FILE = "/tmp/actionflow.pid"
+DOCKER_POOL_SIZE = 16
 
-def tail_logs() -> None:
-    subprocess.run(["tail", "-f", settings.logfile])
+_docker_client = None
+_docker_client_lock = threading.Lock()
 
 
 class SingletonMeta(type):
@@ -56,6 +64,11 @@ def random_string(length):
     )
 
 
+def new_run_id() -> str:
+    """Sortable unique identifier for a flow execution"""
+    return f"{datetime.now():%Y%m%d%H%M%S}-{random_string(6)}"
+
+
 # def effective_access(*args, **kwargs):
 #     if "effective_ids" not in kwargs:
 #         try:
@@ -86,6 +99,25 @@ def random_string(length):
 # PID_DIR = determine_pid_directory()
 
 
+def get_docker_client():
+    """
+    Return the shared Docker client, created on first use.
+
+    Importing the actions no longer needs a reachable daemon; the client
+    (and its connection pool) is shared by all the threads.
+    """
+    global _docker_client
+
+    if docker is None:
+        raise ImportError("Docker SDK not found")
+
+    if _docker_client is None:
+        with _docker_client_lock:
+            if _docker_client is None:
+                _docker_client = docker.from_env(max_pool_size=DOCKER_POOL_SIZE)
+    return _docker_client
+
+
 def create_pidfile() -> None:
     if os.path.exists(PID_FILE):
         print(f"The programme is already running : {PID_FILE}")
@@ -179,17 +211,15 @@ def sync_directories(source: str, target: str) -> bool:
         target += "/"
 
     command = ["rsync", "-av", "--no-times", source, target]
-    result = subprocess.run(
-        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    result = run_process(
+        command, on_stdout=logging.debug, on_stderr=logging.error, tail_lines=0
     )
 
-    if result.returncode == 0:
+    if result.success:
         logging.info(f"Synced {source} to {target} successfully.")
-        logging.debug(result.stdout)
         return True
 
-    logging.error(f"Error syncing {source} to {target}:")
-    logging.error(result.stderr)
+    logging.error(f"Error syncing {source} to {target}: exit {result.returncode}")
     return False
 
 
@@ -212,23 +242,24 @@ def get_directory_size(path: str) -> int:
     return total_size
 
 
-def run_command(command: list[str]) -> bool:
+def run_command(command: list[str], timeout: float = None) -> bool:
     """
     Executes a command in a subprocess and returns whether it was successful.
 
+    Output is streamed line by line to the log (stdout at debug level, stderr
+    at warning level) instead of being buffered until exit.
+
     Args:
         command (list[str]): The command to run as a list of strings.
+        timeout (float, optional): Seconds before the command is terminated.
 
     Returns:
         bool: True if the command executed successfully (return code 0), False otherwise.
     """
-    result = subprocess.run(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
+    result = run_process(
+        command, timeout=timeout, on_stdout=logging.debug, tail_lines=0
     )
-    return result.returncode == 0
+    return result.success
 
 
 def render_template(raw: str, **kwargs) -> str:
@@ -302,6 +333,86 @@ def get_local_repository(path: str, remote_name: str = "origin") -> tuple:
     return branch, remote
 
 
+def find_git_dir(path: str) -> str:
+    """Return the git directory of a work tree (.git directory or gitdir file)"""
+    git_path = os.path.join(path, ".git")
+    if os.path.isdir(git_path):
+        return git_path
+    with open(git_path, "r") as file:
+        content = file.read().strip()
+    if not content.startswith("gitdir:"):
+        raise FileNotFoundError(f"Not a git work tree: {path}")
+    return os.path.normpath(os.path.join(path, content[len("gitdir:") :].strip()))
+
+
+def read_git_head(path: str) -> Tuple[str, str]:
+    """
+    Read the current branch and commit of a work tree from `.git/HEAD` and
+    the refs, without spawning git.
+
+    Returns:
+        Tuple[str, str]: Branch (None when detached) and commit sha (None for
+            an unborn branch).
+    """
+    git_dir = find_git_dir(path)
+    with open(os.path.join(git_dir, "HEAD"), "r") as file:
+        head = file.read().strip()
+
+    if not head.startswith("ref:"):
+        return None, head
+
+    ref = head[len("ref:") :].strip()
+    branch = ref[len("refs/heads/") :] if ref.startswith("refs/heads/") else ref
+
+    # Linked work trees keep their refs in the common directory
+    common_dir = git_dir
+    if os.path.exists(os.path.join(git_dir, "commondir")):
+        with open(os.path.join(git_dir, "commondir"), "r") as file:
+            common_dir = os.path.normpath(os.path.join(git_dir, file.read().strip()))
+
+    try:
+        with open(os.path.join(common_dir, ref), "r") as file:
+            return branch, file.read().strip()
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "r") as file:
+            for line in file:
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.strip().partition(" ")
+                if name == ref:
+                    return branch, sha
+    except FileNotFoundError:
+        pass
+    return branch, None
+
+
+def read_git_remote(path: str, remote_name: str = "origin") -> str:
+    """Read the URL of a remote from the git config, without spawning git"""
+    git_dir = find_git_dir(path)
+    config_path = os.path.join(git_dir, "config")
+    if not os.path.exists(config_path) and os.path.exists(
+        os.path.join(git_dir, "commondir")
+    ):
+        with open(os.path.join(git_dir, "commondir"), "r") as file:
+            config_path = os.path.join(git_dir, file.read().strip(), "config")
+
+    section = f'[remote "{remote_name}"]'
+    current = None
+    with open(config_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("["):
+                current = line
+            elif current == section and line.startswith("url"):
+                key, _, value = line.partition("=")
+                if key.strip() == "url":
+                    return value.strip()
+    return None
+
+
 def convert_schema_to_ini(
     schema: BaseModel, filepath: str, section_name: str = "options"
 ) -> str:
@@ -344,3 +455,58 @@ def chunk_generator(
         logging.debug(f"Read chunk at position {position}, size: {len(chunk_data)}")
         yield position, chunk_data
         position += len(chunk_data)
+
+
+class FileSlice(io.RawIOBase):
+    """
+    Read-only, seekable window of `length` bytes at `offset` in a file.
+
+    Reads use os.pread on a shared descriptor, so several slices of the same
+    file can be read concurrently without loading a whole part in memory.
+    """
+
+    def __init__(self, fd: int, offset: int, length: int):
+        super().__init__()
+        self.fd = fd
+        self.offset = offset
+        self.length = length
+        self.position = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self.position = min(max(offset, 0), self.length)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.length - self.position)
+        if size <= 0:
+            return 0
+        data = os.pread(self.fd, size, self.offset + self.position)
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.length - self.position
+        size = min(size, self.length - self.position)
+        if size <= 0:
+            return b""
+        data = os.pread(self.fd, size, self.offset + self.position)
+        self.position += len(data)
+        return data
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+# Active tracer, None when tracing is disabled (the state hooks only test it)
+tracer: Optional["Tracer"] = None
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "kind",
+        "span_id",
+        "parent_id",
+        "thread_id",
+        "thread_name",
+        "start_ns",
+        "end_ns",
+        "state",
+        "attributes",
+    )
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"]):
+        thread = threading.current_thread()
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.state = "running"
+        self.attributes = {}
+
+
+class Tracer:
+    """
+    Collect one span per flow, job, group and action execution.
+
+    Spans are opened and closed by the `StateModel` running state hooks, the
+    parent of a span is the span current in the caller context (propagated
+    to the group worker threads).
+    """
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+    def start(self, model) -> Span:
+        name = getattr(model, "name", None)
+        kind = model._kind
+        span = Span(f"{kind}: {name}" if name else kind, kind, _current_span.get())
+        step_id = getattr(model, "id", None)
+        if step_id:
+            span.attributes["id"] = step_id
+        self.spans.append(span)
+        model._span = span
+        model._span_token = _current_span.set(span)
+        return span
+
+    def end(self, model) -> None:
+        span = getattr(model, "_span", None)
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        try:
+            _current_span.reset(model._span_token)
+        except ValueError:
+            # Transition fired from another context
+            pass
+
+    def finish(self, model, state: str) -> None:
+        span = getattr(model, "_span", None)
+        if span is None:
+            return
+        span.state = state
+        attempts = getattr(model, "_attempts", None)
+        if attempts:
+            span.attributes["retries"] = attempts - 1
+
+    def _closed_spans(self) -> List[Span]:
+        now = time.time_ns()
+        for span in self.spans:
+            if span.end_ns is None:
+                span.end_ns = now
+        return list(self.spans)
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event format (chrome://tracing, Perfetto)"""
+        spans = self._closed_spans()
+        origin = min((span.start_ns for span in spans), default=0)
+        pid = os.getpid()
+
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in {(s.thread_id, s.thread_name) for s in spans}
+        ]
+        events.extend(
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": (span.start_ns - origin) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {"state": span.state, **span.attributes},
+            }
+            for span in spans
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp(self) -> dict:
+        """OTLP/JSON export (ExportTraceServiceRequest)"""
+
+        def attribute(key, value):
+            # int64 values are encoded as strings in OTLP/JSON
+            kind = "intValue" if isinstance(value, int) else "stringValue"
+            return {"key": key, "value": {kind: str(value)}}
+
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    attribute("actionflow.kind", span.kind),
+                    attribute("actionflow.state", span.state),
+                    attribute("thread.id", span.thread_id),
+                    attribute("thread.name", span.thread_name),
+                    *(
+                        attribute(f"actionflow.{key}", value)
+                        for key, value in span.attributes.items()
+                    ),
+                ],
+                "status": {"code": 2 if span.state == "failure" else 1},
+            }
+            for span in self._closed_spans()
+        ]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [attribute("service.name", "actionflow")]
+                    },
+                    "scopeSpans": [{"scope": {"name": "actionflow"}, "spans": spans}],
+                }
+            ]
+        }
+
+    def export(self, filepath: str, fmt: str = "chrome") -> None:
+        data = self.to_otlp() if fmt == "otlp" else self.to_chrome()
+        with open(filepath, "w") as file:
+            json.dump(data, file)
+
+
+def start_tracing() -> Tracer:
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    global tracer
+    current, tracer = tracer, None
+    return current
@@ -0,0 +1,147 @@
+import atexit
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import List, Optional
+
+from actionflow.context import Workspace
+from actionflow.sync import DEFAULT_WORKERS, scan, sync_tree
+
+SEED_MODES = ("reflink", "hardlink")
+TRASH_DIR = ".actionflow-trash"
+
+_managers: dict = {}
+_managers_lock = threading.Lock()
+
+
+def hardlink_tree(source: str, target: str) -> int:
+    """
+    Recreate the directories of source in target and hard link its files
+    (symlinks are copied). Files are shared with the source: only suited to
+    fixtures that are not modified in place.
+
+    Returns:
+        int: Number of files linked.
+    """
+    files, directories = scan(source)
+    os.makedirs(target, exist_ok=True)
+    for path in sorted(directories):
+        os.makedirs(os.path.join(target, path), exist_ok=True)
+    for path in files:
+        source_path = os.path.join(source, path)
+        target_path = os.path.join(target, path)
+        if os.path.islink(source_path):
+            os.symlink(os.readlink(source_path), target_path)
+        else:
+            os.link(source_path, target_path)
+    return len(files)
+
+
+class WorkspaceManager:
+    """
+    Give each run its own workspace directory under a root.
+
+    A new workspace is seeded from the template directory, if any: reflinked
+    file by file (full copies only where the filesystem cannot clone) or hard
+    linked. A released workspace is renamed into the trash directory of the
+    root, then removed by a background thread; the deletions still running
+    are waited for when the process exits.
+
+    Attributes:
+        root (str): Directory of the run workspaces.
+        template (str): Directory copied into every new workspace.
+        seed (str): Seeding mode, reflink or hardlink.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        template: Optional[str] = None,
+        seed: str = "reflink",
+        workers: int = DEFAULT_WORKERS,
+    ):
+        if seed not in SEED_MODES:
+            raise ValueError(f"Unknown seed mode: {seed} (expected {SEED_MODES})")
+        self.root = os.path.abspath(root)
+        self.template = template
+        self.seed = seed
+        self.workers = workers
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._warned = False
+
+        # Leftovers of runs interrupted during their cleanup
+        trash = os.path.join(self.root, TRASH_DIR)
+        if os.path.isdir(trash):
+            for name in os.listdir(trash):
+                self._remove_later(os.path.join(trash, name))
+
+    def create(self, name: str) -> Workspace:
+        path = os.path.join(self.root, name)
+        if os.path.exists(path):
+            raise FileExistsError(f"Workspace already exists: {path}")
+        if self.template:
+            logging.info(f"Seeding workspace {path} from {self.template} ({self.seed})")
+            if self.seed == "hardlink":
+                hardlink_tree(self.template, path)
+            else:
+                stats = sync_tree(self.template, path, workers=self.workers)
+                if stats.bytes and not stats.cloned and not self._warned:
+                    self._warned = True
+                    logging.warning(
+                        f"Cannot reflink {self.template} into {self.root}: "
+                        "workspaces are full copies of the template "
+                        "(seed: hardlink to link read-only fixtures)"
+                    )
+        return Workspace(path=path, manager=self)
+
+    def release(self, workspace: Workspace) -> None:
+        """Move the workspace out of the way and delete it in the background"""
+        if not os.path.exists(workspace.path):
+            return
+        trash = os.path.join(self.root, TRASH_DIR)
+        os.makedirs(trash, exist_ok=True)
+        target = os.path.join(
+            trash, f"{os.path.basename(workspace.path)}-{uuid.uuid4().hex[:8]}"
+        )
+        os.rename(workspace.path, target)
+        self._remove_later(target)
+
+    def _remove_later(self, path: str) -> None:
+        thread = threading.Thread(
+            target=shutil.rmtree, args=(path,), kwargs={"ignore_errors": True}
+        )
+        thread.daemon = True
+        thread.start()
+        with self._lock:
+            self._threads = [item for item in self._threads if item.is_alive()]
+            self._threads.append(thread)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the background deletions"""
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+
+
+def get_workspace_manager(
+    root: str, template: Optional[str] = None, seed: str = "reflink"
+) -> WorkspaceManager:
+    """Manager of a workspace root, shared by the runs of the process"""
+    key = (os.path.abspath(root), template, seed)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = WorkspaceManager(root, template=template, seed=seed)
+        return _managers[key]
+
+
+@atexit.register
+def wait_workspace_managers() -> None:
+    """Finish the background deletions before the process exits"""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.wait()
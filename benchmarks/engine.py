@@ -0,0 +1,209 @@
+"""
+Engine overhead benchmarks.
+
+Generate synthetic flows of no-op actions and measure the cost of the
+framework itself: YAML load, step preprocessing, pydantic validation,
+the whole parse (Flow.from_string), plan construction, dispatch overhead
+per step and peak memory.
+
+Usage:
+    python -m benchmarks.engine --sizes 10 1000 100000 --widths 1 8
+    python -m benchmarks.engine --save benchmarks/baseline.json
+    python -m benchmarks.engine --compare benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import copy
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import actionflow.actions.examples  # noqa: F401 (register the no-op actions)
+from actionflow.core import Flow
+from actionflow.jobs import Job
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_WIDTHS = [1, 8, 64]
+METRICS = (
+    "yaml_load",
+    "preprocess",
+    "validation",
+    "parse",
+    "plan",
+    "dispatch_per_step",
+    "peak_memory",
+)
+
+
+def generate_flow(steps: int, width: int, jobs: int = 1) -> str:
+    """
+    Build a flow of `steps` no-op actions split in `jobs` jobs.
+
+    Groups of `width` concurrent `example-blocking` steps are separated by a
+    sequential `example` step (width 1: every step is its own group).
+    """
+    lines = [
+        "name: benchmark",
+        "context:",
+        f"  workspace: {tempfile.gettempdir()}/actionflow-benchmark",
+        "  keep-workspace: false",
+        "jobs:",
+    ]
+    per_job = max(1, steps // jobs)
+    for job in range(jobs):
+        lines.append(f"  job{job}:")
+        lines.append("    steps:")
+        for index in range(per_job):
+            if width > 1 and index % (width + 1) != width:
+                lines.append("      - name: example-blocking")
+                lines.append("        with:")
+                lines.append("          time: 0")
+            else:
+                lines.append("      - name: example")
+                lines.append("        with:")
+                lines.append("          sleep: 0")
+                lines.append("          concurrency: false")
+    return "\n".join(lines) + "\n"
+
+
+def _best(function: Callable, repeat: int, setup: Callable = None) -> float:
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench(steps: int, width: int, repeat: int = 3) -> Dict[str, float]:
+    raw = generate_flow(steps, width)
+    context = Flow.model_fields["context"].annotation
+
+    def load():
+        return (Flow.load(raw, context),)
+
+    def jobs():
+        # preprocess_data pops the step keys, each run gets its own copy
+        return (copy.deepcopy(Flow.load(raw, context)["jobs"]),)
+
+    def preprocess(data):
+        for job in data:
+            Job.preprocess_data(job)
+
+    def build():
+        return (Flow.from_string(raw),)
+
+    def plan(flow):
+        for job in flow.jobs:
+            list(job.next_group())
+
+    results = {
+        "yaml_load": _best(lambda: Flow.load(raw, context), repeat),
+        "preprocess": _best(preprocess, repeat, setup=jobs),
+        "validation": _best(Flow.model_validate, repeat, setup=load),
+        "parse": _best(lambda: Flow.from_string(raw), repeat),
+        "plan": _best(plan, repeat, setup=build),
+        "dispatch_per_step": _best(lambda flow: flow.execute(), repeat, setup=build)
+        / steps,
+    }
+
+    tracemalloc.start()
+    Flow.from_string(raw).execute()
+    results["peak_memory"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return results
+
+
+def run(sizes: List[int], widths: List[int], repeat: int) -> dict:
+    results = {}
+    for steps in sizes:
+        for width in widths:
+            key = f"steps={steps},width={width}"
+            results[key] = bench(steps, width, repeat)
+            print(format_row(key, results[key]), flush=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def format_row(key: str, values: Dict[str, float]) -> str:
+    return (
+        f"{key:<24} load {values['yaml_load'] * 1000:9.2f}ms"
+        f"  preprocess {values['preprocess'] * 1000:9.2f}ms"
+        f"  validate {values['validation'] * 1000:9.2f}ms"
+        f"  parse {values['parse'] * 1000:9.2f}ms"
+        f"  plan {values['plan'] * 1000:9.2f}ms"
+        f"  dispatch {values['dispatch_per_step'] * 1e6:8.1f}us/step"
+        f"  peak {values['peak_memory'] / 1024 / 1024:8.2f}MiB"
+    )
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Return the metrics slower (or bigger) than baseline by more than threshold"""
+    regressions = []
+    for key, values in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            continue
+        for metric in METRICS:
+            if not reference.get(metric):
+                continue
+            ratio = values[metric] / reference[metric]
+            flag = "REGRESSION" if ratio > 1 + threshold else ""
+            print(f"{key:<24} {metric:<18} {ratio:6.2f}x {flag}")
+            if flag:
+                regressions.append(f"{key} {metric} {ratio:.2f}x")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ActionFlow engine benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--widths", type=int, nargs="+", default=DEFAULT_WIDTHS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", metavar="PATH", help="Write the results as baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown ratio before reporting a regression",
+    )
+    args = parser.parse_args()
+
+    # Keep the log records out of the measurements
+    logging.disable(logging.WARNING)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    current = run(args.sizes, args.widths, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(current, file, indent=2)
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from actionflow.actions.upload import UploadLocal
+from actionflow.archive import ArchiveStream
+from actionflow.net import MIN_PART_SIZE, upload_stream_to_s3
+
+from tests.test_s3 import FakeS3
+
+
+class TestArchiveStream(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "filestore")
+        os.makedirs(os.path.join(self.source, "sub"))
+        self.files = {
+            "a.txt": b"alpha " * 10000,
+            "sub/b.bin": os.urandom(100 * 1024),
+        }
+        for name, content in self.files.items():
+            with open(os.path.join(self.source, name), "wb") as file:
+                file.write(content)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assertArchive(self, data, mode="r:*"):
+        with tarfile.open(fileobj=io.BytesIO(data), mode=mode) as tar:
+            for name, content in self.files.items():
+                member = tar.extractfile(f"filestore/{name}")
+                self.assertEqual(member.read(), content)
+
+    def test_gzip(self):
+        with ArchiveStream(self.source, "gzip") as stream:
+            data = stream.read()
+            stats = stream.stats()
+        self.assertEqual(data[:2], b"\x1f\x8b")
+        self.assertArchive(data, "r:gz")
+        self.assertEqual(stats["compressed_bytes"], len(data))
+        self.assertGreater(stats["ratio"], 1)
+
+    def test_tar(self):
+        with ArchiveStream(self.source, "tar") as stream:
+            data = stream.read()
+        self.assertArchive(data, "r:")
+        self.assertEqual(stream.stats()["raw_bytes"], len(data))
+
+    def test_missing_source(self):
+        with ArchiveStream(os.path.join(self.tmpdir.name, "missing"), "gzip") as stream:
+            with self.assertRaises(IOError):
+                stream.read()
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            ArchiveStream(self.source, "rar")
+
+    def test_upload_local(self):
+        destination = os.path.join(self.tmpdir.name, "out", "backup.tar.gz")
+        action = UploadLocal(
+            source=self.source, destination=destination, archive="gzip"
+        )
+        self.assertTrue(action._run())
+        with open(destination, "rb") as file:
+            self.assertArchive(file.read(), "r:gz")
+        self.assertFalse(os.path.exists(f"{destination}.part"))
+
+    def test_upload_stream_s3(self):
+        with open(os.path.join(self.source, "big.bin"), "wb") as file:
+            file.write(os.urandom(MIN_PART_SIZE + 1000))
+
+        client = FakeS3()
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            with ArchiveStream(self.source, "tar") as stream:
+                size = upload_stream_to_s3(
+                    "bucket", stream, "backup.tar", "a", "s", "e", MIN_PART_SIZE, 2
+                )
+        data = client.objects[("bucket", "backup.tar")]
+        self.assertEqual(size, len(data))
+        self.assertTrue(client.etags[("bucket", "backup.tar")].endswith('-2"'))
+        self.assertArchive(data, "r:")
+
+
+if __name__ == "__main__":
+    unittest.main()
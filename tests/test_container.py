@@ -0,0 +1,171 @@
+import subprocess
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from actionflow.actions.container import ContainerAction
+
+
+class FakeAPI:
+    """Low-level exec API running the commands with the local shell"""
+
+    def __init__(self):
+        self.execs = {}
+        self.sessions = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def exec_create(self, container_id, command, tty=False, **kwargs):
+        exec_id = f"exec-{len(self.execs)}"
+        self.execs[exec_id] = {
+            "command": command,
+            "container": container_id,
+            "tty": tty,
+        }
+        return {"Id": exec_id}
+
+    def exec_start(self, exec_id, stream=False, tty=False):
+        # docker-py demultiplexes the output unless told the session has a TTY
+        if tty != self.execs[exec_id]["tty"]:
+            raise AssertionError(f"exec_start tty={tty} for a tty={not tty} exec")
+        return self._output(exec_id, tty)
+
+    def _output(self, exec_id, tty):
+        with self._lock:
+            self.sessions += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05)
+            command = self.execs[exec_id]["command"]
+            result = subprocess.run(
+                command, shell=isinstance(command, str), capture_output=True
+            )
+            self.execs[exec_id]["exit_code"] = result.returncode
+            output = result.stdout + result.stderr
+            if tty:
+                output = output.replace(b"\n", b"\r\n")
+            # Chunks not aligned on lines
+            for index in range(0, len(output), 7):
+                yield output[index : index + 7]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.execs[exec_id]["exit_code"]}
+
+
+class FakeClient:
+    def __init__(self):
+        self.api = FakeAPI()
+        self.containers = self
+
+    def get(self, name):
+        return SimpleNamespace(id=name, name=name, client=self)
+
+
+class TestContainerAction(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        patcher = patch(
+            "actionflow.actions.container.get_docker_client", return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def action(self, **kwargs):
+        return ContainerAction(workdir="/tmp", **kwargs)
+
+    def test_batch_single_session(self):
+        action = self.action(
+            container="odoo", commands=["echo one", "printf two", "true"], batch=True
+        )
+        self.assertTrue(action._run())
+        self.assertEqual(self.client.api.sessions, 1)
+        results = action.shared_resources.get_resource("container_results")
+        self.assertEqual(
+            [result["exit_code"] for result in results["odoo"]["results"]], [0, 0, 0]
+        )
+
+    def test_batch_stops_on_failure(self):
+        action = self.action(
+            container="odoo",
+            commands=["echo one", "exit 3", "echo never"],
+            batch=True,
+        )
+        self.assertFalse(action._run())
+        results = action.shared_resources.get_resource("container_results")
+        self.assertEqual(
+            results["odoo"]["results"],
+            [
+                {"command": "echo one", "exit_code": 0},
+                {"command": "exit 3", "exit_code": 3},
+            ],
+        )
+
+    def test_batch_output_lines(self):
+        action = self.action(
+            container="odoo",
+            commands=["printf 'a\\n\\nb\\n'", "printf c", "echo d"],
+            batch=True,
+        )
+        with self.assertLogs(level="INFO") as logs:
+            self.assertTrue(action._run())
+        lines = [
+            record.getMessage()[len("[odoo] ") :]
+            for record in logs.records
+            if record.getMessage().startswith("[odoo] ")
+        ]
+        # Blank output lines are kept, the marker separators are not logged
+        self.assertEqual(lines, ["a", "", "b", "c", "d"])
+
+    def test_batch_tty(self):
+        action = self.action(
+            container="odoo",
+            commands=["echo one", "exit 2", "echo never"],
+            batch=True,
+            tty=True,
+        )
+        self.assertFalse(action._run())
+        self.assertEqual(self.client.api.sessions, 1)
+        results = action.shared_resources.get_resource("container_results")
+        self.assertEqual(
+            results["odoo"]["results"],
+            [
+                {"command": "echo one", "exit_code": 0},
+                {"command": "exit 2", "exit_code": 2},
+            ],
+        )
+
+    def test_fan_out(self):
+        names = [f"tenant{index}" for index in range(6)]
+        action = self.action(
+            containers=names, commands=["echo a", "echo b"], batch=True, max_parallel=3
+        )
+        self.assertTrue(action._run())
+        self.assertEqual(self.client.api.sessions, 6)
+        self.assertEqual(self.client.api.max_active, 3)
+        results = action.shared_resources.get_resource("container_results")
+        self.assertEqual(sorted(results), names)
+
+    def test_stream_tty(self):
+        lines = []
+        action = self.action(container="odoo", commands=["true"], stream=True)
+        stream = action._line_stream("odoo", lines.append)
+        container = self.client.get("odoo")
+        exit_code = action._exec_stream(container, "echo a; echo b", True, stream)
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(lines, ["a", "b"])
+        self.assertTrue(action._run())
+
+    def test_container_required(self):
+        with self.assertRaises(ValueError):
+            self.action(commands=["true"])._run()
+
+
+if __name__ == "__main__":
+    unittest.main()
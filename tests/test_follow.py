@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+
+from actionflow.follow import LogFilter, LogFollower, parse_line
+
+
+def text_line(run: str, job: str, level: str = "INFO", message: str = "msg") -> str:
+    return f"2026-01-01 10:00:00,000 - [MainThread] - {level} - [{run}/{job}] {message}"
+
+
+class TestFollow(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.logfile = os.path.join(self.tmpdir.name, "main.log")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_line(self):
+        record = parse_line(text_line("run1", "job1", "WARNING"))
+        self.assertEqual(record["run_id"], "run1")
+        self.assertEqual(record["job"], "job1")
+        self.assertEqual(record["level"], "WARNING")
+        self.assertIsNone(parse_line("Traceback (most recent call last):"))
+        # A message starting with brackets is not the run context
+        for context in ("-", "/job1"):
+            record = parse_line(
+                "2026-01-01 10:00:00,000 - [MainThread] - INFO - "
+                f"[{context}] [Flow] Executing flow"
+            )
+            self.assertIsNone(record["run_id"])
+
+        record = parse_line(
+            json.dumps(
+                {"time": "2026-01-01T10:00:00.000", "level": "INFO", "run_id": "r"}
+            )
+        )
+        self.assertEqual(record["run_id"], "r")
+        # JSON continuation lines (e.g. a logged payload) are not records
+        self.assertIsNone(parse_line('{"key": "value"}'))
+        self.assertIsNone(parse_line("[1, 2]"))
+
+    def test_level_filter(self):
+        log_filter = LogFilter(level="warning")
+        self.assertTrue(log_filter.match(text_line("r", "j", "ERROR")))
+        self.assertFalse(log_filter.match(text_line("r", "j", "INFO")))
+        with self.assertRaises(ValueError):
+            LogFilter(level="foo")
+
+    def test_run_index(self):
+        lines = [text_line("run1", "job1", message=str(i)) for i in range(3)]
+        other = [text_line("run2", "job1", "ERROR")]
+        content = "\n".join(lines + other) + "\n"
+        with open(self.logfile, "w") as file:
+            file.write(content)
+
+        # Index only the first span, the rest of the log is scanned
+        end = len("\n".join(lines)) + 1
+        with open(f"{self.logfile}.idx", "w") as file:
+            span = {
+                "ino": os.stat(self.logfile).st_ino,
+                "run": "run1",
+                "start": 0,
+                "end": end,
+                "first": "2026-01-01T10:00:00",
+                "last": "2026-01-01T10:00:00",
+            }
+            file.write(json.dumps(span) + "\n")
+
+        follower = LogFollower(self.logfile, LogFilter(run="run1"))
+        with open(self.logfile, "rb") as file:
+            output, position = follower.history(file)
+        self.assertEqual(output, lines)
+        self.assertEqual(position, len(content))
+
+        # Only the lines appended to the index are read by the next lookup
+        index = follower.index
+        offset = index._offset
+        with open(f"{self.logfile}.idx", "a") as file:
+            file.write(json.dumps({**span, "run": "run2", "start": end}) + "\n")
+            file.write('{"partial": ')
+        self.assertEqual(len(index.spans()), 2)
+        self.assertGreater(index._offset, offset)
+        self.assertEqual(index.lookup("run2")[0], [(end, end)])
+
+        follower = LogFollower(self.logfile, LogFilter(level="error"))
+        with open(self.logfile, "rb") as file:
+            output, _ = follower.history(file)
+        self.assertEqual(output, other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from actionflow.actions.images import Pull, normalize_reference
+from actionflow.tools import get_docker_client
+
+
+class FakeDockerAPI:
+    """Stand-in for the low-level docker API (images and pull)"""
+
+    def __init__(self, local_tags, layers):
+        self.local_tags = list(local_tags)
+        self.layers = layers
+        self.list_calls = 0
+        self.pulls = []
+        self.active = 0
+        self.max_active = 0
+        self.fetched = set()
+        self._lock = threading.Lock()
+
+    def images(self):
+        self.list_calls += 1
+        return [{"RepoTags": [tag]} for tag in self.local_tags] + [{"RepoTags": None}]
+
+    def pull(self, repository, tag, stream, decode, auth_config=None):
+        self.pulls.append((f"{repository}:{tag}", auth_config))
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            yield {"status": f"Pulling from {repository}", "id": tag}
+            time.sleep(0.05)
+            for layer in self.layers[f"{repository}:{tag}"]:
+                with self._lock:
+                    shared = layer in self.fetched
+                    self.fetched.add(layer)
+                if not shared:
+                    yield {"status": "Downloading", "id": layer}
+                yield {"status": "Pull complete", "id": layer}
+            self.local_tags.append(f"{repository}:{tag}")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeDockerClient:
+    def __init__(self, api):
+        self.api = api
+
+
+class TestPull(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeDockerAPI(
+            ["odoo:16.0"],
+            {
+                "odoo:17.0": ["base", "python", "odoo17"],
+                "odoo:18.0": ["base", "python", "odoo18"],
+                "postgres:16": ["base", "pg"],
+                "redis:7": ["redis"],
+            },
+        )
+        patcher = patch(
+            "actionflow.actions.images.get_docker_client",
+            return_value=FakeDockerClient(self.api),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pull_action(self, **kwargs):
+        names = ["odoo:16.0", "odoo:17.0", "odoo:18.0", "postgres:16", "redis:7"]
+        return Pull(images=[{"name": name} for name in names], **kwargs)
+
+    def test_pull_missing_concurrently(self):
+        action = self.pull_action(max_parallel=2, login="user", password="secret")
+        self.assertFalse(action._check())
+        self.assertTrue(action._run())
+
+        pulled = sorted(name for name, _ in self.api.pulls)
+        self.assertEqual(pulled, ["odoo:17.0", "odoo:18.0", "postgres:16", "redis:7"])
+        self.assertEqual(self.api.max_active, 2)
+        self.assertEqual(
+            self.api.pulls[0][1], {"username": "user", "password": "secret"}
+        )
+        self.assertTrue(action._check())
+
+    def test_single_listing(self):
+        action = self.pull_action()
+        self.api.local_tags += ["odoo:17.0", "odoo:18.0", "postgres:16", "redis:7"]
+        self.assertTrue(action._run())
+        self.assertEqual(self.api.list_calls, 1)
+        self.assertEqual(self.api.pulls, [])
+
+    def test_other_spelling(self):
+        action = self.pull_action()
+        self.api.local_tags += [
+            "docker.io/library/odoo:17.0",
+            "library/odoo:18.0",
+            "index.docker.io/library/postgres:16",
+            "docker.io/library/redis:7",
+        ]
+        self.assertTrue(action._check())
+
+    def test_normalize_reference(self):
+        for name, expected in (
+            ("odoo", "docker.io/library/odoo:latest"),
+            ("odoo:17.0", "docker.io/library/odoo:17.0"),
+            ("acme/odoo:17.0", "docker.io/acme/odoo:17.0"),
+            ("ghcr.io/acme/odoo", "ghcr.io/acme/odoo:latest"),
+            ("localhost:5000/odoo:17.0", "localhost:5000/odoo:17.0"),
+            ("odoo@sha256:abc", "docker.io/library/odoo@sha256:abc"),
+        ):
+            self.assertEqual(normalize_reference(name), expected)
+
+    def test_no_credentials(self):
+        action = self.pull_action(max_parallel=1)
+        action._run()
+        self.assertEqual({auth for _, auth in self.api.pulls}, {None})
+
+    def test_pull_error(self):
+        def failing_pull(*args, **kwargs):
+            yield {"error": "manifest unknown"}
+
+        self.api.pull = failing_pull
+        with self.assertRaises(RuntimeError):
+            self.pull_action()._run()
+
+
+class TestDockerClient(unittest.TestCase):
+    def test_lazy_shared_client(self):
+        with patch("actionflow.tools._docker_client", None), patch(
+            "actionflow.tools.docker.from_env", return_value=object()
+        ) as from_env:
+            threads = [threading.Thread(target=get_docker_client) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(from_env.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
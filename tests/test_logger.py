@@ -0,0 +1,49 @@
+import json
+import logging
+import queue
+import unittest
+
+from actionflow.logger import (
+    BoundedQueueHandler,
+    ContextFilter,
+    JsonFormatter,
+    bind_context,
+)
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+class TestLogger(unittest.TestCase):
+    def test_context(self):
+        record = make_record("hello")
+        with bind_context(run_id="run1", job="job1"):
+            with bind_context(step="1_example"):
+                ContextFilter().filter(record)
+
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload["run_id"], "run1")
+        self.assertEqual(payload["job"], "job1")
+        self.assertEqual(payload["step"], "1_example")
+        self.assertEqual(payload["message"], "hello")
+        self.assertEqual(record.context, "[run1/job1/1_example] ")
+
+        record = make_record("outside a run")
+        ContextFilter().filter(record)
+        self.assertEqual(record.context, "[-] ")
+
+    def test_drop_policy(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1), overflow="drop")
+        handler.enqueue(make_record("first"))
+        handler.enqueue(make_record("second"))
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(queue.Queue(), overflow="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
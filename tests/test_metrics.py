@@ -0,0 +1,47 @@
+import threading
+import unittest
+
+from actionflow.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_threads(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "Test counter", ("name",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(name="a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.labels(name="a").value, 8000)
+        self.assertIn('test_total{name="a"} 8000.0', registry.render())
+
+    def test_histogram(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        output = registry.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('test_seconds_bucket{le="1.0"} 2', output)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', output)
+        self.assertIn("test_seconds_count 3", output)
+        self.assertIn("# TYPE test_seconds histogram", output)
+
+    def test_get_or_create(self):
+        registry = MetricsRegistry()
+        gauge = registry.gauge("test", "Test")
+        self.assertIs(registry.gauge("test", "Test"), gauge)
+        with self.assertRaises(ValueError):
+            registry.counter("test", "Test")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from actionflow.actions.download import Download, DownloadMany
+from actionflow.exceptions import DownloadError
+from actionflow.net import download_file
+
+CONTENT = os.urandom(3 * 1024 * 1024 + 123)
+ETAG = '"v1"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve CONTENT with Range support"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+    # ETag announced by HEAD, another value simulates a change after it
+    head_etag = ETAG
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(
+        self, status: int, length: int, extra: dict = None, etag: str = ETAG
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(length))
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers(200, len(CONTENT), etag=self.head_etag)
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.path == "/missing":
+            self._headers(404, 0)
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self._headers(304, 0)
+            return
+
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if not match or (if_range and if_range != ETAG):
+            self._headers(200, len(CONTENT))
+            self.wfile.write(CONTENT)
+            return
+
+        start = int(match.group(1))
+        end = int(match.group(2) or len(CONTENT) - 1)
+        body = CONTENT[start : end + 1]
+        self._headers(
+            206, len(body), {"Content-Range": f"bytes {start}-{end}/{len(CONTENT)}"}
+        )
+        self.wfile.write(body)
+
+
+class TestDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/file.bin"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        RangeHandler.requests.clear()
+        RangeHandler.head_etag = ETAG
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "file.bin")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self) -> bytes:
+        with open(self.filepath, "rb") as file:
+            return file.read()
+
+    def test_single_stream(self):
+        download_file(self.url, self.filepath)
+        self.assertEqual(self.read(), CONTENT)
+        self.assertEqual(len(RangeHandler.requests), 1)
+
+    def test_segments(self):
+        download_file(
+            self.url, self.filepath, segments=4, min_segment_size=512 * 1024
+        )
+        self.assertEqual(self.read(), CONTENT)
+        self.assertEqual(len(RangeHandler.requests), 4)
+        self.assertTrue(all("Range" in headers for headers in RangeHandler.requests))
+        self.assertTrue(
+            all(headers["If-Range"] == ETAG for headers in RangeHandler.requests)
+        )
+
+    def test_segments_changed(self):
+        RangeHandler.head_etag = '"v0"'
+        with self.assertRaises(DownloadError):
+            download_file(
+                self.url, self.filepath, segments=4, min_segment_size=512 * 1024
+            )
+        self.assertFalse(os.path.exists(self.filepath))
+
+    def write_part(self, size: int, etag: str) -> None:
+        with open(f"{self.filepath}.part", "wb") as file:
+            file.write(CONTENT[:size])
+        with open(f"{self.filepath}.part.json", "w") as file:
+            json.dump({"url": self.url, "etag": etag}, file)
+
+    def test_resume(self):
+        self.write_part(1000, ETAG)
+        download_file(self.url, self.filepath)
+        self.assertEqual(self.read(), CONTENT)
+        self.assertEqual(RangeHandler.requests[0]["Range"], "bytes=1000-")
+        self.assertFalse(os.path.exists(f"{self.filepath}.part"))
+        self.assertFalse(os.path.exists(f"{self.filepath}.part.json"))
+
+    def test_resume_changed(self):
+        self.write_part(1000, '"v0"')
+        download_file(self.url, self.filepath)
+        self.assertEqual(self.read(), CONTENT)
+
+    def test_error_status(self):
+        url = self.url.replace("/file.bin", "/missing")
+        with self.assertRaises(DownloadError) as context:
+            download_file(url, self.filepath)
+        self.assertEqual(context.exception.status_code, 404)
+        self.assertFalse(os.path.exists(self.filepath))
+
+    def test_conditional(self):
+        self.assertTrue(download_file(self.url, self.filepath))
+        with open(f"{self.filepath}.meta.json") as file:
+            metadata = json.load(file)
+        self.assertEqual(metadata["etag"], ETAG)
+        self.assertEqual(metadata["sha256"], hashlib.sha256(CONTENT).hexdigest())
+
+        self.assertFalse(download_file(self.url, self.filepath, conditional=True))
+        self.assertEqual(RangeHandler.requests[-1]["If-None-Match"], ETAG)
+
+    def test_conditional_changed(self):
+        with open(self.filepath, "wb") as file:
+            file.write(b"old")
+        with open(f"{self.filepath}.meta.json", "w") as file:
+            json.dump({"url": self.url, "etag": '"v0"', "size": 3}, file)
+
+        self.assertTrue(download_file(self.url, self.filepath, conditional=True))
+        self.assertEqual(self.read(), CONTENT)
+        # The 200 answer of the conditional request is the download
+        self.assertEqual(len(RangeHandler.requests), 1)
+        self.assertEqual(RangeHandler.requests[0]["If-None-Match"], '"v0"')
+
+    def test_download_action_revalidate(self):
+        download_file(self.url, self.filepath)
+        RangeHandler.requests.clear()
+
+        action = Download(url=self.url, filepath=self.filepath)
+        self.assertTrue(action.run())
+        self.assertEqual(len(RangeHandler.requests), 1)
+
+    def test_download_action_without_metadata(self):
+        # A file not written by a download is replaced
+        with open(self.filepath, "wb") as file:
+            file.write(b"foreign")
+        action = Download(url=self.url, filepath=self.filepath)
+        self.assertTrue(action.run())
+        self.assertEqual(self.read(), CONTENT)
+
+        with open(self.filepath, "wb") as file:
+            file.write(b"foreign")
+        os.remove(f"{self.filepath}.meta.json")
+        action = Download(url=self.url, filepath=self.filepath, revalidate=False)
+        self.assertTrue(action.run())
+        self.assertEqual(self.read(), b"foreign")
+
+    def test_checksum(self):
+        digest = hashlib.sha256(CONTENT).hexdigest()
+        self.assertTrue(download_file(self.url, self.filepath, sha256=digest.upper()))
+
+        with self.assertRaises(DownloadError):
+            download_file(self.url, self.filepath, sha256="0" * 64)
+        self.assertFalse(os.path.exists(f"{self.filepath}.part"))
+        self.assertEqual(self.read(), CONTENT)
+
+    def test_download_many(self):
+        manifest = os.path.join(self.tmpdir.name, "manifest.txt")
+        with open(manifest, "w") as file:
+            file.write(f"# artifacts\n{self.url} b.bin\n")
+
+        action = DownloadMany(
+            files=[{"url": self.url, "filepath": "a.bin"}],
+            manifest=manifest,
+            directory=os.path.join(self.tmpdir.name, "out"),
+            max_parallel=2,
+        )
+        self.assertTrue(action.run())
+        for name in ("a.bin", "b.bin"):
+            with open(os.path.join(self.tmpdir.name, "out", name), "rb") as file:
+                self.assertEqual(file.read(), CONTENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import actionflow.actions.shell  # noqa: F401 (register the run action)
+from actionflow.exceptions import OutputNotFound
+from actionflow.jobs import Job
+from actionflow.outputs import (
+    Artifact,
+    OutputStore,
+    parse_output_file,
+    references,
+)
+
+
+class TestArtifact(unittest.TestCase):
+    def test_bytes_view_without_copy(self):
+        data = bytearray(b"payload")
+        artifact = Artifact.from_bytes(data)
+        data[0:1] = b"P"
+        self.assertEqual(artifact.tobytes(), b"Payload")
+        self.assertTrue(artifact.view().readonly)
+
+    def test_file_mapping(self):
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b"0123456789" * 1000)
+            file.flush()
+            artifact = Artifact.from_file(file.name)
+            self.assertEqual(len(artifact), 10000)
+            self.assertEqual(bytes(artifact.view()[10:15]), b"01234")
+            self.assertEqual(artifact.open().read(), b"0123456789" * 1000)
+            artifact.release()
+            self.assertTrue(artifact.released)
+            with self.assertRaises(ValueError):
+                artifact.view()
+
+    def test_shared_memory_pickles_by_name(self):
+        artifact = Artifact.shared(b"shared data")
+        attached = pickle.loads(pickle.dumps(artifact))
+        self.assertEqual(attached.name, artifact.name)
+        self.assertEqual(attached.tobytes(), b"shared data")
+        attached.release()
+        artifact.release()
+
+
+class TestOutputStore(unittest.TestCase):
+    def test_resolve(self):
+        store = OutputStore()
+        store.set("build", "count", 3)
+        store.set("build", "tag", "v1")
+        self.assertEqual(store.resolve("${{ steps.build.outputs.count }}"), 3)
+        self.assertEqual(
+            store.resolve(
+                ["app:${{steps.build.outputs.tag}}-${{ steps.build.outputs.count }}"]
+            ),
+            ["app:v1-3"],
+        )
+        self.assertEqual(store.resolve({"a": 1}), {"a": 1})
+        with self.assertRaises(OutputNotFound):
+            store.resolve("${{ steps.build.outputs.missing }}")
+
+    def test_references(self):
+        self.assertEqual(
+            references({"x": ["${{ steps.a.outputs.b }}", 1], "y": "none"}),
+            {("a", "b")},
+        )
+
+    def test_released_after_last_consumer(self):
+        store = OutputStore()
+        artifact = Artifact.from_bytes(b"data")
+        store.set("a", "blob", artifact)
+        store.add_consumer("a", "blob")
+        store.add_consumer("a", "blob")
+        store.release("a", "blob")
+        self.assertFalse(artifact.released)
+        self.assertIs(store.get("a", "blob"), artifact)
+        store.release("a", "blob")
+        self.assertTrue(artifact.released)
+        with self.assertRaises(OutputNotFound):
+            store.get("a", "blob")
+
+    def test_parse_output_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as file:
+            file.write("tag=v1=final\nnotes<<EOF\nline 1\nline 2\nEOF\nempty=\n")
+            file.flush()
+            self.assertEqual(
+                parse_output_file(file.name),
+                {"tag": "v1=final", "notes": "line 1\nline 2", "empty": ""},
+            )
+
+
+class TestStepOutputs(unittest.TestCase):
+    def test_run_steps(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = os.path.join(tmpdir, "result")
+            job = Job(
+                name="outputs",
+                steps=[
+                    {
+                        "id": "first",
+                        "run": 'echo "greeting=hello" >> "$ACTIONFLOW_OUTPUT"',
+                    },
+                    {
+                        "run": f'echo "$GREETING world" > {target}',
+                        "env": {"GREETING": "${{ steps.first.outputs.greeting }}"},
+                    },
+                ],
+            )
+            job.execute(1, 1)
+
+            self.assertEqual(job.machine.state, "success")
+            with open(target) as file:
+                self.assertEqual(file.read(), "hello world\n")
+            # The only consumer finished: the output was dropped
+            self.assertEqual(job.steps[0].outputs, {})
+
+    def test_missing_output_fails_step(self):
+        job = Job(
+            name="outputs",
+            steps=[{"run": "echo ${{ steps.nope.outputs.value }}"}],
+        )
+        job.execute(1, 1)
+        self.assertEqual(job.steps[0].machine.state, "failure")
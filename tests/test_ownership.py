@@ -0,0 +1,55 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from actionflow.ownership import Ownership, fix_ownership, sample_ownership
+
+
+@unittest.skipUnless(hasattr(os, "geteuid") and os.geteuid() == 0, "requires root")
+class TestOwnership(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "data")
+        for directory in range(5):
+            path = os.path.join(self.root, f"dir{directory}", "sub")
+            os.makedirs(path)
+            for index in range(20):
+                with open(os.path.join(path, f"file{index}"), "w") as file:
+                    file.write("data")
+        os.symlink("dir0", os.path.join(self.root, "link"))
+        self.ownership = Ownership(uid=1234, gid=1234, file_mode=0o640)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_fix_only_differences(self):
+        self.assertFalse(sample_ownership(self.root, self.ownership))
+
+        stats = fix_ownership(self.root, self.ownership, workers=4)
+        # root, 5 dirs, 5 subdirs, 100 files and the symlink
+        self.assertEqual(stats.scanned, 112)
+        self.assertEqual(stats.chowned, 112)
+        self.assertEqual(stats.chmoded, 100)
+        self.assertTrue(sample_ownership(self.root, self.ownership))
+
+        path = os.path.join(self.root, "dir3", "sub", "file7")
+        status = os.stat(path)
+        self.assertEqual((status.st_uid, stat.S_IMODE(status.st_mode)), (1234, 0o640))
+
+        os.chown(path, 0, 0)
+        ctime = os.stat(os.path.join(self.root, "dir1", "sub", "file1")).st_ctime_ns
+        stats = fix_ownership(self.root, self.ownership, workers=4)
+        self.assertEqual((stats.chowned, stats.chmoded), (1, 0))
+        self.assertEqual(
+            os.stat(os.path.join(self.root, "dir1", "sub", "file1")).st_ctime_ns, ctime
+        )
+
+    def test_parse(self):
+        ownership = Ownership.parse("0:0", file_mode="644", dir_mode="755")
+        self.assertEqual(ownership, Ownership(0, 0, 0o644, 0o755))
+        self.assertEqual(Ownership.parse(":1000"), Ownership(-1, 1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
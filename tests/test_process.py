@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import actionflow.actions.shell  # noqa: F401 (register the run action)
+from actionflow.actions.shell import Run
+from actionflow.jobs import Group, Job
+from actionflow.process import ProcessRunner, run_process
+
+
+class TestProcessRunner(unittest.TestCase):
+    def test_stream_lines(self):
+        stdout, stderr = [], []
+        result = run_process(
+            "for i in 1 2 3; do echo out $i; echo err $i >&2; done; exit 4",
+            on_stdout=stdout.append,
+            on_stderr=stderr.append,
+            tail_lines=2,
+        )
+        self.assertEqual(result.returncode, 4)
+        self.assertFalse(result.success)
+        self.assertEqual(stdout, ["out 1", "out 2", "out 3"])
+        self.assertEqual(stderr, ["err 1", "err 2", "err 3"])
+        self.assertEqual(result.stdout, ["out 2", "out 3"])
+
+    def test_timeout_kills_group(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            marker = os.path.join(tmpdir, "marker")
+            start = time.monotonic()
+            result = run_process(
+                f"(sleep 2; touch {marker}) & sleep 30",
+                timeout=0.3,
+                on_stdout=lambda line: None,
+            )
+            self.assertTrue(result.timed_out)
+            self.assertLess(time.monotonic() - start, 5)
+            time.sleep(2.2)
+            # The background child was part of the group and was killed too
+            self.assertFalse(os.path.exists(marker))
+
+    def test_cancel(self):
+        runner = ProcessRunner(["sleep", "30"])
+        threading.Timer(0.2, runner.cancel).start()
+        result = runner.run()
+        self.assertTrue(result.cancelled)
+        self.assertFalse(result.success)
+
+
+class TestRunStep(unittest.TestCase):
+    def job(self, *steps):
+        return Job.model_validate({"name": "shell", "steps": list(steps)})
+
+    def test_run_step(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            job = self.job(
+                {
+                    "name": "Write file",
+                    "run": "echo $VALUE > out.txt\necho done",
+                    "env": {"VALUE": 42},
+                    "working-directory": tmpdir,
+                }
+            )
+            step = job.steps[0]
+            self.assertEqual((step.name, step.description), ("run", "Write file"))
+            self.assertTrue(step._run())
+            with open(os.path.join(tmpdir, "out.txt")) as file:
+                self.assertEqual(file.read(), "42\n")
+
+    def test_run_step_fails_fast(self):
+        job = self.job({"run": "false\necho unreachable", "shell": "sh"})
+        self.assertEqual(job.steps[0].id, "1_run")
+        self.assertFalse(job.steps[0]._run())
+
+    def test_failure_cancels_group(self):
+        sleeper = Run(script="sleep 30", shell="sh", retry=3)
+        group = Group(actions=[sleeper, Run(script="sleep 0.2; exit 1", shell="sh")])
+        start = time.monotonic()
+        group.execute(1, 1)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(group.machine.state, "failure")
+        self.assertEqual(sleeper.machine.state, "failure")
+        self.assertEqual(sleeper._attempts, 1)
+
+    def test_continue_on_error_in_group(self):
+        # A failure allowed by continue_on_error does not cancel the group
+        sleeper = Run(script="sleep 0.5", shell="sh")
+        group = Group(
+            actions=[Run(script="exit 1", shell="sh", continue_on_error=True), sleeper]
+        )
+        group.execute(1, 1)
+        self.assertEqual(group.machine.state, "success")
+        self.assertEqual(sleeper.machine.state, "success")
+
+        # A cancelled action with continue_on_error is still reported as such
+        sleeper = Run(script="sleep 30", shell="sh", continue_on_error=True)
+        group = Group(actions=[sleeper, Run(script="sleep 0.2; exit 1", shell="sh")])
+        start = time.monotonic()
+        group.execute(1, 1)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(group.machine.state, "failure")
+        self.assertEqual(sleeper.machine.state, "success")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from actionflow import profiling
+from actionflow.logger import bind_context
+from actionflow.profiling import ActionProfiler
+
+
+def busy(duration: float) -> int:
+    end = time.perf_counter() + duration
+    count = 0
+    while time.perf_counter() < end:
+        count += 1
+    return count
+
+
+class Worker:
+    profile = True
+
+
+class TestActionProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_report(self, profiler: ActionProfiler) -> str:
+        with open(profiler.write_report(self.tmpdir.name)) as file:
+            return file.read()
+
+    def run_concurrently(self, profiler: ActionProfiler, count: int = 4) -> None:
+        barrier = threading.Barrier(count)
+
+        def run():
+            with profiler.profile(Worker()):
+                barrier.wait()
+                busy(0.1)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_report(self):
+        profiler = ActionProfiler()
+        for _ in range(2):
+            with profiler.profile(Worker()):
+                busy(0.01)
+
+        report = self.read_report(profiler)
+        self.assertIn("Worker (2 calls)", report)
+        self.assertIn("busy", report)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, "Worker.pstats")))
+
+    def test_sampling_report(self):
+        profiler = ActionProfiler(mode="sampling", interval=0.001)
+        with profiler.profile(Worker()):
+            busy(0.1)
+
+        report = self.read_report(profiler)
+        self.assertIn("samples", report)
+        # The test runner frames tie with busy in the top-N, check the stacks
+        with open(os.path.join(self.tmpdir.name, "Worker.folded")) as file:
+            self.assertIn("busy", file.read())
+
+    def test_concurrent_actions(self):
+        profiler = ActionProfiler(interval=0.001)
+        self.run_concurrently(profiler)
+
+        self.assertEqual(profiler._calls["Worker"], 4)
+        report = self.read_report(profiler)
+        self.assertNotIn("No profile", report)
+        self.assertIn("busy", report)
+
+    def test_concurrent_actions_global_profiler(self):
+        # Python >= 3.12: the first action uses cProfile, the others are sampled
+        profiler = ActionProfiler(interval=0.001)
+        with mock.patch.object(profiling, "GLOBAL_PROFILER", True):
+            with self.assertLogs(level="WARNING") as logs:
+                self.run_concurrently(profiler)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("Worker", profiler._stats)
+        self.assertTrue(profiler._samples["Worker"])
+        report = self.read_report(profiler)
+        self.assertIn("Includes calls of concurrent actions", report)
+        self.assertIn("samples", report)
+
+    def test_step_profiled_without_profiler(self):
+        # `profile: true` without a running profiler: the report is written
+        # when the step finishes and no profiler is left running
+        with mock.patch.object(profiling.settings, "_path", self.tmpdir.name):
+            with bind_context(run_id="run", step="build"):
+                with profiling.profiled(Worker()):
+                    busy(0.05)
+
+        self.assertIsNone(profiling.profiler)
+        directory = os.path.join(self.tmpdir.name, "profiles", "run", "build")
+        with open(os.path.join(directory, "report.txt")) as file:
+            self.assertIn("busy", file.read())
+        self.assertTrue(os.path.exists(os.path.join(directory, "Worker.pstats")))
@@ -0,0 +1,97 @@
+import tempfile
+import threading
+import time
+import unittest
+
+import actionflow.actions.shell  # noqa: F401 (register the run action)
+from actionflow.common import MISSING, SharedResources
+from actionflow.core import Flow
+
+FLOW = """
+name: resources
+context:
+  workspace: {workspace}
+jobs:
+  first:
+    steps:
+      - run: "true"
+  second:
+    steps:
+      - run: "true"
+"""
+
+
+class TestSharedResources(unittest.TestCase):
+    def test_get_set(self):
+        resources = SharedResources()
+        self.assertIsNone(resources.get_resource("missing"))
+        self.assertEqual(resources.get_resource("missing", 1), 1)
+        for index in range(100):
+            resources.set_resource(f"key{index}", index)
+        self.assertEqual(resources.get_resource("key42"), 42)
+        self.assertEqual(len(resources.resources), 100)
+
+    def test_snapshot_is_not_modified(self):
+        resources = SharedResources(shards=1)
+        resources.set_resource("a", 1)
+        snapshot = resources.resources
+        resources.set_resource("b", 2)
+        self.assertEqual(snapshot, {"a": 1})
+
+    def test_setdefault(self):
+        resources = SharedResources()
+        self.assertEqual(resources.setdefault("key", 1), 1)
+        self.assertEqual(resources.setdefault("key", 2), 1)
+
+    def test_compare_and_set(self):
+        resources = SharedResources()
+        self.assertTrue(resources.compare_and_set("key", MISSING, 1))
+        self.assertFalse(resources.compare_and_set("key", MISSING, 2))
+        self.assertFalse(resources.compare_and_set("key", 0, 2))
+        self.assertTrue(resources.compare_and_set("key", 1, 2))
+        self.assertEqual(resources.get_resource("key"), 2)
+
+    def test_concurrent_counter(self):
+        resources = SharedResources()
+        resources.set_resource("counter", 0)
+
+        def increment():
+            for _ in range(200):
+                while True:
+                    value = resources.get_resource("counter")
+                    if resources.compare_and_set("counter", value, value + 1):
+                        break
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(resources.get_resource("counter"), 1600)
+
+    def test_wait_for(self):
+        resources = SharedResources()
+        timer = threading.Timer(0.1, resources.set_resource, ("ready", "yes"))
+        timer.start()
+        start = time.monotonic()
+        self.assertEqual(resources.wait_for("ready", timeout=5), "yes")
+        self.assertLess(time.monotonic() - start, 2)
+        with self.assertRaises(TimeoutError):
+            resources.wait_for("never", timeout=0.05)
+
+
+class TestRunScope(unittest.TestCase):
+    def test_store_per_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = Flow.from_string(FLOW.format(workspace=tmpdir))
+            second = Flow.from_string(FLOW.format(workspace=tmpdir))
+
+        self.assertIsNot(first.shared_resources, second.shared_resources)
+        self.assertEqual(first.shared_resources.namespace, first.run_id)
+        steps = [step for job in first.jobs for step in job.steps]
+        for step in steps:
+            self.assertIs(step.shared_resources, first.shared_resources)
+
+        steps[0].shared_resources.set_resource("key", "value")
+        self.assertEqual(steps[1].shared_resources.get_resource("key"), "value")
+        self.assertIsNone(second.shared_resources.get_resource("key"))
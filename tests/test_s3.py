@@ -0,0 +1,264 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from actionflow.net import (
+    MAX_PARTS,
+    MIN_PART_SIZE,
+    compute_etag,
+    delete_s3_objects,
+    part_size_for,
+    sync_to_s3,
+    upload_stream_to_s3,
+    upload_to_s3,
+)
+
+
+class FakeS3:
+    """In-memory stand-in for the boto3 S3 client"""
+
+    def __init__(self, fail_part: int = None, page_size: int = 1000):
+        self.objects = {}
+        self.etags = {}
+        self.page_size = page_size
+        self.puts = []
+        self.deletes = []
+        self.uploads = {}
+        self.aborted = []
+        self.fail_part = fail_part
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body):
+        data = Body if isinstance(Body, bytes) else Body.read()
+        with self._lock:
+            self.objects[(Bucket, Key)] = data
+            self.etags[(Bucket, Key)] = f'"{hashlib.md5(data).hexdigest()}"'
+            self.puts.append(Key)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise IOError("part failed")
+        data = Body if isinstance(Body, bytes) else Body.read()
+        with self._lock:
+            self.uploads[UploadId][PartNumber] = data
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        digests = b"".join(hashlib.md5(parts[number]).digest() for number in numbers)
+        with self._lock:
+            self.objects[(Bucket, Key)] = b"".join(parts[number] for number in numbers)
+            self.etags[(Bucket, Key)] = (
+                f'"{hashlib.md5(digests).hexdigest()}-{len(numbers)}"'
+            )
+            self.puts.append(Key)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        keys = sorted(
+            key
+            for bucket, key in self.objects
+            if bucket == Bucket and key.startswith(Prefix)
+        )
+        start = int(ContinuationToken or 0)
+        page = keys[start : start + self.page_size]
+        response = {
+            "Contents": [
+                {
+                    "Key": key,
+                    "Size": len(self.objects[(Bucket, key)]),
+                    "ETag": self.etags[(Bucket, key)],
+                }
+                for key in page
+            ],
+            "IsTruncated": start + self.page_size < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + self.page_size)
+        return response
+
+    def delete_objects(self, Bucket, Delete):
+        self.deletes.append(len(Delete["Objects"]))
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+
+
+class TestS3Upload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "backup.bin")
+        self.content = os.urandom(2 * MIN_PART_SIZE + 1000)
+        with open(self.source, "wb") as file:
+            file.write(self.content)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def upload(self, client, part_size):
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            upload_to_s3(
+                "bucket",
+                self.source,
+                "backup.bin",
+                "access",
+                "secret",
+                "http://localhost",
+                part_size=part_size,
+                max_concurrency=3,
+            )
+
+    def test_single(self):
+        client = FakeS3()
+        self.upload(client, part_size=len(self.content))
+        self.assertEqual(client.objects[("bucket", "backup.bin")], self.content)
+
+    def test_multipart(self):
+        client = FakeS3()
+        self.upload(client, part_size=MIN_PART_SIZE)
+        self.assertEqual(client.objects[("bucket", "backup.bin")], self.content)
+
+    def test_multipart_abort(self):
+        client = FakeS3(fail_part=2)
+        with self.assertRaises(IOError):
+            self.upload(client, part_size=MIN_PART_SIZE)
+        self.assertEqual(client.aborted, ["upload-0"])
+        self.assertNotIn(("bucket", "backup.bin"), client.objects)
+
+
+class TestS3Sync(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "data")
+        self.manifest = os.path.join(self.tmpdir.name, "manifest.json")
+        self.write("a.txt", b"alpha")
+        self.write("sub/b.txt", b"beta")
+        self.write("big.bin", os.urandom(MIN_PART_SIZE + 10))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+
+    def sync(self, client, **kwargs):
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            return sync_to_s3(
+                "bucket",
+                self.source,
+                "backups/",
+                "access",
+                "secret",
+                "http://localhost",
+                manifest=self.manifest,
+                part_size=MIN_PART_SIZE,
+                **kwargs,
+            )
+
+    def test_etag(self):
+        client = FakeS3()
+        path = os.path.join(self.source, "big.bin")
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            upload_to_s3(
+                "bucket", path, "big.bin", "a", "s", "e", part_size=MIN_PART_SIZE
+            )
+        etag = client.etags[("bucket", "big.bin")].strip('"')
+        self.assertTrue(etag.endswith("-2"))
+        self.assertEqual(compute_etag(path, MIN_PART_SIZE), etag)
+
+    def test_etag_unaligned_part_size(self):
+        client = FakeS3()
+        self.write("huge.bin", os.urandom(2 * MIN_PART_SIZE + 100))
+        path = os.path.join(self.source, "huge.bin")
+        part_size = MIN_PART_SIZE + 12345
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            upload_to_s3("bucket", path, "huge.bin", "a", "s", "e", part_size=part_size)
+        etag = client.etags[("bucket", "huge.bin")].strip('"')
+        self.assertTrue(etag.endswith("-2"))
+        self.assertEqual(compute_etag(path, part_size, block_size=1000), etag)
+        self.assertEqual(compute_etag(path, part_size), etag)
+
+    def test_part_size_for(self):
+        self.assertEqual(part_size_for(10, 1), MIN_PART_SIZE)
+        size = MAX_PARTS * MIN_PART_SIZE + 1
+        part_size = part_size_for(size, MIN_PART_SIZE)
+        self.assertGreater(part_size, MIN_PART_SIZE)
+        self.assertLessEqual(-(-size // part_size), MAX_PARTS)
+
+    def test_stream_parts_limit(self):
+        client = FakeS3()
+        stream = io.BytesIO(os.urandom(3 * MIN_PART_SIZE))
+        with patch("actionflow.net.get_s3_client", return_value=client):
+            with patch("actionflow.net.MAX_PARTS", 2):
+                with self.assertRaises(ValueError):
+                    upload_stream_to_s3(
+                        "bucket", stream, "big.bin", "a", "s", "e", MIN_PART_SIZE
+                    )
+        self.assertEqual(len(client.aborted), 1)
+
+    def test_incremental(self):
+        client = FakeS3(page_size=2)
+        stats = self.sync(client)
+        self.assertEqual(stats["uploaded"], 3)
+        self.assertEqual(
+            sorted(key for _, key in client.objects),
+            ["backups/a.txt", "backups/big.bin", "backups/sub/b.txt"],
+        )
+
+        client.puts.clear()
+        stats = self.sync(client)
+        self.assertEqual((stats["uploaded"], stats["unchanged"]), (0, 3))
+
+        self.write("a.txt", b"ALPHA")
+        stats = self.sync(client)
+        self.assertEqual(client.puts, ["backups/a.txt"])
+        self.assertEqual(client.objects[("bucket", "backups/a.txt")], b"ALPHA")
+
+    def test_manifest_only(self):
+        client = FakeS3()
+        self.sync(client, remote_listing=False)
+        client.puts.clear()
+        # Remote changes are not seen without listing
+        client.objects.pop(("bucket", "backups/a.txt"))
+        stats = self.sync(client, remote_listing=False)
+        self.assertEqual(stats["uploaded"], 0)
+        self.assertEqual(client.puts, [])
+
+    def test_delete(self):
+        client = FakeS3()
+        client.objects[("bucket", "backups/old.txt")] = b"old"
+        client.etags[("bucket", "backups/old.txt")] = '"x"'
+        client.objects[("bucket", "other/keep.txt")] = b"keep"
+        client.etags[("bucket", "other/keep.txt")] = '"y"'
+
+        stats = self.sync(client)
+        self.assertEqual(stats["deleted"], 0)
+        self.assertIn(("bucket", "backups/old.txt"), client.objects)
+
+        stats = self.sync(client, delete=True)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertNotIn(("bucket", "backups/old.txt"), client.objects)
+        self.assertIn(("bucket", "other/keep.txt"), client.objects)
+
+    def test_delete_batches(self):
+        client = FakeS3()
+        delete_s3_objects(client, "bucket", [f"key{index}" for index in range(2500)])
+        self.assertEqual(client.deletes, [1000, 1000, 500])
+
+
+if __name__ == "__main__":
+    unittest.main()
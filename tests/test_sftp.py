@@ -0,0 +1,253 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+import paramiko
+
+from actionflow.net import (
+    SftpPool,
+    close_sftp_pools,
+    get_sftp_pool,
+    sftp_upload,
+    sftp_upload_many,
+)
+
+
+class StubServer(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+class StubHandle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class StubSFTPServer(paramiko.SFTPServerInterface):
+    """Serve a local directory (paths are relative to it)"""
+
+    root: str = None
+
+    def _path(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self._path(path), flags, 0o644)
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        mode = "wb" if flags & os.O_WRONLY else "r+b" if flags & os.O_RDWR else "rb"
+        handle = StubHandle(flags)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._path(path)))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    lstat = stat
+
+    def remove(self, path):
+        try:
+            os.remove(self._path(path))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        if os.path.exists(self._path(newpath)):
+            return paramiko.SFTP_FAILURE
+        return self.posix_rename(oldpath, newpath)
+
+    def posix_rename(self, oldpath, newpath):
+        try:
+            os.replace(self._path(oldpath), self._path(newpath))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        return paramiko.SFTP_OK
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._path(path))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        return paramiko.SFTP_OK
+
+
+class SftpServer:
+    """Local SFTP server stand-in, counts the SSH connections"""
+
+    def __init__(self, root):
+        StubSFTPServer.root = root
+        self.key = paramiko.RSAKey.generate(2048)
+        self.connections = 0
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.listen(8)
+        self.port = self.socket.getsockname()[1]
+        self.transports = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.key)
+            transport.set_subsystem_handler(
+                "sftp", paramiko.SFTPServer, StubSFTPServer
+            )
+            transport.start_server(server=StubServer())
+            self.transports.append(transport)
+
+    def close(self):
+        self.socket.close()
+        for transport in self.transports:
+            transport.close()
+
+
+class TestSftp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.remote = tempfile.TemporaryDirectory()
+        cls.server = SftpServer(cls.remote.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+        cls.remote.cleanup()
+
+    def setUp(self):
+        self.local = tempfile.TemporaryDirectory()
+        self.pool = SftpPool("127.0.0.1", self.server.port, "user", "password")
+
+    def tearDown(self):
+        self.pool.close()
+        self.local.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.local.name, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def read_remote(self, name):
+        with open(os.path.join(self.remote.name, name), "rb") as file:
+            return file.read()
+
+    def test_upload(self):
+        content = os.urandom(3 * 1024 * 1024 + 7)
+        source = self.write("backup.bin", content)
+        with self.pool.channel() as sftp:
+            self.assertEqual(sftp_upload(sftp, source, "backup.bin"), len(content))
+        self.assertEqual(self.read_remote("backup.bin"), content)
+
+    def write_part(self, name, content, source):
+        status = os.stat(source)
+        with open(os.path.join(self.remote.name, f"{name}.part"), "wb") as file:
+            file.write(content)
+        with open(os.path.join(self.remote.name, f"{name}.part.json"), "w") as file:
+            json.dump({"size": status.st_size, "mtime_ns": status.st_mtime_ns}, file)
+
+    def test_resume(self):
+        content = os.urandom(1024 * 1024)
+        source = self.write("resume.bin", content)
+        self.write_part("resume.bin", content[:1000], source)
+
+        with self.pool.channel() as sftp:
+            sent = sftp_upload(sftp, source, "resume.bin")
+        self.assertEqual(sent, len(content) - 1000)
+        self.assertEqual(self.read_remote("resume.bin"), content)
+        for suffix in (".part", ".part.json"):
+            self.assertFalse(
+                os.path.exists(os.path.join(self.remote.name, f"resume.bin{suffix}"))
+            )
+
+    def test_resume_changed_source(self):
+        content = os.urandom(1024 * 1024)
+        source = self.write("changed.bin", content)
+        self.write_part("changed.bin", b"x" * 1000, source)
+        # The source changed since the partial upload
+        os.utime(source, ns=(0, 0))
+
+        with self.pool.channel() as sftp:
+            self.assertEqual(sftp_upload(sftp, source, "changed.bin"), len(content))
+        self.assertEqual(self.read_remote("changed.bin"), content)
+
+    def test_replace_same_size(self):
+        content = os.urandom(4096)
+        source = self.write("same.bin", content)
+        with open(os.path.join(self.remote.name, "same.bin"), "wb") as file:
+            file.write(b"x" * len(content))
+
+        with self.pool.channel() as sftp:
+            self.assertEqual(sftp_upload(sftp, source, "same.bin"), len(content))
+        self.assertEqual(self.read_remote("same.bin"), content)
+
+    def test_pool_reuses_transport(self):
+        before = self.server.connections
+        source = self.write("small.txt", b"small")
+        for _ in range(3):
+            with self.pool.channel() as sftp:
+                sftp_upload(sftp, source, "small.txt", resume=False)
+        self.assertEqual(self.server.connections - before, 1)
+
+    def test_upload_many(self):
+        files = []
+        for index in range(6):
+            source = self.write(f"file{index}.bin", os.urandom(200 * 1024))
+            files.append((source, f"many/sub/file{index}.bin"))
+
+        before = self.server.connections
+        stats = sftp_upload_many(self.pool, files, channels=3)
+        self.assertEqual((stats["files"], stats["uploaded"]), (6, 6))
+        self.assertEqual(self.server.connections - before, 1)
+        self.assertLessEqual(len(self.pool._idle), 3)
+        for source, destination in files:
+            with open(source, "rb") as file:
+                self.assertEqual(self.read_remote(destination), file.read())
+
+    def test_upload_many_skipped(self):
+        content = os.urandom(1000)
+        complete = self.write("complete.bin", content)
+        self.write_part("complete.bin", content, complete)
+        empty = self.write("empty.bin", b"")
+        files = [(complete, "complete.bin"), (empty, "empty.bin")]
+
+        stats = sftp_upload_many(self.pool, files, channels=2)
+        self.assertEqual((stats["uploaded"], stats["skipped"]), (1, 1))
+        self.assertEqual(self.read_remote("complete.bin"), content)
+        self.assertEqual(self.read_remote("empty.bin"), b"")
+
+    def test_pools_per_run(self):
+        args = ("127.0.0.1", self.server.port, "user", "password")
+        first = get_sftp_pool(*args, run_id="run1")
+        self.assertIs(get_sftp_pool(*args, run_id="run1"), first)
+        second = get_sftp_pool(*args, run_id="run2")
+        self.assertIsNot(second, first)
+
+        with first.channel():
+            pass
+        close_sftp_pools("run1")
+        self.assertIsNone(first._transport)
+        self.assertIsNot(get_sftp_pool(*args, run_id="run1"), first)
+        self.assertIs(get_sftp_pool(*args, run_id="run2"), second)
+        close_sftp_pools()
+
+
+if __name__ == "__main__":
+    unittest.main()
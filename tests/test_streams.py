@@ -0,0 +1,56 @@
+import unittest
+
+from actionflow.streams import MODULE_LOADING, LineMatcher, LineStream
+
+
+class TestLineStream(unittest.TestCase):
+    def collect(self, chunks, **kwargs):
+        lines = []
+        stream = LineStream(on_line=lines.append, **kwargs)
+        for chunk in chunks:
+            stream.feed(chunk)
+        stream.close()
+        return lines, stream
+
+    def test_split_utf8_sequence(self):
+        data = "Mise à jour terminée ✓\nsuite\n".encode()
+        chunks = [data[index : index + 1] for index in range(len(data))]
+        lines, _ = self.collect(chunks)
+        self.assertEqual(lines, ["Mise à jour terminée ✓", "suite"])
+
+    def test_line_endings(self):
+        lines, _ = self.collect([b"one\r", b"\ntwo\r\nthree\rfour", b"\r"])
+        self.assertEqual(lines, ["one", "two", "three", "four"])
+
+    def test_bounded_tail_and_line(self):
+        lines, stream = self.collect(
+            [f"line {index}\n".encode() for index in range(1000)] + [b"x" * 25],
+            tail_lines=10,
+            max_line=10,
+        )
+        self.assertEqual(stream.lines, 1003)
+        self.assertEqual(len(stream.tail), 10)
+        self.assertEqual(list(stream.tail)[-3:], ["x" * 10, "x" * 10, "x" * 5])
+
+    def test_matchers(self):
+        events = []
+        lines, stream = self.collect(
+            [
+                b"2024 INFO db odoo.modules.loading: Loading module account (65/66)\n",
+                b"progress 42%\n",
+            ],
+            matchers=[MODULE_LOADING, LineMatcher("percent", r"(?P<value>\d+)%")],
+            on_event=events.append,
+        )
+        self.assertEqual(
+            events,
+            [
+                {"event": "module", "name": "account", "index": 65, "total": 66},
+                {"event": "percent", "value": 42},
+            ],
+        )
+        self.assertEqual(stream.last_event["value"], 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
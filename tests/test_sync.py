@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from actionflow.sync import copy_file, sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "source")
+        self.target = os.path.join(self.tmpdir.name, "target")
+        self.manifest = os.path.join(self.tmpdir.name, "manifest.json")
+        self.write("a.txt", b"alpha")
+        self.write("sub/deep/b.bin", os.urandom(300 * 1024))
+        os.symlink("a.txt", os.path.join(self.source, "link"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content, root=None):
+        path = os.path.join(root or self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.target, name), "rb") as file:
+            return file.read()
+
+    def sync(self, **kwargs):
+        return sync_tree(
+            self.source, self.target, workers=4, manifest=self.manifest, **kwargs
+        )
+
+    def test_initial_and_incremental(self):
+        stats = self.sync()
+        self.assertEqual((stats.files, stats.copied), (3, 3))
+        self.assertEqual(self.read("a.txt"), b"alpha")
+        self.assertEqual(os.readlink(os.path.join(self.target, "link")), "a.txt")
+        source_stat = os.stat(os.path.join(self.source, "sub/deep/b.bin"))
+        target_stat = os.stat(os.path.join(self.target, "sub/deep/b.bin"))
+        self.assertEqual(source_stat.st_mtime_ns, target_stat.st_mtime_ns)
+
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.bytes), (0, 0))
+
+        self.write("a.txt", b"ALPHA!")
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.bytes), (1, 6))
+        self.assertEqual(self.read("a.txt"), b"ALPHA!")
+
+    def test_manifest_detects_replaced_file(self):
+        self.sync()
+        path = os.path.join(self.source, "a.txt")
+        status = os.stat(path)
+        # Same size and mtime, new inode
+        replacement = self.write("a.new", b"ALPHA")
+        os.utime(replacement, ns=(status.st_atime_ns, status.st_mtime_ns))
+        os.replace(replacement, path)
+
+        stats = self.sync()
+        self.assertEqual(stats.copied, 1)
+        self.assertEqual(self.read("a.txt"), b"ALPHA")
+
+    def test_delete(self):
+        self.write("extra.txt", b"extra", root=self.target)
+        self.write("old/extra.txt", b"extra", root=self.target)
+        stats = self.sync()
+        self.assertEqual(stats.deleted, 0)
+        self.assertTrue(os.path.exists(os.path.join(self.target, "extra.txt")))
+
+        stats = self.sync(delete=True)
+        self.assertEqual(stats.deleted, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.target, "extra.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.target, "old")))
+
+    def test_type_changes(self):
+        self.sync()
+        # File -> directory, directory -> file, file -> symlink
+        os.remove(os.path.join(self.source, "a.txt"))
+        self.write("a.txt/c.txt", b"gamma")
+        os.rename(
+            os.path.join(self.source, "sub"), os.path.join(self.tmpdir.name, "old")
+        )
+        self.write("sub", b"now a file")
+        os.remove(os.path.join(self.source, "link"))
+        self.write("link", b"now a file")
+
+        self.sync(delete=True)
+        self.assertEqual(self.read("a.txt/c.txt"), b"gamma")
+        self.assertEqual(self.read("sub"), b"now a file")
+        self.assertFalse(os.path.islink(os.path.join(self.target, "link")))
+        self.assertEqual(self.read("link"), b"now a file")
+
+        # Symlink replacing a file of the same size and mtime
+        os.remove(os.path.join(self.source, "sub"))
+        os.symlink("a.txt", os.path.join(self.source, "sub"))
+        self.sync(delete=True)
+        self.assertEqual(os.readlink(os.path.join(self.target, "sub")), "a.txt")
+
+    def test_copy_file_atomic(self):
+        source = self.write("big.bin", os.urandom(1024 * 1024))
+        target = os.path.join(self.tmpdir.name, "copy.bin")
+        copy_file(source, target, os.stat(source))
+        with open(source, "rb") as left, open(target, "rb") as right:
+            self.assertEqual(left.read(), right.read())
+        temp_files = [
+            name for name in os.listdir(self.tmpdir.name) if name.endswith(".tmp")
+        ]
+        self.assertEqual(temp_files, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from actionflow import tracing
+from actionflow.actions.examples import BlockingAction
+from actionflow.jobs import Group
+
+
+class TestTracing(unittest.TestCase):
+    def test_group_spans(self):
+        group = Group(actions=[BlockingAction(time=0), BlockingAction(time=0)])
+
+        tracing.start_tracing()
+        try:
+            group.execute(1, 1)
+        finally:
+            tracer = tracing.stop_tracing()
+
+        group_span, *action_spans = tracer.spans
+        self.assertEqual(group_span.kind, "group")
+        self.assertEqual(len(action_spans), 2)
+        for span in action_spans:
+            self.assertEqual(span.parent_id, group_span.span_id)
+            self.assertEqual(span.state, "success")
+
+        events = [e for e in tracer.to_chrome()["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(len(events), 3)
+
+        otlp = tracer.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len(otlp), 3)
+
+    def test_disabled(self):
+        self.assertIsNone(tracing.tracer)
+        action = BlockingAction(time=0)
+        action.execute(1, 1)
+        self.assertIsNone(action._span)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import actionflow.actions.examples  # noqa: F401 (register the example action)
+from actionflow.core import Flow
+from actionflow.workspace import TRASH_DIR, WorkspaceManager, get_workspace_manager
+
+FLOW = """
+name: workspace
+context:
+  workspace:
+    path: {root}
+    template: {template}
+  keep-workspace: {keep}
+jobs:
+  job:
+    steps:
+      - name: example
+        with:
+          sleep: 0
+"""
+
+
+class TestWorkspaceManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "runs")
+        self.template = os.path.join(self.tmpdir.name, "template")
+        os.makedirs(os.path.join(self.template, "data"))
+        with open(os.path.join(self.template, "data", "fixture.txt"), "w") as file:
+            file.write("fixture")
+        os.symlink("data/fixture.txt", os.path.join(self.template, "link"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self, *args) -> str:
+        with open(os.path.join(*args)) as file:
+            return file.read()
+
+    def test_runs_are_isolated(self):
+        manager = WorkspaceManager(self.root, template=self.template)
+        first, second = manager.create("run1"), manager.create("run2")
+        self.assertNotEqual(first.path, second.path)
+
+        with open(first.get_path("data", "fixture.txt"), "w") as file:
+            file.write("changed")
+        self.assertEqual(self.read(second.path, "data", "fixture.txt"), "fixture")
+        self.assertEqual(self.read(self.template, "data", "fixture.txt"), "fixture")
+        self.assertEqual(os.readlink(second.get_path("link")), "data/fixture.txt")
+
+        with self.assertRaises(FileExistsError):
+            manager.create("run1")
+
+    def test_hardlink_seed(self):
+        manager = WorkspaceManager(self.root, template=self.template, seed="hardlink")
+        workspace = manager.create("run")
+        self.assertEqual(
+            os.stat(workspace.get_path("data", "fixture.txt")).st_ino,
+            os.stat(os.path.join(self.template, "data", "fixture.txt")).st_ino,
+        )
+        self.assertTrue(os.path.islink(workspace.get_path("link")))
+
+    def test_release_in_background(self):
+        manager = WorkspaceManager(self.root, template=self.template)
+        workspace = manager.create("run")
+        workspace.release()
+        self.assertFalse(os.path.exists(workspace.path))
+        manager.wait()
+        self.assertEqual(os.listdir(os.path.join(self.root, TRASH_DIR)), [])
+
+    def test_purge_leftovers(self):
+        leftover = os.path.join(self.root, TRASH_DIR, "run-1234")
+        os.makedirs(os.path.join(leftover, "data"))
+        manager = WorkspaceManager(self.root)
+        manager.wait()
+        self.assertFalse(os.path.exists(leftover))
+
+    def test_unknown_seed(self):
+        with self.assertRaises(ValueError):
+            WorkspaceManager(self.root, seed="copy")
+
+    def test_reflink_fallback_logged(self):
+        manager = WorkspaceManager(self.root, template=self.template)
+        with mock.patch("actionflow.sync._clone", return_value=False):
+            with self.assertLogs(level="WARNING") as logs:
+                manager.create("run1")
+            self.assertIn("full copies of the template", logs.output[0])
+            # Once per manager
+            with self.assertNoLogs(level="WARNING"):
+                manager.create("run2")
+
+    def test_flow_workspace(self):
+        raw = FLOW.format(root=self.root, template=self.template, keep="false")
+        first, second = Flow.from_string(raw), Flow.from_string(raw)
+        # Created by execute, not when the flow is loaded
+        self.assertIsNone(first.context.workspace)
+        self.assertFalse(os.path.exists(self.root))
+        self.assertNotEqual(first.run_id, second.run_id)
+
+        first.execute()
+        self.assertEqual(first.machine.state, "success")
+        workspace = first.context.workspace
+        self.assertEqual(workspace.path, os.path.join(self.root, first.run_id))
+        self.assertFalse(os.path.exists(workspace.path))
+        get_workspace_manager(self.root, template=self.template).wait()
+
+        # Kept by default
+        kept = Flow.from_string(raw.replace("  keep-workspace: false\n", ""))
+        self.assertTrue(kept.context.keep_workspace)
+        kept.execute()
+        workspace = kept.context.workspace
+        self.assertEqual(self.read(workspace.path, "data", "fixture.txt"), "fixture")